@@ -1,4 +1,6 @@
+import numpy as np
 import pandas as pd
+from dataset_io import DatasetWriter, iter_dataset
 
 # Function to map hour to cycle
 def hour_to_cycle(hour):
@@ -11,21 +13,59 @@ def hour_to_cycle(hour):
     else:
         return 4
 
-input_file = 'orders_enriched_for_ml.csv'
-output_file = 'orders_enriched_with_cycle.csv'
+# Vectorized hour_to_cycle: np.digitize bin (0 = before midnight, 4 = evening or NaN) -> cycle
+CYCLE_BOUNDS = np.array([0, 6, 12, 18])
+CYCLE_BY_BIN = np.array([4, 1, 2, 3, 4], dtype=np.int8)
 
-# Clear output file if exists
-with open(output_file, 'w') as f:
-    pass
+def hours_to_cycle(hours):
+    return CYCLE_BY_BIN[np.digitize(np.asarray(hours, dtype=np.float64), CYCLE_BOUNDS)]
 
-chunk_size = 100_000
-first_chunk = True
-chunk_num = 0
-for chunk in pd.read_csv(input_file, chunksize=chunk_size):
-    chunk['cycle'] = chunk['hour'].apply(hour_to_cycle)
-    chunk.to_csv(output_file, mode='a', index=False, header=first_chunk)
-    chunk_num += 1
-    print(f"Processed chunk {chunk_num} ({chunk_size} rows per chunk)")
-    first_chunk = False
+# Derived time features: name -> (source column, vectorized function)
+TIME_FEATURES = {
+    'cycle': ('hour', hours_to_cycle)
+}
 
-print('Added cycle feature to orders_enriched_for_ml.csv and saved as orders_enriched_with_cycle.csv') 
\ No newline at end of file
+def add_time_features(chunk, features=('cycle',)):
+    """
+    Add derived time features to a chunk in place
+    """
+    for name in features:
+        source, compute = TIME_FEATURES[name]
+        chunk[name] = compute(chunk[source].to_numpy())
+    return chunk
+
+def stream_enriched_orders(input_name='orders_enriched_for_ml', columns=None, features=('cycle',),
+                           chunk_size=1_000_000):
+    """
+    Stream the enriched orders with derived time features added on the fly.
+    
+    `columns` lists the columns wanted downstream (derived features
+    included); only those and the features' source columns are decoded.
+    """
+    read_columns = None
+    if columns is not None:
+        sources = [TIME_FEATURES[name][0] for name in features]
+        read_columns = list(dict.fromkeys([c for c in columns if c not in features] + sources))
+    for chunk in iter_dataset(input_name, columns=read_columns, batch_size=chunk_size):
+        chunk = add_time_features(chunk, features)
+        yield chunk if columns is None else chunk[list(columns)]
+
+def main():
+    """
+    Materialize orders_enriched_with_cycle for consumers outside the pipeline
+    (prepare_training_data_for_product_forecasting streams the cycle instead)
+    """
+    input_name = 'orders_enriched_for_ml'
+    output_name = 'orders_enriched_with_cycle'
+    
+    chunk_num = 0
+    with DatasetWriter(output_name) as writer:
+        for chunk in stream_enriched_orders(input_name):
+            writer.write(chunk)
+            chunk_num += 1
+            print(f"Processed chunk {chunk_num} ({writer.rows_written:,} rows)")
+    
+    print(f'Added cycle feature to {input_name} and saved as {writer.path}')
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
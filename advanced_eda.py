@@ -3,14 +3,15 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
+from dataset_io import load_order_products, read_dataset
 
 # Ensure plots directory exists
 os.makedirs('plots', exist_ok=True)
 
 # --- Instacart Advanced EDA ---
-orders = pd.read_csv('orders_encoded.csv')
-products = pd.read_csv('products_encoded.csv')
-order_products_prior = pd.read_csv('order_products__prior.csv')
+orders = read_dataset('orders_encoded')
+products = read_dataset('products_encoded')
+order_products_prior = load_order_products('prior', columns=['order_id', 'product_id', 'reordered'])
 
 eda_report = []
 eda_report.append('# Advanced EDA Report\n')
@@ -129,7 +130,7 @@ for col in ['total_orders_per_user', 'avg_days_between_orders']:
 
 # --- M5 Walmart Advanced EDA ---
 eda_report.append('\n## M5 Walmart Dataset\n')
-train = pd.read_csv('train_encoded.csv')
+train = read_dataset('train_encoded')
 
 # 1. Sales Trends
 eda_report.append('### Sales Trends')
@@ -1,8 +1,9 @@
 import pandas as pd
 import matplotlib.pyplot as plt
+from dataset_io import read_dataset, write_dataset
 
-# Read the data
-orders = pd.read_csv('orders_with_zones.csv')
+# Read the data (only the columns aggregated below)
+orders = read_dataset('orders_with_zones', columns=['zone', 'order_hour_of_day', 'order_dow'])
 
 # Aggregate by zone and order_hour_of_day
 zone_hour = orders.groupby(['zone', 'order_hour_of_day']).size().reset_index(name='num_orders')
@@ -37,11 +38,11 @@ plt.savefig('orders_by_zone_dow.png')
 plt.close()
 
 # Save summary tables
-zone_hour_pivot.to_csv('zone_hour_order_counts.csv')
-zone_dow_pivot.to_csv('zone_dow_order_counts.csv')
+zone_hour_path = write_dataset(zone_hour_pivot, 'zone_hour_order_counts')
+zone_dow_path = write_dataset(zone_dow_pivot, 'zone_dow_order_counts')
 
 print('Aggregation and plots complete. Outputs:')
-print(' - zone_hour_order_counts.csv')
-print(' - zone_dow_order_counts.csv')
+print(f' - {zone_hour_path}')
+print(f' - {zone_dow_path}')
 print(' - orders_by_zone_hour.png')
 print(' - orders_by_zone_dow.png') 
\ No newline at end of file
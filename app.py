@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime, timedelta
@@ -9,21 +9,33 @@ import os
 import json
 from werkzeug.security import generate_password_hash, check_password_hash
 import jwt
+import click
+import math
 from functools import wraps
+from sqlalchemy import inspect as sa_inspect
 
 # Import our existing models
 import sys
 sys.path.append('..')
+from order_events import order_events, order_topic, mfu_topic, mfu_position_payload, format_sse
+from http_caching import HttpCaching, conditional
+from instrumentation import Instrumentation
+from dataset_io import iter_dataset
 
 # Initialize Flask app
-app = Flask(__name__)
+app = Flask(__name__, template_folder='frontend')
 app.config['SECRET_KEY'] = 'your-secret-key-here'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///quickcart.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///quickcart.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['TRACKING_HEARTBEAT_SECONDS'] = 15
+app.config['STREAM_TOKEN_SECONDS'] = 60  # Lifetime of an order-scoped tracking token
 
 # Initialize extensions
 db = SQLAlchemy(app)
 CORS(app)
+# Instrumentation first so its timing wraps the other after_request hooks
+instrumentation = Instrumentation(app, db)
+http_caching = HttpCaching(app)
 
 # Database Models
 class User(db.Model):
@@ -33,6 +45,7 @@ class User(db.Model):
     name = db.Column(db.String(100), nullable=False)
     address = db.Column(db.Text)
     phone = db.Column(db.String(20))
+    role = db.Column(db.String(20), nullable=False, default='customer', server_default='customer')  # customer, staff, fleet
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     orders = db.relationship('Order', backref='user', lazy=True)
 
@@ -107,10 +120,65 @@ def token_required(f):
         return f(current_user, *args, **kwargs)
     return decorated
 
+USER_ROLES = ['customer', 'staff', 'fleet']
+STAFF_ROLES = ['staff', 'fleet']  # May drive order status and MFU positions
+
+def role_required(*roles):
+    """Like token_required, but the user must also hold one of `roles`"""
+    def decorator(f):
+        @wraps(f)
+        @token_required
+        def decorated(current_user, *args, **kwargs):
+            if current_user is None or current_user.role not in roles:
+                return jsonify({'message': 'Insufficient permissions'}), 403
+            return f(current_user, *args, **kwargs)
+        return decorated
+    return decorator
+
+# Order tracking events
+ORDER_STATUSES = ['pending', 'confirmed', 'preparing', 'delivering', 'delivered']
+MFU_STATUSES = ['available', 'busy', 'maintenance']
+
+def _order_status_payload(order):
+    return {
+        'order_id': order.id,
+        'status': order.status,
+        'mfu_id': order.mfu_id,
+        'estimated_delivery_time': order.estimated_delivery_time.isoformat() if order.estimated_delivery_time else None,
+        'actual_delivery_time': order.actual_delivery_time.isoformat() if order.actual_delivery_time else None
+    }
+
+def _mfu_position_payload(mfu):
+    return mfu_position_payload(mfu.id, mfu.location_lat, mfu.location_lng, mfu.status, mfu.current_load)
+
+def publish_order_status(order):
+    """Push an order's current status to its trackers"""
+    order_events.publish(order_topic(order.id), 'status', _order_status_payload(order))
+
+def publish_mfu_position(mfu):
+    """Push an MFU's current position to trackers of its orders"""
+    order_events.publish(mfu_topic(mfu.id), 'position', _mfu_position_payload(mfu))
+
+def register_fleet(fleet_manager, capacity=20):
+    """
+    Add the active MFUs to a delivery_engine.MFUFleetManager, with room
+    for `capacity` orders each, and publish the fleet's position updates
+    to this app's order trackers
+    """
+    from delivery_engine import MFU as FleetMFU
+    for mfu in MFU.query.filter_by(is_active=True):
+        fleet_manager.add_mfu(FleetMFU(
+            mfu_id=f"MFU_{mfu.id}",
+            current_lat=mfu.location_lat,
+            current_lng=mfu.location_lng,
+            capacity=capacity
+        ), tracking_id=mfu.id)
+    fleet_manager.event_broker = order_events
+
 # Routes
 @app.route('/')
 def index():
-    return render_template('index.html')
+    return http_caching.cached_page('index.html')
 
 # Authentication routes
 @app.route('/api/auth/register', methods=['POST'])
@@ -173,6 +241,7 @@ def login():
 
 # Product routes
 @app.route('/api/products', methods=['GET'])
+@conditional
 def get_products():
     products = Product.query.filter_by(is_active=True).all()
     return jsonify([{
@@ -187,6 +256,7 @@ def get_products():
     } for p in products])
 
 @app.route('/api/products/<int:product_id>', methods=['GET'])
+@conditional
 def get_product(product_id):
     product = Product.query.get_or_404(product_id)
     return jsonify({
@@ -201,6 +271,7 @@ def get_product(product_id):
     })
 
 @app.route('/api/products/category/<category>', methods=['GET'])
+@conditional
 def get_products_by_category(category):
     products = Product.query.filter_by(category=category, is_active=True).all()
     return jsonify([{
@@ -270,6 +341,8 @@ def create_order(current_user):
         new_order.mfu_id = available_mfu.id
         db.session.commit()
     
+    publish_order_status(new_order)
+    
     return jsonify({
         'message': 'Order created successfully',
         'order_id': new_order.id,
@@ -315,6 +388,114 @@ def get_order(current_user, order_id):
         } for item in order.order_items]
     })
 
+@app.route('/api/orders/<int:order_id>/status', methods=['PUT'])
+@role_required(*STAFF_ROLES)
+def update_order_status(current_user, order_id):
+    data = request.get_json(silent=True) or {}
+    status = data.get('status')
+    if status not in ORDER_STATUSES:
+        return jsonify({'message': f'Invalid status, expected one of {ORDER_STATUSES}'}), 400
+    
+    order = Order.query.get_or_404(order_id)
+    order.status = status
+    if status == 'delivered' and not order.actual_delivery_time:
+        order.actual_delivery_time = datetime.utcnow()
+    db.session.commit()
+    
+    publish_order_status(order)
+    
+    return jsonify(_order_status_payload(order))
+
+STREAM_TOKEN_SCOPE = 'order-stream'
+
+@app.route('/api/orders/<int:order_id>/stream-token', methods=['POST'])
+@token_required
+def issue_stream_token(current_user, order_id):
+    """Short-lived token that only opens the event stream of one order.
+    
+    EventSource cannot set headers, so the stream token travels in the query
+    string, where proxies and access logs see it; keeping it order-scoped and
+    valid for STREAM_TOKEN_SECONDS means a leaked URL is worth very little,
+    unlike the long-lived login token.
+    """
+    order = Order.query.get_or_404(order_id)
+    if order.user_id != current_user.id and current_user.role not in STAFF_ROLES:
+        return jsonify({'message': 'Order not found'}), 404
+    
+    expires_in = app.config['STREAM_TOKEN_SECONDS']
+    stream_token = jwt.encode(
+        {'order_id': order.id, 'scope': STREAM_TOKEN_SCOPE,
+         'exp': datetime.utcnow() + timedelta(seconds=expires_in)},
+        app.config['SECRET_KEY'],
+        algorithm='HS256'
+    )
+    return jsonify({'stream_token': stream_token, 'expires_in': expires_in})
+
+@app.route('/api/orders/<int:order_id>/events', methods=['GET'])
+def stream_order_events(order_id):
+    """Server-sent status and MFU position events for one order.
+    
+    Authenticated with ?stream_token= from issue_stream_token; the token is
+    only checked at connect time, so an open stream outlives its expiry.
+    Each open stream occupies a worker for as long as the client stays
+    connected, so serve the app with threaded or async workers (see
+    gunicorn.conf.py) rather than the default sync ones.
+    """
+    token = request.args.get('stream_token')
+    if not token:
+        return jsonify({'message': 'Stream token is missing'}), 401
+    try:
+        data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
+    except:
+        return jsonify({'message': 'Stream token is invalid'}), 401
+    if data.get('scope') != STREAM_TOKEN_SCOPE or data.get('order_id') != order_id:
+        return jsonify({'message': 'Stream token is invalid'}), 401
+    
+    # Subscribe before reading the snapshot, so a change published in
+    # between is replayed (at worst twice) rather than lost
+    subscription = order_events.subscribe([order_topic(order_id)])
+    
+    # One query at connect time; afterwards the stream is fed purely by pub/sub
+    order = Order.query.get(order_id)
+    if order is None:
+        subscription.close()
+        return jsonify({'message': 'Order not found'}), 404
+    if order.mfu_id:
+        subscription.add_topic(mfu_topic(order.mfu_id))
+    snapshot = _order_status_payload(order)
+    position = _mfu_position_payload(order.mfu) if order.mfu else None
+    heartbeat = app.config['TRACKING_HEARTBEAT_SECONDS']
+    
+    def stream():
+        try:
+            yield 'retry: 5000\n\n'
+            yield format_sse('status', snapshot)
+            if position:
+                yield format_sse('position', position)
+            if snapshot['status'] == 'delivered':
+                return
+            
+            while True:
+                event = subscription.get(timeout=heartbeat)
+                if event is None:
+                    yield ': keep-alive\n\n'
+                    continue
+                
+                yield event.encoded
+                if event.event_type == 'status':
+                    mfu_id = event.data.get('mfu_id')
+                    if mfu_id and mfu_topic(mfu_id) not in subscription.topics:
+                        subscription.add_topic(mfu_topic(mfu_id))
+                    if event.data.get('status') == 'delivered':
+                        return
+        finally:
+            subscription.close()
+    
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
 # MFU routes
 @app.route('/api/mfu', methods=['GET'])
 def get_mfu_locations():
@@ -329,6 +510,40 @@ def get_mfu_locations():
         'status': mfu.status
     } for mfu in mfus])
 
+def _coordinate(data, key, limit):
+    """Finite number within +/-limit from a JSON body, or None"""
+    value = data.get(key)
+    if isinstance(value, bool):
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if math.isfinite(value) and abs(value) <= limit else None
+
+@app.route('/api/mfu/<int:mfu_id>/location', methods=['PUT'])
+@role_required(*STAFF_ROLES)
+def update_mfu_location(current_user, mfu_id):
+    data = request.get_json(silent=True) or {}
+    lat = _coordinate(data, 'lat', 90)
+    lng = _coordinate(data, 'lng', 180)
+    if lat is None or lng is None:
+        return jsonify({'message': 'lat and lng must be numeric coordinates'}), 400
+    status = data.get('status')
+    if status is not None and status not in MFU_STATUSES:
+        return jsonify({'message': f'Invalid status, expected one of {MFU_STATUSES}'}), 400
+    
+    mfu = MFU.query.get_or_404(mfu_id)
+    mfu.location_lat = lat
+    mfu.location_lng = lng
+    if status is not None:
+        mfu.status = status
+    db.session.commit()
+    
+    publish_mfu_position(mfu)
+    
+    return jsonify(_mfu_position_payload(mfu))
+
 @app.route('/api/mfu/<int:mfu_id>/orders', methods=['GET'])
 def get_mfu_orders(mfu_id):
     orders = Order.query.filter_by(mfu_id=mfu_id).order_by(Order.created_at.desc()).all()
@@ -413,7 +628,7 @@ def get_product_analytics():
     # Get top selling products
     order_items = db.session.query(
         OrderItem.product_id,
-        Product.name,
+        Product.name.label('product_name'),
         db.func.sum(OrderItem.quantity).label('total_quantity'),
         db.func.sum(OrderItem.quantity * OrderItem.price).label('total_revenue')
     ).join(Product).group_by(OrderItem.product_id, Product.name).order_by(
@@ -429,6 +644,7 @@ def get_product_analytics():
 
 # Search route
 @app.route('/api/search', methods=['GET'])
+@conditional
 def search_products():
     query = request.args.get('q', '').lower()
     if not query:
@@ -454,10 +670,36 @@ def search_products():
         'icon': p.icon
     } for p in products])
 
+# Columns added to existing tables since they were first created, as
+# (table, column, DDL); db.create_all only creates missing tables
+SCHEMA_UPGRADES = [
+    (User.__tablename__, 'role', "VARCHAR(20) NOT NULL DEFAULT 'customer'"),
+]
+
+def _missing_columns():
+    """SCHEMA_UPGRADES entries whose column the database does not have yet"""
+    inspector = sa_inspect(db.engine)
+    existing = {}
+    missing = []
+    for table, column, ddl in SCHEMA_UPGRADES:
+        if table not in existing:
+            existing[table] = {col['name'] for col in inspector.get_columns(table)}
+        if column not in existing[table]:
+            missing.append((table, column, ddl))
+    return missing
+
+def _require_current_schema():
+    """Refuse to run against tables that predate SCHEMA_UPGRADES"""
+    missing = _missing_columns()
+    if missing:
+        names = ', '.join(f"{table}.{column}" for table, column, _ in missing)
+        raise RuntimeError(f"Database schema is out of date (missing {names}); run `flask migrate-db`")
+
 # Initialize database with sample data
 def init_db():
     with app.app_context():
         db.create_all()
+        _require_current_schema()
         
         # Check if data already exists
         if Product.query.first():
@@ -531,9 +773,7 @@ def init_db():
             }
         ]
         
-        for product_data in sample_products:
-            product = Product(**product_data)
-            db.session.add(product)
+        db.session.bulk_insert_mappings(Product, sample_products)
         
         # Add sample MFUs
         sample_mfus = [
@@ -560,13 +800,157 @@ def init_db():
             }
         ]
         
-        for mfu_data in sample_mfus:
-            mfu = MFU(**mfu_data)
-            db.session.add(mfu)
+        db.session.bulk_insert_mappings(MFU, sample_mfus)
         
         db.session.commit()
         print("Database initialized with sample data!")
 
+# Bulk catalog import
+# Maps products_full (see data_cleaning.py) onto Product columns
+CATALOG_COLUMN_MAP = {
+    'product_id': 'id',
+    'product_name': 'name',
+    'aisle': 'description',
+    'department': 'category'
+}
+CATALOG_FIELDS = ['id', 'name', 'description', 'price', 'category',
+                  'stock_quantity', 'image_url', 'icon', 'is_active']
+
+def _existing_product_ids(ids):
+    return {pid for (pid,) in db.session.query(Product.id).filter(Product.id.in_(ids))}
+
+def _catalog_rows(chunk, default_price, default_stock):
+    """Convert a catalog chunk into Product mappings, the columns it provides and the ids already stored"""
+    chunk = chunk.rename(columns=CATALOG_COLUMN_MAP)
+    if 'id' not in chunk.columns or 'name' not in chunk.columns:
+        raise ValueError('Catalog needs product_id/id and product_name/name columns')
+    
+    provided = [col for col in CATALOG_FIELDS if col in chunk.columns]
+    chunk = chunk[provided].astype(object).where(chunk[provided].notna(), None)
+    chunk['id'] = chunk['id'].astype(int)
+    existing = _existing_product_ids(chunk['id'].tolist())
+    
+    # Defaults only apply to new rows; existing rows keep their values for
+    # columns the catalog does not provide and for its empty cells
+    defaults = {
+        'price': default_price,
+        'category': 'Uncategorized',
+        'stock_quantity': default_stock,
+        'is_active': True
+    }
+    is_new = ~chunk['id'].isin(existing)
+    for col, value in defaults.items():
+        if col not in chunk.columns:
+            chunk[col] = value
+        else:
+            chunk.loc[is_new & chunk[col].isna(), col] = value
+    
+    update_columns = [col for col in provided if col != 'id']
+    return chunk.to_dict('records'), update_columns, existing
+
+def _upsert_products(rows, update_columns, existing):
+    """Insert new product mappings and update existing ones with their non-empty cells"""
+    updates = []
+    for row in rows:
+        if row['id'] in existing:
+            values = {col: row[col] for col in update_columns if row[col] is not None}
+            if values:
+                updates.append(dict(values, id=row['id']))
+    db.session.bulk_update_mappings(Product, updates)
+    
+    new_rows = [row for row in rows if row['id'] not in existing]
+    if not new_rows:
+        return
+    dialect = db.engine.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        # Native ON CONFLICT insert, sent as a single executemany; covers ids
+        # repeated within the file
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        
+        stmt = insert(Product.__table__)
+        if update_columns:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['id'],
+                set_={col: stmt.excluded[col] for col in update_columns}
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=['id'])
+        db.session.execute(stmt, new_rows)
+    else:
+        db.session.bulk_insert_mappings(Product, new_rows)
+
+def import_catalog(source, chunk_size=10000, default_price=0.0, default_stock=0):
+    """
+    Stream a product catalog into the database in chunks.
+    
+    `source` is a Parquet, Feather or CSV file, or a dataset name such as
+    products_full that resolves to one of them (see dataset_io).
+    
+    Rows are upserted on product id inside a single transaction, so a
+    failed import leaves the catalog untouched.
+    """
+    with app.app_context():
+        db.create_all()
+        
+        imported = 0
+        try:
+            for chunk in iter_dataset(source, batch_size=chunk_size):
+                rows, update_columns, existing = _catalog_rows(chunk, default_price, default_stock)
+                _upsert_products(rows, update_columns, existing)
+                imported += len(rows)
+                print(f"Imported {imported} products...")
+            
+            if db.engine.dialect.name == 'postgresql':
+                # Explicit ids bypass the serial sequence; move it past the imported ids
+                db.session.execute(db.text(
+                    f"SELECT setval(pg_get_serial_sequence('{Product.__tablename__}', 'id'), "
+                    f"COALESCE(MAX(id), 1)) FROM {Product.__tablename__}"
+                ))
+            
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+    
+    return imported
+
+@app.cli.command('import-catalog')
+@click.argument('source')
+@click.option('--chunk-size', default=10000, show_default=True, help='Rows per batch')
+@click.option('--default-price', default=0.0, show_default=True, help='Price for new products without one')
+@click.option('--default-stock', default=0, show_default=True, help='Stock for new products without one')
+def import_catalog_command(source, chunk_size, default_price, default_stock):
+    """Bulk load a product catalog such as products_full.parquet or a CSV"""
+    imported = import_catalog(source, chunk_size, default_price, default_stock)
+    click.echo(f"Catalog import complete: {imported} products upserted from {source}")
+
+@app.cli.command('migrate-db')
+def migrate_db_command():
+    """Create missing tables and add columns introduced since they were created"""
+    db.create_all()
+    missing = _missing_columns()
+    with db.engine.begin() as conn:
+        for table, column, ddl in missing:
+            conn.execute(db.text(f'ALTER TABLE "{table}" ADD COLUMN {column} {ddl}'))
+            click.echo(f"Added {table}.{column}")
+    click.echo("Database schema is up to date" if not missing else f"Applied {len(missing)} schema upgrade(s)")
+
+@app.cli.command('set-role')
+@click.argument('email')
+@click.argument('role', type=click.Choice(USER_ROLES))
+def set_role_command(email, role):
+    """Grant a user a role, e.g. staff for order status and MFU updates"""
+    _require_current_schema()
+    user = User.query.filter_by(email=email).first()
+    if user is None:
+        raise click.ClickException(f"No user with email {email}")
+    user.role = role
+    db.session.commit()
+    click.echo(f"{email} is now {role}")
+
 if __name__ == '__main__':
     init_db()
     app.run(debug=True, host='0.0.0.0', port=5000) 
\ No newline at end of file
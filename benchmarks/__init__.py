@@ -0,0 +1,5 @@
+"""
+Performance harnesses for QuickCart.
+
+Run modules from the repository root, e.g. ``python -m benchmarks.api_load``.
+"""
@@ -0,0 +1,124 @@
+"""
+Seeded synthetic cities for delivery-engine benchmarks.
+
+A city is an OrderStore of orders plus a list of MFU depot locations.
+Demand is a mixture of neighbourhood clusters with Zipf-like weights over
+a uniform background; order times follow a daytime profile with lunch and
+evening rush-hour bursts; depots are laid out on a grid, a ring, at one
+central hub or at the busiest demand clusters. The same seed always
+produces the same city.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Tuple
+
+import numpy as np
+
+from order_store import OrderStore
+
+KM_PER_DEG_LAT = 110.574
+KM_PER_DEG_LNG_EQUATOR = 111.320
+
+SCALES = {'1k': 1_000, '10k': 10_000, '100k': 100_000}
+DEPOT_LAYOUTS = ('grid', 'ring', 'hub', 'demand')
+
+# (hour, share of orders, burst length in minutes)
+RUSH_HOURS = [(12.0, 0.20, 45), (18.0, 0.30, 60)]
+
+
+@dataclass
+class City:
+    """Orders and depots of one generated city"""
+    name: str
+    store: OrderStore
+    mfu_locations: List[Tuple[float, float]]
+    cluster_centers: np.ndarray
+    seed: int
+
+
+def _km_to_deg(center: Tuple[float, float], north_km, east_km) -> Tuple[np.ndarray, np.ndarray]:
+    lat = center[0] + np.asarray(north_km) / KM_PER_DEG_LAT
+    lng = center[1] + np.asarray(east_km) / (KM_PER_DEG_LNG_EQUATOR * np.cos(np.radians(center[0])))
+    return lat, lng
+
+
+def clustered_demand(n: int, rng: np.random.Generator, center: Tuple[float, float], radius_km: float = 8.0,
+                     n_clusters: int = 12, background_share: float = 0.15):
+    """Order coordinates from Zipf-weighted Gaussian neighbourhoods plus uniform background"""
+    cluster_xy = rng.uniform(-radius_km * 0.8, radius_km * 0.8, size=(n_clusters, 2))
+    weights = 1.0 / np.arange(1, n_clusters + 1)
+    weights /= weights.sum()
+    spreads = rng.uniform(0.3, 1.2, size=n_clusters)
+
+    n_background = int(n * background_share)
+    cluster = rng.choice(n_clusters, size=n - n_background, p=weights)
+    clustered = cluster_xy[cluster] + rng.normal(size=(len(cluster), 2)) * spreads[cluster, None]
+    background = rng.uniform(-radius_km, radius_km, size=(n_background, 2))
+    xy = np.vstack([clustered, background])[rng.permutation(n)]
+
+    lat, lng = _km_to_deg(center, xy[:, 1], xy[:, 0])
+    centers_lat, centers_lng = _km_to_deg(center, cluster_xy[:, 1], cluster_xy[:, 0])
+    return lat, lng, np.column_stack([centers_lat, centers_lng])
+
+
+def rush_hour_times(n: int, rng: np.random.Generator, day: datetime, open_hour: float = 7.0,
+                    close_hour: float = 23.0, rush_hours=RUSH_HOURS) -> np.ndarray:
+    """Epoch-second order times: uniform over opening hours plus rush-hour bursts"""
+    shares = [share for _, share, _ in rush_hours]
+    component = rng.choice(len(rush_hours) + 1, size=n, p=[1 - sum(shares)] + shares)
+    hours = rng.uniform(open_hour, close_hour, size=n)
+    for k, (hour, _, minutes) in enumerate(rush_hours, start=1):
+        burst = component == k
+        hours[burst] = hour + rng.normal(0, minutes / 60 / 2, size=int(burst.sum()))
+    hours = np.clip(hours, open_hour, close_hour)
+    return np.sort(day.timestamp() + hours * 3600)
+
+
+def depot_layout(layout: str, n_depots: int, center: Tuple[float, float], radius_km: float,
+                 cluster_centers: np.ndarray = None) -> List[Tuple[float, float]]:
+    """MFU depot locations for one of DEPOT_LAYOUTS"""
+    if layout == 'hub':
+        return [tuple(center)] * n_depots
+    if layout == 'demand':
+        picks = cluster_centers[np.arange(n_depots) % len(cluster_centers)]
+        return [(float(lat), float(lng)) for lat, lng in picks]
+    if layout == 'ring':
+        angles = np.linspace(0, 2 * np.pi, n_depots, endpoint=False)
+        lat, lng = _km_to_deg(center, radius_km * 0.6 * np.sin(angles), radius_km * 0.6 * np.cos(angles))
+    elif layout == 'grid':
+        side = int(np.ceil(np.sqrt(n_depots)))
+        ticks = (np.arange(side) + 0.5) / side * 2 * radius_km - radius_km
+        east, north = np.meshgrid(ticks, ticks)
+        lat, lng = _km_to_deg(center, north.ravel()[:n_depots], east.ravel()[:n_depots])
+    else:
+        raise ValueError(f"Unknown depot layout: {layout}")
+    return list(zip(lat.tolist(), lng.tolist()))
+
+
+def generate_city(n_orders: int, seed: int = 42, layout: str = 'grid', n_depots: int = None,
+                  center: Tuple[float, float] = (40.7400, -73.9900), radius_km: float = 8.0,
+                  deadline_minutes: float = 60.0, day: datetime = datetime(2024, 1, 3),
+                  n_products: int = 5000) -> City:
+    """
+    City with `n_orders` orders on `day`. By default one depot per ~500
+    orders (at least 3, at most 200). Deadlines are `deadline_minutes`
+    after each order; express orders (priority 0, one in ten) get half.
+    """
+    rng = np.random.default_rng(seed)
+    n_depots = n_depots or int(np.clip(n_orders // 500, 3, 200))
+
+    lat, lng, cluster_centers = clustered_demand(n_orders, rng, center, radius_km)
+    order_time = rush_hour_times(n_orders, rng, day)
+    priority = np.where(rng.random(n_orders) < 0.1, 0, 1).astype(np.int8)
+    deadline = order_time + np.where(priority == 0, deadline_minutes / 2, deadline_minutes) * 60
+
+    basket = rng.integers(1, 6, size=n_orders)
+    offsets = np.concatenate([[0], np.cumsum(basket)])
+    products = rng.zipf(1.3, size=int(offsets[-1])) % n_products
+
+    store = OrderStore(lat, lng, priority=priority, order_time=order_time, deadline=deadline,
+                       product_offsets=offsets, product_codes=products)
+    store.product_vocab.codes([f"Product_{k}" for k in range(n_products)])
+
+    mfu_locations = depot_layout(layout, n_depots, center, radius_km, cluster_centers)
+    return City(f"{layout}-{n_orders}", store, mfu_locations, cluster_centers, seed)
@@ -0,0 +1,233 @@
+"""
+Benchmark for the delivery engine pipeline on synthetic cities.
+
+Generates seeded cities (benchmarks.city_generators) at each requested
+scale, runs the greedy pipeline stage by stage (batching, routing,
+assignment) and optionally the integrated VRP pipeline, and records
+per-stage wall time and route quality: total km and minutes, orders
+assigned to an MFU, and lateness against delivery deadlines. Results are
+compared with a stored baseline.
+
+Examples (from the repository root):
+
+    python -m benchmarks.delivery_pipeline --scales 1k 10k
+    python -m benchmarks.delivery_pipeline --scales 1k --pipelines greedy vrp --vrp-budget 5
+    python -m benchmarks.delivery_pipeline --save-baseline
+    python -m benchmarks.delivery_pipeline --max-regression 0.25
+
+The committed baseline (benchmarks/baselines/delivery_pipeline.json) was
+recorded with the default greedy 1k and 10k grid scenarios; re-record it
+on the machine that runs the gate. A missing baseline fails the run
+unless --allow-missing-baseline is given.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from benchmarks.city_generators import DEPOT_LAYOUTS, SCALES, City, generate_city
+from delivery_engine import MFU, DeliveryEngine, Route
+from delivery_simulation_engine import haversine_km
+from vrp_solver import DEFAULT_SERVICE_MINUTES
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baselines', 'delivery_pipeline.json')
+VRP_MAX_ORDERS = 1000  # Full distance matrix beyond this is too large for the VRP pipeline
+SPEED_KMH = 30  # Speed of the simulated distance matrix
+
+
+def route_quality(city: City, routes: List[Route], starts: List[Tuple[float, float]],
+                  assignments: Dict[str, Route]) -> Dict:
+    """
+    Distance, time and lateness of routes driven at SPEED_KMH. An MFU
+    cannot hand over an order before it is placed, waits if it arrives
+    early, and spends DEFAULT_SERVICE_MINUTES at every stop.
+    """
+    store = city.store
+    late = 0
+    lateness = 0.0
+    for route, start in zip(routes, starts):
+        indices = np.asarray(route.orders.indices)
+        lats = np.r_[start[0], store.lat[indices]]
+        lngs = np.r_[start[1], store.lng[indices]]
+        legs = (haversine_km(lats[:-1], lngs[:-1], lats[1:], lngs[1:]) / SPEED_KMH * 60).tolist()
+        placed = ((store.order_time[indices] - np.nanmin(store.order_time[indices])) / 60).tolist()
+        due = ((store.deadline[indices] - np.nanmin(store.order_time[indices])) / 60).tolist()
+        clock = 0.0
+        for leg, ready, deadline in zip(legs, placed, due):
+            clock = max(clock + leg, ready)
+            if clock > deadline:
+                late += 1
+                lateness += clock - deadline
+            clock += DEFAULT_SERVICE_MINUTES
+
+    routed = sum(len(route.orders) for route in routes)
+    return {
+        'routes': len(routes),
+        'orders_routed': routed,
+        'orders_assigned': sum(len(route.orders) for route in assignments.values()),
+        'total_km': float(sum(route.total_distance for route in routes)),
+        'total_minutes': float(sum(route.total_time for route in routes)),
+        'late_orders': late,
+        'late_share': late / routed if routed else 0.0,
+        'mean_lateness_minutes': lateness / late if late else 0.0
+    }
+
+
+def run_greedy(city: City) -> Dict:
+    """Time each stage of DeliveryEngine.process_orders separately"""
+    engine = DeliveryEngine()
+    timings = {}
+
+    started = time.perf_counter()
+    batches = engine.batching_engine.batch_indices(city.store)
+    timings['batching'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    routes, starts = [], []
+    for i, batch in enumerate(batches):
+        start = city.mfu_locations[i % len(city.mfu_locations)]
+        route = engine.route_optimizer.optimize_route_indices(city.store, batch, start)
+        if route:
+            routes.append(route)
+            starts.append(start)
+    timings['routing'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for i, location in enumerate(city.mfu_locations):
+        engine.fleet_manager.add_mfu(MFU(mfu_id=f"MFU_{i+1}", current_lat=location[0],
+                                         current_lng=location[1], capacity=20))
+    assignments = engine.fleet_manager.assign_routes(routes)
+    timings['assignment'] = time.perf_counter() - started
+
+    timings['total'] = sum(timings.values())
+    return {'timings': timings, 'quality': route_quality(city, routes, starts, assignments)}
+
+
+def best_of(runs: List[Dict]) -> Dict:
+    """Fastest time per stage across repeated runs of a deterministic pipeline"""
+    return dict(runs[0], timings={stage: min(run['timings'][stage] for run in runs)
+                                  for stage in runs[0]['timings']})
+
+
+def run_vrp(city: City, time_budget: float) -> Dict:
+    engine = DeliveryEngine()
+    started = time.perf_counter()
+    result = engine.process_orders(city.store, city.mfu_locations, pipeline='vrp', time_budget=time_budget)
+    elapsed = time.perf_counter() - started
+
+    mfus = engine.fleet_manager.mfus
+    starts = [(mfus[route.mfu_id].current_lat, mfus[route.mfu_id].current_lng) for route in result['routes']]
+    quality = route_quality(city, result['routes'], starts, result['assignments'])
+    quality['unassigned'] = int(len(result['unassigned']))
+    return {'timings': {'solve': elapsed, 'total': elapsed}, 'quality': quality}
+
+
+def print_report(results: Dict):
+    print(f"\n{'Scenario':<24} {'Stage times (s)':<44} {'Routes':>7} {'km':>10} {'Assigned':>9} "
+          f"{'Late':>6} {'Late min':>9}")
+    for name, result in results['scenarios'].items():
+        timings = ' '.join(f"{stage}={seconds:.2f}" for stage, seconds in result['timings'].items())
+        q = result['quality']
+        print(f"{name:<24} {timings:<44} {q['routes']:>7} {q['total_km']:>10.1f} {q['orders_assigned']:>9} "
+              f"{q['late_share']:>6.1%} {q['mean_lateness_minutes']:>9.1f}")
+
+
+def compare_to_baseline(results: Dict, baseline: Dict, max_regression: float,
+                        quality_tolerance: float = 0.01) -> List[str]:
+    """List scenarios whose stage times or route quality regressed"""
+    regressions = []
+    for name, base in baseline['scenarios'].items():
+        current = results['scenarios'].get(name)
+        if current is None:
+            continue
+        for stage, seconds in base['timings'].items():
+            now = current['timings'].get(stage)
+            # Sub-10ms stages are too noisy to compare
+            if now is not None and seconds >= 0.01 and now > seconds * (1 + max_regression):
+                regressions.append(f"{name} {stage}: {now:.2f}s vs baseline {seconds:.2f}s")
+        q, b = current['quality'], base['quality']
+        if q['total_km'] > b['total_km'] * (1 + quality_tolerance):
+            regressions.append(f"{name}: {q['total_km']:.1f} km vs baseline {b['total_km']:.1f} km")
+        if q['late_orders'] > b['late_orders'] * (1 + quality_tolerance):
+            regressions.append(f"{name}: {q['late_orders']} late orders vs baseline {b['late_orders']}")
+        if q['orders_assigned'] < b['orders_assigned'] * (1 - quality_tolerance):
+            regressions.append(f"{name}: {q['orders_assigned']} orders assigned vs baseline "
+                               f"{b['orders_assigned']}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Delivery engine pipeline benchmark')
+    parser.add_argument('--scales', nargs='+', default=['1k', '10k'], choices=list(SCALES))
+    parser.add_argument('--layouts', nargs='+', default=['grid'], choices=DEPOT_LAYOUTS)
+    parser.add_argument('--pipelines', nargs='+', default=['greedy'], choices=['greedy', 'vrp'])
+    parser.add_argument('--vrp-budget', type=float, default=5.0, help='VRP solver seconds per scenario')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Greedy runs per scenario; the fastest time per stage is kept')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the baseline')
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help='Allowed fractional slowdown before failing')
+    parser.add_argument('--allow-missing-baseline', action='store_true',
+                        help='Pass instead of failing when there is no baseline to compare with')
+    parser.add_argument('--output', help='Write results JSON here')
+    args = parser.parse_args(argv)
+
+    results = {'scenarios': {}, 'config': {k: v for k, v in vars(args).items()
+                                           if k in ('scales', 'layouts', 'pipelines', 'vrp_budget', 'seed')}}
+    for scale in args.scales:
+        for layout in args.layouts:
+            started = time.perf_counter()
+            city = generate_city(SCALES[scale], seed=args.seed, layout=layout)
+            generated = time.perf_counter() - started
+            print(f"Generated {city.name}: {len(city.store):,} orders, {len(city.mfu_locations)} depots "
+                  f"in {generated:.2f}s")
+
+            for pipeline in args.pipelines:
+                name = f"{pipeline}/{layout}/{scale}"
+                if pipeline == 'vrp':
+                    if len(city.store) > VRP_MAX_ORDERS:
+                        print(f"Skipping {name}: VRP pipeline is limited to {VRP_MAX_ORDERS:,} orders")
+                        continue
+                    results['scenarios'][name] = run_vrp(city, args.vrp_budget)
+                else:
+                    results['scenarios'][name] = best_of([run_greedy(city) for _ in range(args.repeat)])
+    print_report(results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0 if args.allow_missing_baseline else 2
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get('config') != results['config']:
+        print(f"Warning: baseline was recorded with {baseline.get('config')}")
+    regressions = compare_to_baseline(results, baseline, args.max_regression)
+    if regressions:
+        print("\nPerformance regressions detected:")
+        for regression in regressions:
+            print(f"- {regression}")
+        return 1
+
+    print("\nNo regressions against baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
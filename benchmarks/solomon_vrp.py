@@ -0,0 +1,170 @@
+"""
+Benchmark for the CVRPTW solver on Solomon-style instances.
+
+Solomon's classes place 100 customers uniformly (R), in clusters (C) or
+both (RC) on a 100x100 plane, with Euclidean travel times, vehicle
+capacity 200 and tight (type 1) or wide (type 2) time windows. Instances
+are generated with the same structure, or read from the original text
+files when given. For each instance the savings construction alone is
+compared with savings + ALNS under the time budget, and against the best
+known solution when the instance name is a published one.
+
+Examples (from the repository root):
+
+    python -m benchmarks.solomon_vrp
+    python -m benchmarks.solomon_vrp --classes R1 C1 --time-budget 30
+    python -m benchmarks.solomon_vrp --files solomon/C101.txt solomon/R101.txt
+"""
+import argparse
+import json
+import math
+import os
+import sys
+from typing import Dict, List
+
+import numpy as np
+
+from vrp_solver import CVRPTWSolver, VRPProblem
+
+# Best known (vehicles, distance) for published instances
+BEST_KNOWN = {
+    'C101': (10, 828.94), 'C201': (3, 591.56),
+    'R101': (19, 1650.80), 'R201': (4, 1252.37),
+    'RC101': (14, 1696.94), 'RC201': (4, 1406.94)
+}
+
+# Class layout: depot, scheduling horizon, service time, window half-width range
+CLASS_PARAMS = {
+    'R1': {'depot': (35, 35), 'horizon': 230, 'service': 10, 'half_width': (5, 30)},
+    'R2': {'depot': (35, 35), 'horizon': 1000, 'service': 10, 'half_width': (30, 250)},
+    'C1': {'depot': (40, 50), 'horizon': 1236, 'service': 90, 'half_width': (20, 60)},
+    'C2': {'depot': (40, 50), 'horizon': 3390, 'service': 90, 'half_width': (80, 320)},
+    'RC1': {'depot': (40, 50), 'horizon': 240, 'service': 10, 'half_width': (15, 30)},
+    'RC2': {'depot': (40, 50), 'horizon': 960, 'service': 10, 'half_width': (60, 240)}
+}
+
+
+def euclidean_problem(coords: np.ndarray, demand: np.ndarray, ready: np.ndarray, due: np.ndarray,
+                      service: np.ndarray, vehicles: int, capacity: float) -> VRPProblem:
+    """Single-depot closed-route problem with node 0 as the depot"""
+    distance = np.sqrt(((coords[:, None, :] - coords[None, :, :]) ** 2).sum(axis=2))
+    return VRPProblem(
+        travel_time=distance,
+        distance=distance,
+        depots=[0] * vehicles,
+        capacities=[capacity] * vehicles,
+        demand=demand,
+        ready=ready,
+        due=due,
+        service=service,
+        customers=list(range(1, len(coords)))
+    )
+
+
+def generate_instance(kind: str, n_customers: int = 100, seed: int = 0) -> VRPProblem:
+    """Random instance with the layout and window structure of a Solomon class"""
+    params = CLASS_PARAMS[kind]
+    rng = np.random.default_rng(seed)
+    depot = np.array(params['depot'], dtype=float)
+
+    n_clustered = {'R': 0, 'C': n_customers, 'RC': n_customers // 2}[kind.rstrip('12')]
+    centres = rng.uniform(10, 90, size=(max(n_clustered // 10, 1), 2))
+    clustered = centres[rng.integers(len(centres), size=n_clustered)] + rng.normal(0, 3, size=(n_clustered, 2))
+    scattered = rng.uniform(0, 100, size=(n_customers - n_clustered, 2))
+    coords = np.vstack([depot, np.clip(np.vstack([clustered, scattered]), 0, 100)])
+
+    horizon, service_time = params['horizon'], params['service']
+    to_depot = np.sqrt(((coords - depot) ** 2).sum(axis=1))
+    earliest = to_depot
+    latest = horizon - to_depot - service_time
+    centre = rng.uniform(earliest, np.maximum(latest, earliest))
+    half_width = rng.uniform(*params['half_width'], size=len(coords))
+
+    ready = np.maximum(centre - half_width, 0)
+    due = np.minimum(centre + half_width, np.maximum(latest, earliest))
+    ready[0], due[0] = 0, horizon
+    service = np.full(len(coords), float(service_time))
+    service[0] = 0
+    demand = rng.integers(1, 41, size=len(coords)).astype(float)
+    demand[0] = 0
+
+    return euclidean_problem(coords, demand, ready, due, service, vehicles=25, capacity=200)
+
+
+def read_solomon(path: str) -> VRPProblem:
+    """Parse an instance in the original Solomon text format"""
+    with open(path) as f:
+        lines = [line.split() for line in f if line.strip()]
+
+    vehicle_row = next(k for k, parts in enumerate(lines) if parts[0].upper() == 'NUMBER') + 1
+    vehicles, capacity = int(lines[vehicle_row][0]), float(lines[vehicle_row][1])
+    rows = np.array([[float(x) for x in parts] for parts in lines[vehicle_row + 1:]
+                     if len(parts) == 7 and parts[0].isdigit()])
+
+    return euclidean_problem(rows[:, 1:3], rows[:, 3], rows[:, 4], rows[:, 5], rows[:, 6], vehicles, capacity)
+
+
+def run_instance(name: str, problem: VRPProblem, time_budget: float, seed: int) -> Dict:
+    # Construction alone: no ALNS iterations, and no deadline cutting the savings phase short
+    construction = CVRPTWSolver(problem, time_budget=math.inf, seed=seed, max_iterations=0).solve()
+    improved = CVRPTWSolver(problem, time_budget=time_budget, seed=seed).solve()
+
+    result = {
+        'instance': name,
+        'customers': len(problem.customers),
+        'savings_vehicles': construction.vehicles_used,
+        'savings_distance': construction.distance,
+        'alns_vehicles': improved.vehicles_used,
+        'alns_distance': improved.distance,
+        'alns_unassigned': len(improved.unassigned),
+        'alns_iterations': improved.iterations,
+        'alns_seconds': improved.runtime_seconds,
+        'improvement': 1 - improved.distance / construction.distance if construction.distance else 0.0
+    }
+    if name in BEST_KNOWN:
+        vehicles, distance = BEST_KNOWN[name]
+        result['best_known_vehicles'] = vehicles
+        result['gap_to_best_known'] = improved.distance / distance - 1
+    return result
+
+
+def print_report(results: List[Dict]):
+    print(f"\n{'Instance':<12} {'Savings':>11} {'Veh':>4} {'ALNS':>10} {'Veh':>4} "
+          f"{'Unass':>6} {'Iters':>7} {'Secs':>6} {'Improve':>8} {'Gap BKS':>8}")
+    for r in results:
+        gap = f"{r['gap_to_best_known']:>8.1%}" if 'gap_to_best_known' in r else f"{'-':>8}"
+        print(f"{r['instance']:<12} {r['savings_distance']:>11.1f} {r['savings_vehicles']:>4} "
+              f"{r['alns_distance']:>10.1f} {r['alns_vehicles']:>4} {r['alns_unassigned']:>6} "
+              f"{r['alns_iterations']:>7} {r['alns_seconds']:>6.1f} {r['improvement']:>8.1%} {gap}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='CVRPTW solver benchmark on Solomon-style instances')
+    parser.add_argument('--classes', nargs='+', default=['R1', 'C1', 'RC1'], choices=sorted(CLASS_PARAMS))
+    parser.add_argument('--files', nargs='+', default=[], help='Original Solomon instance files')
+    parser.add_argument('--customers', type=int, default=100)
+    parser.add_argument('--instances', type=int, default=1, help='Generated instances per class')
+    parser.add_argument('--time-budget', type=float, default=10.0, help='ALNS seconds per instance')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Write results JSON here')
+    args = parser.parse_args(argv)
+
+    instances = [(os.path.splitext(os.path.basename(path))[0].upper(), read_solomon(path)) for path in args.files]
+    for kind in args.classes:
+        for k in range(args.instances):
+            instances.append((f"{kind}-gen{k + 1}", generate_instance(kind, args.customers, args.seed + k)))
+
+    results = []
+    for name, problem in instances:
+        print(f"Solving {name} ({len(problem.customers)} customers, {args.time_budget:.0f}s budget)...")
+        results.append(run_instance(name, problem, args.time_budget, args.seed))
+    print_report(results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,13 +1,14 @@
 import pandas as pd
+from dataset_io import load_order_products, read_dataset, write_dataset
 
 # --- Instacart Data Cleaning ---
 print('Cleaning Instacart data...')
-orders = pd.read_csv('orders.csv')
-order_products_train = pd.read_csv('order_products__train.csv')
-order_products_prior = pd.read_csv('order_products__prior.csv')
-products = pd.read_csv('products.csv')
-aisles = pd.read_csv('aisles.csv')
-departments = pd.read_csv('departments.csv')
+orders = read_dataset('orders')
+order_products_train = load_order_products('train')
+order_products_prior = load_order_products('prior')
+products = read_dataset('products')
+aisles = read_dataset('aisles')
+departments = read_dataset('departments')
 
 # Handle missing values in days_since_prior_order (fill with 0 for first order)
 orders['days_since_prior_order'] = orders['days_since_prior_order'].fillna(0)
@@ -17,10 +18,10 @@ df_products_full = products.merge(aisles, on='aisle_id', how='left').merge(depar
 
 # --- M5 Walmart Data Cleaning ---
 print('Cleaning M5 Walmart data...')
-train = pd.read_csv('train.csv')
-test = pd.read_csv('test.csv')
-features = pd.read_csv('features.csv')
-stores = pd.read_csv('stores.csv')
+train = read_dataset('train')
+test = read_dataset('test')
+features = read_dataset('features')
+stores = read_dataset('stores')
 
 # Convert Date columns to datetime
 train['Date'] = pd.to_datetime(train['Date'])
@@ -43,9 +44,9 @@ train_full = merge_m5(train)
 test_full = merge_m5(test)
 
 # Save cleaned data for further analysis
-orders.to_csv('orders_cleaned.csv', index=False)
-df_products_full.to_csv('products_full.csv', index=False)
-train_full.to_csv('train_full.csv', index=False)
-test_full.to_csv('test_full.csv', index=False)
+write_dataset(orders, 'orders_cleaned')
+write_dataset(df_products_full, 'products_full')
+write_dataset(train_full, 'train_full')
+write_dataset(test_full, 'test_full')
 
-print('Data cleaning complete. Cleaned files saved.') 
\ No newline at end of file
+print('Data cleaning complete. Cleaned datasets saved.') 
\ No newline at end of file
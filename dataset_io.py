@@ -0,0 +1,414 @@
+"""
+Columnar dataset storage for the ETL and modelling scripts.
+
+Datasets are addressed by name ('orders_with_zones', 'train_full', ...)
+and resolved to `<name>.parquet`, `<name>.feather` or `<name>.csv`,
+whichever exists first in that order, so the raw Kaggle CSVs and the
+Parquet intermediates the pipeline now writes are read the same way.
+
+Parquet and Feather reads go through pyarrow.dataset, so `columns` only
+decodes the projected columns and `filters` are pushed down to the scan
+(skipping Parquet row groups whose statistics rule them out). CSV reads
+fall back to pandas with `usecols`, the explicit dtypes in SCHEMAS and
+the same filters applied after parsing. Without pyarrow everything is
+written and read as CSV.
+
+read_cached keeps a parsed copy of a large source as one .npy file per
+column and memory-maps it on later loads, so tables like the 32M-row
+order_products__prior open in well under a second and only the pages
+actually touched are read into memory. Each build goes to a new version
+directory published by atomically replacing its manifest, so processes
+sharing a cache never see it half-written or deleted under them.
+"""
+import json
+import operator
+import os
+import re
+import shutil
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - depends on the environment
+    pa = ds = pq = None
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
+
+FORMATS = ('parquet', 'feather', 'csv')  # Lookup priority when a name has no extension
+CACHE_DIR = '.dataset_cache'  # Column caches of read_cached, next to their source
+
+_ORDERS = {
+    'order_id': 'int32',
+    'user_id': 'int32',
+    'eval_set': 'category',
+    'order_number': 'int16',
+    'order_dow': 'int8',
+    'order_hour_of_day': 'int8',
+    'days_since_prior_order': 'float32'
+}
+_ORDER_PRODUCTS = {'order_id': 'int32', 'product_id': 'int32', 'add_to_cart_order': 'int16', 'reordered': 'int8'}
+
+# Explicit dtypes for CSV sources; Parquet/Feather files carry their own schema
+SCHEMAS: Dict[str, Dict[str, str]] = {
+    # Instacart
+    'orders': _ORDERS,
+    'orders_cleaned': _ORDERS,
+    'orders_with_zones': dict(_ORDERS, zone='int8'),
+    'order_products__prior': _ORDER_PRODUCTS,
+    'order_products__train': _ORDER_PRODUCTS,
+    'products': {'product_id': 'int32', 'product_name': 'string', 'aisle_id': 'int16', 'department_id': 'int8'},
+    'aisles': {'aisle_id': 'int16', 'aisle': 'category'},
+    'departments': {'department_id': 'int8', 'department': 'category'},
+    # M5 Walmart
+    'train': {'Store': 'int16', 'Dept': 'int16', 'Date': 'datetime64[ns]', 'Weekly_Sales': 'float64',
+              'IsHoliday': 'bool'},
+    'test': {'Store': 'int16', 'Dept': 'int16', 'Date': 'datetime64[ns]', 'IsHoliday': 'bool'},
+    'features': {'Store': 'int16', 'Date': 'datetime64[ns]', 'Temperature': 'float32', 'Fuel_Price': 'float32',
+                 'MarkDown1': 'float32', 'MarkDown2': 'float32', 'MarkDown3': 'float32', 'MarkDown4': 'float32',
+                 'MarkDown5': 'float32', 'CPI': 'float32', 'Unemployment': 'float32', 'IsHoliday': 'bool'},
+    'stores': {'Store': 'int16', 'Type': 'category', 'Size': 'int32'}
+}
+
+_FILTER_OPS = {
+    '==': operator.eq, '=': operator.eq, '!=': operator.ne,
+    '<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+    'in': lambda column, values: column.isin(values),
+    'not in': lambda column, values: ~column.isin(values)
+}
+
+Filters = Sequence[Tuple[str, str, object]]
+
+
+def _split_name(name: str) -> Tuple[str, Optional[str]]:
+    """(stem, format) of a dataset name or path; format is None without a known extension"""
+    stem, extension = os.path.splitext(name)
+    extension = extension.lstrip('.').lower()
+    return (stem, extension) if extension in FORMATS else (name, None)
+
+
+def dataset_path(name: str) -> Optional[str]:
+    """Existing file backing a dataset, or None"""
+    stem, fmt = _split_name(name)
+    for candidate in ([fmt] if fmt else FORMATS):
+        path = f"{stem}.{candidate}"
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def dataset_exists(name: str) -> bool:
+    return dataset_path(name) is not None
+
+
+def _require(name: str) -> Tuple[str, str]:
+    path = dataset_path(name)
+    if path is None:
+        raise FileNotFoundError(f"No dataset '{name}' (looked for {', '.join(FORMATS)} files)")
+    return path, _split_name(path)[1]
+
+
+def _schema_for(name: str, schema: Optional[Dict[str, str]]) -> Dict[str, str]:
+    if schema is not None:
+        return schema
+    return SCHEMAS.get(os.path.basename(_split_name(name)[0]), {})
+
+
+def _arrow_dataset(path: str, fmt: str):
+    if ds is None:
+        raise ImportError(f"Reading {path} needs pyarrow (pip install pyarrow)")
+    return ds.dataset(path, format=fmt)
+
+
+def _arrow_filter(filters: Optional[Filters]):
+    return pq.filters_to_expression([tuple(f) for f in filters]) if filters else None
+
+
+def _csv_options(name: str, columns: Optional[List[str]], filters: Optional[Filters],
+                 schema: Optional[Dict[str, str]]) -> Dict:
+    schema = _schema_for(name, schema)
+    usecols = None
+    if columns is not None:
+        usecols = list(dict.fromkeys(list(columns) + [f[0] for f in filters or []]))
+    wanted = set(usecols) if usecols is not None else set(schema)
+    return {
+        'usecols': usecols,
+        'dtype': {c: t for c, t in schema.items() if c in wanted and not t.startswith('datetime')} or None,
+        'parse_dates': [c for c, t in schema.items() if c in wanted and t.startswith('datetime')] or None
+    }
+
+
+def _filter_frame(df: pd.DataFrame, filters: Optional[Filters], columns: Optional[List[str]]) -> pd.DataFrame:
+    if filters:
+        mask = pd.Series(True, index=df.index)
+        for column, op, value in filters:
+            mask &= _FILTER_OPS[op](df[column], value)
+        df = df[mask]
+    if columns is not None:
+        df = df[list(columns)]
+    return df
+
+
+def read_dataset(name: str, columns: List[str] = None, filters: Filters = None,
+                 schema: Dict[str, str] = None, index_col: str = None) -> pd.DataFrame:
+    """
+    Load a dataset, decoding only `columns` and keeping rows that match
+    every (column, op, value) filter, with op one of ==, !=, <, <=, >,
+    >=, in, not in. `schema` overrides the SCHEMAS dtypes for CSV files.
+    """
+    path, fmt = _require(name)
+    if fmt == 'csv':
+        df = pd.read_csv(path, **_csv_options(name, columns, filters, schema))
+        df = _filter_frame(df, filters, columns).reset_index(drop=True)
+    else:
+        table = _arrow_dataset(path, fmt).to_table(columns=columns, filter=_arrow_filter(filters))
+        df = table.to_pandas()
+    return df.set_index(index_col) if index_col is not None else df
+
+
+def iter_dataset(name: str, columns: List[str] = None, filters: Filters = None,
+                 schema: Dict[str, str] = None, batch_size: int = 100_000) -> Iterator[pd.DataFrame]:
+    """Stream a dataset as DataFrames of up to `batch_size` rows"""
+    path, fmt = _require(name)
+    if fmt == 'csv':
+        for chunk in pd.read_csv(path, chunksize=batch_size, **_csv_options(name, columns, filters, schema)):
+            yield _filter_frame(chunk, filters, columns)
+        return
+    scanner = _arrow_dataset(path, fmt).scanner(columns=columns, filter=_arrow_filter(filters),
+                                                batch_size=batch_size)
+    for batch in scanner.to_batches():
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+
+def _prepare(df: pd.DataFrame) -> pd.DataFrame:
+    """Keep a named index as a column and use string column names, as CSV would"""
+    if any(level is not None for level in df.index.names):
+        df = df.reset_index()
+    if not all(isinstance(column, str) for column in df.columns):
+        df = df.rename(columns=str)
+    return df
+
+
+def _output_path(name: str, fmt: Optional[str]) -> Tuple[str, str]:
+    stem, extension = _split_name(name)
+    fmt = fmt or extension or ('parquet' if pa is not None else 'csv')
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown dataset format: {fmt}")
+    if fmt != 'csv' and pa is None:
+        raise ImportError(f"Writing {fmt} needs pyarrow (pip install pyarrow)")
+    return f"{stem}.{fmt}", fmt
+
+
+def write_dataset(df: pd.DataFrame, name: str, format: str = None) -> str:
+    """
+    Write a DataFrame as `<name>.<format>` (Parquet by default, CSV without
+    pyarrow) and return the path. The file is written next to its final
+    path and renamed into place, so readers never see a partial file.
+    """
+    path, fmt = _output_path(name, format)
+    df = _prepare(df)
+    temporary = f"{path}.tmp"
+    if fmt == 'csv':
+        df.to_csv(temporary, index=False)
+    else:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if fmt == 'parquet':
+            pq.write_table(table, temporary)
+        else:
+            import pyarrow.feather as feather
+            feather.write_feather(table, temporary)
+    os.replace(temporary, path)
+    return path
+
+
+class DatasetWriter:
+    """
+    Writes a dataset chunk by chunk, e.g. while streaming another one.
+
+    Parquet chunks become row groups of one file (cast to the schema of
+    the first chunk); CSV chunks are appended. The file is renamed into
+    place on close.
+    """
+
+    def __init__(self, name: str, format: str = None):
+        self.path, self.format = _output_path(name, format)
+        if self.format == 'feather':
+            raise ValueError("Chunked writes support parquet and csv")
+        self._temporary = f"{self.path}.tmp"
+        self._writer = None
+        self.rows_written = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif os.path.exists(self._temporary):
+            if self._writer is not None:
+                self._writer.close()
+            os.remove(self._temporary)
+
+    def write(self, df: pd.DataFrame):
+        df = _prepare(df)
+        if self.format == 'csv':
+            df.to_csv(self._temporary, mode='a' if self.rows_written else 'w', index=False,
+                      header=not self.rows_written)
+        else:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self._temporary, table.schema)
+            self._writer.write_table(table.cast(self._writer.schema))
+        self.rows_written += len(df)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if os.path.exists(self._temporary):
+            os.replace(self._temporary, self.path)
+
+
+def _cache_fingerprint(path: str, schema: Dict[str, str]) -> Dict:
+    stat = os.stat(path)
+    return {'source': os.path.basename(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'schema': schema}
+
+
+@contextmanager
+def _locked(path: str):
+    """Hold an exclusive lock on the file at `path`, shared by every process using it"""
+    with open(path, 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK gives up after ~10s; a large build can take longer
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _load_manifest(manifest_path: str) -> Optional[Dict]:
+    try:
+        with open(manifest_path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _is_fresh(manifest: Optional[Dict], fingerprint: Dict) -> bool:
+    return manifest is not None and all(manifest.get(key) == value for key, value in fingerprint.items())
+
+
+def _build_cache(name: str, cache_dir: str, stem: str, fingerprint: Dict, schema: Dict[str, str]) -> Dict:
+    """
+    Parse the source once and store every column as .npy (categoricals as
+    codes) in a new version directory, then point the manifest at it.
+    Callers hold the cache lock. The version the manifest pointed at
+    before stays for readers that resolved it just before the switch;
+    older ones are removed.
+    """
+    df = read_dataset(name, schema=schema)
+    directory = f"{stem}.v{uuid.uuid4().hex}"
+    version_path = os.path.join(cache_dir, directory)
+    os.makedirs(version_path)
+    columns = {}
+    for i, column in enumerate(df.columns):
+        values = df[column]
+        if values.dtype == object or isinstance(values.dtype, pd.StringDtype):
+            values = values.astype('category')
+        entry = {'file': f"{i}.npy"}
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            entry['categories'] = values.cat.categories.tolist()
+            values = values.cat.codes
+        np.save(os.path.join(version_path, entry['file']), values.to_numpy(), allow_pickle=False)
+        columns[column] = entry
+
+    manifest_path = os.path.join(cache_dir, f"{stem}.manifest.json")
+    previous = _load_manifest(manifest_path)
+    manifest = dict(fingerprint, rows=len(df), columns=columns, directory=directory)
+    temporary = f"{manifest_path}.tmp{os.getpid()}"
+    with open(temporary, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(temporary, manifest_path)
+
+    keep = {directory, previous.get('directory') if previous else None}
+    version = re.compile(re.escape(stem) + r'\.v[0-9a-f]{32}$')
+    for entry in os.listdir(cache_dir):
+        if version.match(entry) and entry not in keep:
+            shutil.rmtree(os.path.join(cache_dir, entry), ignore_errors=True)
+    return manifest
+
+
+def _load_columns(cache_dir: str, manifest: Dict, columns: Optional[List[str]], mmap: bool) -> pd.DataFrame:
+    version_path = os.path.join(cache_dir, manifest['directory'])
+    data = {}
+    for column in (columns if columns is not None else manifest['columns']):
+        entry = manifest['columns'][column]
+        values = np.load(os.path.join(version_path, entry['file']), mmap_mode='c' if mmap else None,
+                         allow_pickle=False)
+        if 'categories' in entry:
+            values = pd.Categorical.from_codes(values, entry['categories'])
+        data[column] = values
+    return pd.DataFrame(data, copy=False)
+
+
+def read_cached(name: str, columns: List[str] = None, schema: Dict[str, str] = None,
+                mmap: bool = True) -> pd.DataFrame:
+    """
+    Load a dataset from its column cache, building the cache from the
+    source (with the SCHEMAS dtypes, strings as categoricals) on first use
+    or when the source or schema changed. With `mmap` the columns are
+    copy-on-write memory maps: nothing is read until used and in-place
+    changes never reach the cache.
+
+    Concurrent callers are safe: one process builds while the others wait
+    on a lock file and then reuse its result.
+    """
+    path, _ = _require(name)
+    schema = _schema_for(name, schema)
+    cache_dir = os.path.join(os.path.dirname(path), CACHE_DIR)
+    stem = os.path.basename(_split_name(path)[0])
+    manifest_path = os.path.join(cache_dir, f"{stem}.manifest.json")
+    fingerprint = _cache_fingerprint(path, schema)
+
+    manifest = _load_manifest(manifest_path)
+    if not _is_fresh(manifest, fingerprint):
+        os.makedirs(cache_dir, exist_ok=True)
+        with _locked(os.path.join(cache_dir, f"{stem}.lock")):
+            # Another process may have built it while this one waited for the lock
+            manifest = _load_manifest(manifest_path)
+            if not _is_fresh(manifest, fingerprint):
+                manifest = _build_cache(name, cache_dir, stem, fingerprint, schema)
+
+    try:
+        return _load_columns(cache_dir, manifest, columns, mmap)
+    except FileNotFoundError:
+        # Two newer builds pruned the version this manifest named; follow the current one
+        return _load_columns(cache_dir, _load_manifest(manifest_path), columns, mmap)
+
+
+def load_order_products(eval_set: str = 'prior', columns: List[str] = None, mmap: bool = True) -> pd.DataFrame:
+    """Instacart order_products__<eval_set> with compact dtypes, via the column cache"""
+    return read_cached(f"order_products__{eval_set}", columns=columns, mmap=mmap)
@@ -32,6 +32,7 @@ class MFU:
     current_load: int = 0
     route: List[Order] = None
     eta: datetime = None
+    next_stop: int = 0  # Index in route.orders of the stop the MFU is driving to
 
 @dataclass
 class Route:
@@ -43,14 +44,42 @@ class Route:
     mfu_id: str
     waypoints: List[Tuple[float, float]] = None
 
+# Road networks loaded from ROAD_NETWORK_PATH, shared by every GoogleMapsAPI: path -> (mtime, network)
+_ROAD_NETWORKS: Dict[str, Tuple[float, object]] = {}
+
+def _shared_road_network(path: str):
+    """Load a road network once per process, reloading only when the file changes"""
+    path = os.path.abspath(path)
+    mtime = os.path.getmtime(path)
+    cached = _ROAD_NETWORKS.get(path)
+    if cached is None or cached[0] != mtime:
+        from road_network import RoadNetwork
+        cached = _ROAD_NETWORKS[path] = (mtime, RoadNetwork.load(path))
+    return cached[1]
+
 class GoogleMapsAPI:
-    """Google Maps API integration"""
+    """
+    Google Maps API integration
+    
+    With a road_network.RoadNetwork (passed in, or loaded from the file in
+    ROAD_NETWORK_PATH, once per process) distance matrices and routes are answered locally
+    from the road graph instead of the web API or the haversine estimate.
+    A travel_time_model.TravelTimeModel makes simulated travel times
+    depend on the departure hour and day.
+    """
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, road_network=None, travel_time_model=None):
         self.api_key = api_key or os.getenv('GOOGLE_MAPS_API_KEY')
         self.base_url = "https://maps.googleapis.com/maps/api"
+        self.road_network = road_network
+        self.travel_time_model = travel_time_model
         
-        if not self.api_key:
+        if self.road_network is None and os.getenv('ROAD_NETWORK_PATH'):
+            self.road_network = _shared_road_network(os.getenv('ROAD_NETWORK_PATH'))
+        
+        if self.road_network is not None:
+            print(f"Using local road network ({len(self.road_network):,} nodes) for distances and routes.")
+        elif not self.api_key:
             print("Warning: No Google Maps API key provided. Using simulated data.")
     
     def geocode_address(self, address: str) -> Tuple[float, float]:
@@ -95,6 +124,9 @@ class GoogleMapsAPI:
     def get_distance_matrix(self, origins: List[Tuple[float, float]], 
                            destinations: List[Tuple[float, float]]) -> Dict:
         """Get distance matrix between multiple points"""
+        if self.road_network is not None:
+            return self._road_network_distance_matrix(origins, destinations)
+        
         if not self.api_key:
             return self._simulate_distance_matrix(origins, destinations)
         
@@ -129,6 +161,16 @@ class GoogleMapsAPI:
             'rows': []
         }
         
+        if self.travel_time_model is not None:
+            km, minutes = self.travel_matrix(origins, destinations)
+            for km_row, minutes_row in zip(km.tolist(), minutes.tolist()):
+                matrix['rows'].append({'elements': [{
+                    'distance': {'text': f"{distance:.1f} km", 'value': distance * 1000},
+                    'duration': {'text': f"{duration:.0f} mins", 'value': duration * 60},
+                    'status': 'OK'
+                } for distance, duration in zip(km_row, minutes_row)]})
+            return matrix
+        
         for origin in origins:
             row = {'elements': []}
             for dest in destinations:
@@ -145,6 +187,64 @@ class GoogleMapsAPI:
         
         return matrix
     
+    def _road_network_distance_matrix(self, origins: List[Tuple[float, float]], 
+                                      destinations: List[Tuple[float, float]]) -> Dict:
+        """Distance matrix in the Google response format from the local road network"""
+        minutes, km = self.road_network.travel_times(origins, destinations)
+        
+        matrix = {'rows': [], 'status': 'OK'}
+        for minutes_row, km_row in zip(minutes.tolist(), km.tolist()):
+            row = {'elements': []}
+            for duration, distance in zip(minutes_row, km_row):
+                if math.isinf(duration):
+                    row['elements'].append({'status': 'ZERO_RESULTS'})
+                    continue
+                row['elements'].append({
+                    'distance': {'text': f"{distance:.1f} km", 'value': distance * 1000},
+                    'duration': {'text': f"{duration:.0f} mins", 'value': duration * 60},
+                    'status': 'OK'
+                })
+            matrix['rows'].append(row)
+        
+        return matrix
+    
+    def travel_matrix(self, origins: List[Tuple[float, float]], 
+                      destinations: List[Tuple[float, float]],
+                      departure_time: datetime = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (km, minutes) matrices between points: road network when available,
+        otherwise haversine at the simulated 30 km/h. Pairs the road graph
+        cannot connect fall back to the haversine estimate. A travel time
+        model sets the speed for `departure_time` (default now); on a road
+        network it scales free-flow times by the hour's slowdown.
+        """
+        origins = np.asarray(origins, dtype=np.float64).reshape(-1, 2)
+        destinations = np.asarray(destinations, dtype=np.float64).reshape(-1, 2)
+        
+        if self.travel_time_model is not None:
+            km, minutes = self.travel_time_model.travel_matrix(origins, destinations, departure_time)
+        else:
+            km = np.stack([self._haversine_distances(origin, destinations[:, 0], destinations[:, 1])
+                           for origin in origins])
+            minutes = km * 2  # 30 km/h average
+        
+        if self.road_network is not None:
+            road_minutes, road_km = self.road_network.travel_times(origins, destinations)
+            if self.travel_time_model is not None:
+                from travel_time_model import instacart_dow
+                
+                when = departure_time or datetime.now()
+                args = (origins[:, 0][:, None], origins[:, 1][:, None],
+                        destinations[:, 0][None, :], destinations[:, 1][None, :])
+                slowdown = (self.travel_time_model.free_flow_kmh(*args) /
+                            self.travel_time_model.speeds(*args, instacart_dow(when), when.hour))
+                road_minutes = road_minutes * slowdown
+            reachable = np.isfinite(road_minutes)
+            km = np.where(reachable, road_km, km)
+            minutes = np.where(reachable, road_minutes, minutes)
+        
+        return km, minutes
+    
     def _haversine_distance(self, point1: Tuple[float, float], 
                            point2: Tuple[float, float]) -> float:
         """Calculate haversine distance between two points"""
@@ -162,10 +262,21 @@ class GoogleMapsAPI:
         
         return R * c
     
+    def _haversine_distances(self, point: Tuple[float, float], lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+        """Haversine distance in km from one point to arrays of coordinates"""
+        lat1, lng1 = np.radians(point[0]), np.radians(point[1])
+        lat2, lng2 = np.radians(lats), np.radians(lngs)
+        
+        a = np.sin((lat2 - lat1) / 2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2)**2
+        return 6371 * 2 * np.arcsin(np.sqrt(a))
+    
     def get_route(self, origin: Tuple[float, float], 
                   destination: Tuple[float, float], 
                   waypoints: List[Tuple[float, float]] = None) -> Dict:
         """Get optimized route with waypoints"""
+        if self.road_network is not None:
+            return self._road_network_route(origin, destination, waypoints)
+        
         if not self.api_key:
             return self._simulate_route(origin, destination, waypoints)
         
@@ -220,6 +331,33 @@ class GoogleMapsAPI:
             'status': 'OK'
         }
 
+    def _road_network_route(self, origin: Tuple[float, float], 
+                            destination: Tuple[float, float], 
+                            waypoints: List[Tuple[float, float]] = None) -> Dict:
+        """Directions-style route through the waypoints, with geometry, from the road network"""
+        from road_network import encode_polyline
+        
+        stops = [origin] + list(waypoints or []) + [destination]
+        legs, geometry = [], []
+        for start, end in zip(stops, stops[1:]):
+            leg = self.road_network.route(start, end)
+            if math.isinf(leg['minutes']):
+                return {'routes': [], 'status': 'ZERO_RESULTS'}
+            legs.append({
+                'distance': {'text': f"{leg['km']:.1f} km", 'value': leg['km'] * 1000},
+                'duration': {'text': f"{leg['minutes']:.0f} mins", 'value': leg['minutes'] * 60}
+            })
+            geometry.extend(leg['geometry'] if not geometry else leg['geometry'][1:])
+        
+        return {
+            'routes': [{
+                'legs': legs,
+                'overview_polyline': {'points': encode_polyline(geometry)},
+                'geometry': geometry
+            }],
+            'status': 'OK'
+        }
+
 class OrderBatchingEngine:
     """Order batching and clustering engine"""
     
@@ -277,6 +415,17 @@ class OrderBatchingEngine:
         if max_distance + new_distance > self.max_batch_distance:
             return False
         
+        # Spread of the batch in minutes at the local speed for the order's hour
+        model = self.google_maps.travel_time_model
+        if model is not None:
+            from travel_time_model import instacart_dow
+            
+            when = new_order.order_time or datetime.now()
+            speed = model.speeds(new_order.latitude, new_order.longitude, new_order.latitude,
+                                 new_order.longitude, instacart_dow(when), when.hour)
+            if (max_distance + new_distance) * model.detour_factor / speed * 60 > self.max_batch_time:
+                return False
+        
         # Check time constraints
         if new_order.delivery_deadline:
             earliest_deadline = min(order.delivery_deadline for order in batch if order.delivery_deadline)
@@ -284,18 +433,102 @@ class OrderBatchingEngine:
                 return False
         
         return True
+    
+    def batch_indices(self, store, indices: np.ndarray = None) -> List[np.ndarray]:
+        """
+        Same greedy batching as batch_orders, over OrderStore row indices.
+        
+        Returns one index array per batch. The batch centre and earliest
+        deadline are kept as running values instead of being rebuilt from
+        order objects for every candidate.
+        """
+        indices = np.arange(len(store)) if indices is None else np.asarray(indices, dtype=np.int64)
+        if len(indices) == 0:
+            return []
+        
+        # Sort by priority, then order time (lexsort keys are last-first)
+        indices = indices[np.lexsort((store.order_time[indices], store.priority[indices]))]
+        lats = store.lat[indices].tolist()
+        lngs = store.lng[indices].tolist()
+        deadlines = store.deadline[indices].tolist()
+        haversine = self.google_maps._haversine_distance
+        
+        # Largest batch spread (km) that still fits max_batch_time at each order's local speed
+        max_spread = [math.inf] * len(indices)
+        model = self.google_maps.travel_time_model
+        if model is not None:
+            from travel_time_model import dow_hour
+            
+            dow, hour = dow_hour(store.order_time[indices])
+            speed = model.speeds(store.lat[indices], store.lng[indices],
+                                 store.lat[indices], store.lng[indices], dow, hour)
+            max_spread = (speed * self.max_batch_time / 60 / model.detour_factor).tolist()
+        
+        batches = []
+        start = 0
+        sum_lat = sum_lng = 0.0
+        earliest_deadline = math.nan
+        
+        for pos in range(len(indices)):
+            size = pos - start
+            if size > 0:
+                center = (sum_lat / size, sum_lng / size)
+                fits = size < self.max_batch_size
+                if fits:
+                    max_distance = max(haversine(center, (lats[j], lngs[j])) for j in range(start, pos))
+                    spread = max_distance + haversine(center, (lats[pos], lngs[pos]))
+                    fits = spread <= self.max_batch_distance and spread <= max_spread[pos]
+                if fits and not math.isnan(deadlines[pos]):
+                    fits = not deadlines[pos] < earliest_deadline
+                
+                if not fits:
+                    batches.append(indices[start:pos])
+                    start = pos
+                    sum_lat = sum_lng = 0.0
+                    earliest_deadline = math.nan
+            
+            sum_lat += lats[pos]
+            sum_lng += lngs[pos]
+            if not math.isnan(deadlines[pos]) and not deadlines[pos] >= earliest_deadline:
+                earliest_deadline = deadlines[pos]
+        
+        batches.append(indices[start:])
+        return batches
 
 class RouteOptimizationEngine:
     """Route optimization using TSP and Google Maps"""
     
     def __init__(self, google_maps: GoogleMapsAPI):
         self.google_maps = google_maps
+        self.average_speed_kmh = 30
     
-    def optimize_route(self, orders: List[Order], mfu_location: Tuple[float, float]) -> Route:
-        """Optimize route for a batch of orders"""
+    def optimize_route(self, orders: List[Order], mfu_location: Tuple[float, float],
+                       departure_time: datetime = None) -> Route:
+        """
+        Optimize route for a batch of orders
+        
+        With a road network or travel time model, stops are sequenced on
+        the travel-time matrix for `departure_time` (default: the batch's
+        earliest order time).
+        """
         if not orders:
             return None
         
+        if self._uses_travel_matrix():
+            lats = np.array([order.latitude for order in orders])
+            lngs = np.array([order.longitude for order in orders])
+            if departure_time is None:
+                departure_time = min((order.order_time for order in orders if order.order_time), default=None)
+            sequence, total_distance, total_time = self._matrix_sequence(lats, lngs, mfu_location, departure_time)
+            return Route(
+                route_id=f"route_{len(orders)}_{int(time.time())}",
+                orders=[orders[i] for i in sequence],
+                total_distance=total_distance,
+                total_time=total_time,
+                mfu_id="",  # Will be assigned later
+                waypoints=[(lats[i], lngs[i]) for i in sequence]
+            )
+        
         # Simple nearest neighbor algorithm for TSP
         unvisited = orders.copy()
         route_orders = []
@@ -321,7 +554,7 @@ class RouteOptimizationEngine:
             distance = self.google_maps._haversine_distance(current_location, 
                                                           (order.latitude, order.longitude))
             total_distance += distance
-            total_time += distance * 2  # 30 km/h average speed
+            total_time += distance / self.average_speed_kmh * 60
             waypoints.append((order.latitude, order.longitude))
             current_location = (order.latitude, order.longitude)
         
@@ -333,18 +566,100 @@ class RouteOptimizationEngine:
             mfu_id="",  # Will be assigned later
             waypoints=waypoints
         )
+    
+    def optimize_route_indices(self, store, indices: np.ndarray, mfu_location: Tuple[float, float],
+                               departure_time: datetime = None) -> Route:
+        """
+        Nearest-neighbour route over OrderStore row indices.
+        
+        Distances to all unvisited stops are evaluated as one array per step.
+        The route's orders are an OrderSlice, so no Order objects are built.
+        """
+        if len(indices) == 0:
+            return None
+        
+        indices = np.asarray(indices, dtype=np.int64)
+        lats, lngs = store.lat[indices], store.lng[indices]
+        
+        if self._uses_travel_matrix():
+            if departure_time is None and not np.isnan(store.order_time[indices]).all():
+                departure_time = datetime.fromtimestamp(float(np.nanmin(store.order_time[indices])))
+            sequence, total_distance, total_time = self._matrix_sequence(lats, lngs, mfu_location, departure_time)
+            return Route(
+                route_id=f"route_{len(indices)}_{int(time.time())}",
+                orders=store.select(indices[sequence]),
+                total_distance=total_distance,
+                total_time=total_time,
+                mfu_id="",  # Will be assigned later
+                waypoints=list(zip(lats[sequence].tolist(), lngs[sequence].tolist()))
+            )
+        
+        unvisited = np.ones(len(indices), dtype=bool)
+        sequence = np.empty(len(indices), dtype=np.int64)
+        total_distance = 0.0
+        current_location = mfu_location
+        
+        for step in range(len(indices)):
+            distances = self.google_maps._haversine_distances(current_location, lats, lngs)
+            distances[~unvisited] = np.inf
+            nearest = int(distances.argmin())
+            
+            sequence[step] = nearest
+            unvisited[nearest] = False
+            total_distance += float(distances[nearest])
+            current_location = (lats[nearest], lngs[nearest])
+        
+        return Route(
+            route_id=f"route_{len(indices)}_{int(time.time())}",
+            orders=store.select(indices[sequence]),
+            total_distance=total_distance,
+            total_time=total_distance / self.average_speed_kmh * 60,
+            mfu_id="",  # Will be assigned later
+            waypoints=list(zip(lats[sequence].tolist(), lngs[sequence].tolist()))
+        )
+
+    def _uses_travel_matrix(self) -> bool:
+        return self.google_maps.road_network is not None or self.google_maps.travel_time_model is not None
+    
+    def _matrix_sequence(self, lats: np.ndarray, lngs: np.ndarray, mfu_location: Tuple[float, float],
+                         departure_time: datetime = None) -> Tuple[List[int], float, float]:
+        """Nearest-neighbour stop order by travel time, with route km and minutes"""
+        points = [mfu_location] + list(zip(lats.tolist(), lngs.tolist()))
+        km, minutes = self.google_maps.travel_matrix(points, points, departure_time)
+        
+        unvisited = set(range(1, len(points)))
+        sequence, current = [], 0
+        total_distance = total_time = 0.0
+        while unvisited:
+            nearest = min(unvisited, key=lambda stop: minutes[current, stop])
+            total_distance += km[current, nearest]
+            total_time += minutes[current, nearest]
+            sequence.append(nearest - 1)
+            unvisited.remove(nearest)
+            current = nearest
+        
+        return sequence, float(total_distance), float(total_time)
 
 class MFUFleetManager:
     """MFU fleet management and allocation"""
     
-    def __init__(self, google_maps: GoogleMapsAPI):
+    def __init__(self, google_maps: GoogleMapsAPI, event_broker=None):
         self.google_maps = google_maps
+        self.event_broker = event_broker  # Optional order_events.OrderEventBroker for live tracking
         self.mfus = {}
         self.routes = {}
+        self.tracking_ids = {}  # mfu_id -> database id that app trackers subscribe to
     
-    def add_mfu(self, mfu: MFU):
-        """Add MFU to fleet"""
+    def add_mfu(self, mfu: MFU, tracking_id: int = None):
+        """
+        Add MFU to fleet
+        
+        `tracking_id` is the MFU's id in the app database; position
+        updates are published under it so order trackers receive them.
+        """
         self.mfus[mfu.mfu_id] = mfu
+        if tracking_id is not None:
+            self.tracking_ids[mfu.mfu_id] = tracking_id
     
     def assign_routes(self, routes: List[Route]) -> Dict[str, Route]:
         """Assign routes to available MFUs"""
@@ -379,34 +694,107 @@ class MFUFleetManager:
                 assignments[best_mfu.mfu_id] = route
                 best_mfu.current_load += len(route.orders)
                 best_mfu.route = route
+                best_mfu.next_stop = 0
                 route.mfu_id = best_mfu.mfu_id
         
         return assignments
     
-    def update_mfu_positions(self):
-        """Update MFU positions based on current routes"""
+    def update_mfu_positions(self, minutes: float = None, departure_time: datetime = None):
+        """
+        Update MFU positions based on current routes
+        
+        Drives each MFU `minutes` along its route at the simulated travel
+        time of each leg, interpolating its position between stops. Reaching
+        a stop delivers that order and the remaining time carries on to the
+        next one. Without `minutes` each MFU advances exactly one stop.
+        rolling_horizon.RollingHorizonPlanner also re-plans routes while
+        MFUs move.
+        """
         for mfu in self.mfus.values():
-            if mfu.route and mfu.route.orders:
-                # Move MFU to next order location
-                next_order = mfu.route.orders[0]
-                mfu.current_lat = next_order.latitude
-                mfu.current_lng = next_order.longitude
+            remaining = minutes
+            moved = False
+            while mfu.route and mfu.next_stop < len(mfu.route.orders) and (remaining is None or remaining > 0):
+                next_order = mfu.route.orders[mfu.next_stop]
+                target = (next_order.latitude, next_order.longitude)
+                moved = True
+                if remaining is None:
+                    # One stop per call
+                    mfu.current_lat, mfu.current_lng = target
+                    mfu.current_load = max(mfu.current_load - 1, 0)
+                    mfu.next_stop += 1
+                    break
+                _, leg = self.google_maps.travel_matrix([(mfu.current_lat, mfu.current_lng)], [target],
+                                                        departure_time)
+                leg_minutes = float(leg[0, 0])
+                if leg_minutes <= remaining:
+                    mfu.current_lat, mfu.current_lng = target
+                    mfu.current_load = max(mfu.current_load - 1, 0)
+                    mfu.next_stop += 1
+                    remaining -= leg_minutes
+                else:
+                    fraction = remaining / leg_minutes
+                    mfu.current_lat += (target[0] - mfu.current_lat) * fraction
+                    mfu.current_lng += (target[1] - mfu.current_lng) * fraction
+                    remaining = 0
+            if moved:
+                self._publish_position(mfu)
+    
+    def _publish_position(self, mfu: MFU):
+        """Push an MFU position update to live trackers (only MFUs with a tracking id have any)"""
+        tracking_id = self.tracking_ids.get(mfu.mfu_id)
+        if self.event_broker is None or tracking_id is None:
+            return
+        
+        from order_events import mfu_position_payload, mfu_topic
+        self.event_broker.publish(mfu_topic(tracking_id), 'position', mfu_position_payload(
+            tracking_id, mfu.current_lat, mfu.current_lng, 'busy' if mfu.current_load else 'available',
+            mfu.current_load))
 
 class DeliveryEngine:
     """Main delivery engine orchestrating all components"""
     
-    def __init__(self, google_maps_api_key: str = None):
-        self.google_maps = GoogleMapsAPI(google_maps_api_key)
+    def __init__(self, google_maps_api_key: str = None, event_broker=None, road_network=None,
+                 travel_time_model=None):
+        self.google_maps = GoogleMapsAPI(google_maps_api_key, road_network, travel_time_model)
         self.batching_engine = OrderBatchingEngine(self.google_maps)
         self.route_optimizer = RouteOptimizationEngine(self.google_maps)
-        self.fleet_manager = MFUFleetManager(self.google_maps)
+        self.fleet_manager = MFUFleetManager(self.google_maps, event_broker)
     
-    def process_orders(self, orders: List[Order], mfu_locations: List[Tuple[float, float]]) -> Dict:
-        """Process orders through the complete delivery pipeline"""
+    def process_orders(self, orders, mfu_locations: List[Tuple[float, float]], pipeline: str = 'greedy',
+                       time_budget: float = 2.0, mfu_capacity: int = 20) -> Dict:
+        """
+        Process orders through the complete delivery pipeline
+        
+        `orders` is a list of Order objects or an order_store.OrderStore; a
+        store is batched and routed by row index and its batches are
+        returned as index arrays.
+        
+        pipeline='greedy' runs the batching, routing and assignment stages
+        one after another; pipeline='vrp' replaces all three with one
+        capacitated VRP with time windows (vrp_solver) solved within
+        `time_budget` seconds.
+        
+        An MFU of `mfu_capacity` orders is registered at each location not
+        already served by one in the fleet; both pipelines then assign
+        orders to the fleet's MFUs within their remaining capacity.
+        """
+        from order_store import OrderStore
+        
         print(f"Processing {len(orders)} orders...")
+        store = orders if isinstance(orders, OrderStore) else None
+        
+        if pipeline not in ('greedy', 'vrp'):
+            raise ValueError(f"Unknown pipeline: {pipeline}")
+        
+        self._register_mfus(mfu_locations, mfu_capacity)
+        if pipeline == 'vrp':
+            return self._process_orders_vrp(orders, store, time_budget)
         
         # Step 1: Batch orders
-        batches = self.batching_engine.batch_orders(orders)
+        if store is not None:
+            batches = self.batching_engine.batch_indices(store)
+        else:
+            batches = self.batching_engine.batch_orders(orders)
         print(f"Created {len(batches)} order batches")
         
         # Step 2: Optimize routes for each batch
@@ -414,27 +802,20 @@ class DeliveryEngine:
         for i, batch in enumerate(batches):
             # Use first MFU location as starting point (simplified)
             start_location = mfu_locations[i % len(mfu_locations)]
-            route = self.route_optimizer.optimize_route(batch, start_location)
+            if store is not None:
+                route = self.route_optimizer.optimize_route_indices(store, batch, start_location)
+            else:
+                route = self.route_optimizer.optimize_route(batch, start_location)
             if route:
                 routes.append(route)
         
         print(f"Optimized {len(routes)} routes")
         
-        # Step 3: Initialize MFU fleet
-        for i, location in enumerate(mfu_locations):
-            mfu = MFU(
-                mfu_id=f"MFU_{i+1}",
-                current_lat=location[0],
-                current_lng=location[1],
-                capacity=20
-            )
-            self.fleet_manager.add_mfu(mfu)
-        
-        # Step 4: Assign routes to MFUs
+        # Step 3: Assign routes to MFUs
         assignments = self.fleet_manager.assign_routes(routes)
         print(f"Assigned {len(assignments)} routes to MFUs")
         
-        # Step 5: Calculate performance metrics
+        # Step 4: Calculate performance metrics
         metrics = self._calculate_metrics(routes, assignments)
         
         return {
@@ -444,6 +825,90 @@ class DeliveryEngine:
             'metrics': metrics
         }
     
+    def _register_mfus(self, mfu_locations: List[Tuple[float, float]], capacity: int):
+        """Add MFU_<n> at the n-th location unless the fleet already has it"""
+        for i, location in enumerate(mfu_locations):
+            mfu_id = f"MFU_{i+1}"
+            if mfu_id not in self.fleet_manager.mfus:
+                self.fleet_manager.add_mfu(MFU(
+                    mfu_id=mfu_id,
+                    current_lat=location[0],
+                    current_lng=location[1],
+                    capacity=capacity
+                ))
+    
+    def _process_orders_vrp(self, orders, store, time_budget: float) -> Dict:
+        """
+        Batch, route and assign in one CVRPTW solve.
+        
+        Every MFU in the fleet is one vehicle that starts from its current
+        position with its remaining capacity; vehicles leave at the earliest
+        order time, cannot serve an order before it is placed and must
+        arrive by its delivery deadline. Orders the fleet cannot carry or
+        reach in time, or that the solver had no time left to place, are
+        left unassigned and reported as order indices.
+        """
+        from vrp_solver import CVRPTWSolver, problem_from_orders
+        
+        if store is not None:
+            lats, lngs = store.lat, store.lng
+            order_times, deadlines = store.order_time, store.deadline
+        else:
+            lats = np.array([order.latitude for order in orders], dtype=np.float64)
+            lngs = np.array([order.longitude for order in orders], dtype=np.float64)
+            order_times = np.array([order.order_time.timestamp() if order.order_time else np.nan
+                                    for order in orders], dtype=np.float64)
+            deadlines = np.array([order.delivery_deadline.timestamp() if order.delivery_deadline else np.nan
+                                  for order in orders], dtype=np.float64)
+        
+        mfus = list(self.fleet_manager.mfus.values())
+        departure = np.nanmin(order_times) if len(orders) and not np.isnan(order_times).all() else time.time()
+        points = [(mfu.current_lat, mfu.current_lng) for mfu in mfus] + list(zip(lats.tolist(), lngs.tolist()))
+        km, minutes = self.google_maps.travel_matrix(points, points, datetime.fromtimestamp(departure))
+        
+        capacities = [max(mfu.capacity - mfu.current_load, 0) for mfu in mfus]
+        problem = problem_from_orders(km, minutes, len(mfus), 1, capacities,
+                                      order_times, deadlines, departure)
+        solution = CVRPTWSolver(problem, time_budget=time_budget).solve()
+        print(f"VRP solved in {solution.runtime_seconds:.1f}s ({solution.iterations} iterations), "
+              f"{len(solution.unassigned)} orders unassigned")
+        
+        batches, routes, assignments = [], [], {}
+        n_depots = len(mfus)
+        for vehicle, (mfu, nodes) in enumerate(zip(mfus, solution.routes)):
+            if not nodes:
+                continue
+            
+            indices = np.array(nodes, dtype=np.int64) - n_depots
+            path = [vehicle] + list(nodes)
+            batch = store.select(indices) if store is not None else [orders[i] for i in indices]
+            route = Route(
+                route_id=f"route_{len(indices)}_{int(time.time())}_{vehicle}",
+                orders=batch,
+                total_distance=float(sum(km[a, b] for a, b in zip(path, path[1:]))),
+                total_time=float(sum(minutes[a, b] for a, b in zip(path, path[1:]))),
+                mfu_id=mfu.mfu_id,
+                waypoints=list(zip(lats[indices].tolist(), lngs[indices].tolist()))
+            )
+            mfu.current_load += len(indices)
+            mfu.route = route
+            mfu.next_stop = 0
+            batches.append(indices if store is not None else batch)
+            routes.append(route)
+            assignments[mfu.mfu_id] = route
+        
+        print(f"Created {len(routes)} routes on {len(assignments)} MFUs")
+        metrics = self._calculate_metrics(routes, assignments)
+        metrics['unassigned_orders'] = len(solution.unassigned)
+        
+        return {
+            'batches': batches,
+            'routes': routes,
+            'assignments': assignments,
+            'metrics': metrics,
+            'unassigned': np.array(solution.unassigned, dtype=np.int64) - n_depots
+        }
+    
     def _calculate_metrics(self, routes: List[Route], assignments: Dict[str, Route]) -> Dict:
         """Calculate delivery performance metrics"""
         total_distance = sum(route.total_distance for route in routes)
@@ -7,6 +7,37 @@ from typing import List, Dict, Tuple
 import json
 import os
 
+EARTH_RADIUS_KM = 6371
+
+def haversine_km(lat1, lng1, lat2, lng2) -> np.ndarray:
+    """Haversine distance in km between points given as broadcastable arrays of degrees"""
+    lat1, lng1, lat2, lng2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lng1, lat2, lng2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+def nearest_location(lat: np.ndarray, lng: np.ndarray, locations: List[Tuple[float, float]],
+                     chunk_size: int = 1_000_000) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Index of and distance to the nearest location for every point.
+    
+    Distances are broadcast as an (orders x locations) matrix, one chunk of
+    orders at a time so 10M-order inputs stay within a few hundred MB.
+    Ties go to the first location.
+    """
+    locations = np.asarray(locations, dtype=np.float64).reshape(-1, 2)
+    n = len(lat)
+    index = np.empty(n, dtype=np.int32)
+    distance = np.empty(n, dtype=np.float64)
+    
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        matrix = haversine_km(lat[start:stop, None], lng[start:stop, None], locations[:, 0], locations[:, 1])
+        nearest = matrix.argmin(axis=1)
+        index[start:stop] = nearest
+        distance[start:stop] = np.take_along_axis(matrix, nearest[:, None], axis=1)[:, 0]
+    
+    return index, distance
+
 class DeliverySimulationEngine:
     """
     Comprehensive simulation engine to compare traditional vs MFU delivery models
@@ -16,6 +47,7 @@ class DeliverySimulationEngine:
         self.traditional_results = {}
         self.mfu_results = {}
         self.comparison_metrics = {}
+        self.event_results = {}
         
         # Cost parameters
         self.cost_params = {
@@ -37,68 +69,157 @@ class DeliverySimulationEngine:
             }
         }
     
-    def simulate_traditional_delivery(self, orders: List, warehouse_locations: List[Tuple[float, float]]) -> Dict:
+    def simulate_traditional_delivery(self, orders: List, warehouse_locations: List[Tuple[float, float]],
+                                      riders_per_warehouse: int = 10, average_speed_kmh: float = 25) -> Dict:
         """
         Simulate traditional delivery model (riders from warehouses)
+        
+        `orders` is a list of Order objects or an order_store.OrderStore.
+        """
+        from order_store import OrderStore
+        
+        if isinstance(orders, OrderStore):
+            lat, lng = orders.lat, orders.lng
+        else:
+            lat = np.fromiter((order.latitude for order in orders), dtype=np.float64, count=len(orders))
+            lng = np.fromiter((order.longitude for order in orders), dtype=np.float64, count=len(orders))
+        
+        return self.simulate_traditional_delivery_arrays(
+            lat, lng, warehouse_locations,
+            riders_per_warehouse=riders_per_warehouse, average_speed_kmh=average_speed_kmh
+        )
+    
+    def simulate_traditional_delivery_arrays(self, lat: np.ndarray, lng: np.ndarray,
+                                             warehouse_locations: List[Tuple[float, float]],
+                                             order_time: np.ndarray = None, riders_per_warehouse: int = 10,
+                                             average_speed_kmh: float = 25, travel_time_model=None,
+                                             start_time: datetime = None) -> Dict:
+        """
+        Traditional delivery model over struct-of-arrays orders.
+        
+        `lat`, `lng` and the optional `order_time` (minutes from start, e.g.
+        an OrderStream's arrival) hold one entry per order. Assignment,
+        distances and metrics are computed with NumPy, so the result's
+        `distances` and `delivery_times` are arrays rather than lists.
+        With a travel_time_model.TravelTimeModel and order times, each leg
+        runs at the zone-pair speed for its hour and day after `start_time`
+        instead of the fixed average speed.
         """
         print("=== Simulating Traditional Delivery Model ===")
         
-        # Parameters for traditional model
-        riders_per_warehouse = 10
-        max_orders_per_rider = 5
-        average_speed_kmh = 25  # Urban traffic speed
+        lat = np.asarray(lat, dtype=np.float64)
+        lng = np.asarray(lng, dtype=np.float64)
+        n_warehouses = len(warehouse_locations)
+        
+        # Nearest warehouse and one-way distance to it for every order
+        assignment, distances = nearest_location(lat, lng, warehouse_locations)
+        if travel_time_model is not None and order_time is not None:
+            from travel_time_model import dow_hour
+            
+            start = (start_time or datetime(2024, 1, 1)).timestamp()
+            dow, hour = dow_hour(start + np.asarray(order_time, dtype=np.float64) * 60)
+            warehouses = np.asarray(warehouse_locations, dtype=np.float64).reshape(-1, 2)[assignment]
+            speeds = travel_time_model.speeds(warehouses[:, 0], warehouses[:, 1], lat, lng, dow, hour)
+            delivery_times = distances * travel_time_model.detour_factor / speeds * 60
+        else:
+            delivery_times = distances * (60.0 / average_speed_kmh)
         
         results = {
-            'total_orders': len(orders),
-            'warehouses_used': len(warehouse_locations),
-            'total_riders': len(warehouse_locations) * riders_per_warehouse,
-            'delivery_times': [],
-            'distances': [],
+            'total_orders': len(lat),
+            'warehouses_used': n_warehouses,
+            'total_riders': n_warehouses * riders_per_warehouse,
+            'total_distance': float(distances.sum()),
+            'total_time': float(delivery_times.sum()),
+            'delivery_times': delivery_times,
+            'distances': distances,
+            'warehouse_assignment': assignment,
+            'orders_per_warehouse': np.bincount(assignment, minlength=n_warehouses),
             'costs': {},
             'efficiency_metrics': {}
         }
+        if order_time is not None:
+            hours = (np.asarray(order_time, dtype=np.float64) // 60 % 24).astype(np.int64)
+            results['orders_per_hour'] = np.bincount(hours, minlength=24)
+        
+        self._finish_traditional_results(results, riders_per_warehouse)
+        return results
+    
+    def simulate_traditional_delivery_stream(self, chunks, warehouse_locations: List[Tuple[float, float]],
+                                             sink, riders_per_warehouse: int = 10,
+                                             average_speed_kmh: float = 25) -> Dict:
+        """
+        Traditional delivery model over a stream of order chunks.
         
-        # Assign orders to nearest warehouses
-        warehouse_assignments = self._assign_orders_to_warehouses(orders, warehouse_locations)
+        `chunks` yields (lat, lng) or (lat, lng, order_time) arrays. Per-order
+        records go to `sink` (a simulation_sink.SimulationSink) as they are
+        computed and only running totals are kept, so memory does not grow
+        with the number of orders. Distribution statistics come from the
+        sink's incremental summaries.
+        """
+        print("=== Simulating Traditional Delivery Model (streaming) ===")
         
-        total_distance = 0
-        total_time = 0
+        n_warehouses = len(warehouse_locations)
+        results = {
+            'total_orders': 0,
+            'warehouses_used': n_warehouses,
+            'total_riders': n_warehouses * riders_per_warehouse,
+            'total_distance': 0.0,
+            'total_time': 0.0,
+            'orders_per_warehouse': np.zeros(n_warehouses, dtype=np.int64),
+            'orders_per_hour': np.zeros(24, dtype=np.int64),
+            'costs': {},
+            'efficiency_metrics': {}
+        }
         
-        for warehouse_idx, warehouse_orders in warehouse_assignments.items():
-            warehouse_location = warehouse_locations[warehouse_idx]
+        for chunk in chunks:
+            lat, lng = np.asarray(chunk[0], dtype=np.float64), np.asarray(chunk[1], dtype=np.float64)
+            order_time = np.asarray(chunk[2], dtype=np.float64) if len(chunk) > 2 else np.full(len(lat), np.nan)
             
-            # Calculate distances and times for each order
-            for order in warehouse_orders:
-                # Distance from warehouse to customer
-                distance = self._haversine_distance(warehouse_location, (order.latitude, order.longitude))
-                time_minutes = (distance / average_speed_kmh) * 60
-                
-                total_distance += distance
-                total_time += time_minutes
-                
-                results['distances'].append(distance)
-                results['delivery_times'].append(time_minutes)
+            assignment, distances = nearest_location(lat, lng, warehouse_locations)
+            delivery_times = distances * (60.0 / average_speed_kmh)
+            sink.write('orders', order_time=order_time, warehouse=assignment,
+                       distance_km=distances, delivery_minutes=delivery_times)
+            
+            results['total_orders'] += len(lat)
+            results['total_distance'] += float(distances.sum())
+            results['total_time'] += float(delivery_times.sum())
+            results['orders_per_warehouse'] += np.bincount(assignment, minlength=n_warehouses)
+            timed = order_time[~np.isnan(order_time)]
+            results['orders_per_hour'] += np.bincount((timed // 60 % 24).astype(np.int64), minlength=24)
+        
+        sink.flush('orders')
+        results['order_stats'] = sink.summary().get('orders', {})
+        self._finish_traditional_results(results, riders_per_warehouse)
+        return results
+    
+    def _finish_traditional_results(self, results: Dict, riders_per_warehouse: int):
+        """Fill in costs and efficiency metrics from a traditional run's totals"""
+        n_orders = results['total_orders']
+        total_distance, total_time = results['total_distance'], results['total_time']
         
         # Calculate costs
         results['costs'] = self._calculate_traditional_costs(
-            total_distance, total_time, len(warehouse_locations), riders_per_warehouse
+            total_distance, total_time, results['warehouses_used'], riders_per_warehouse
         )
         
         # Calculate efficiency metrics
         results['efficiency_metrics'] = {
-            'avg_delivery_time': np.mean(results['delivery_times']),
-            'avg_distance': np.mean(results['distances']),
-            'orders_per_rider_hour': len(orders) / (total_time / 60) / (riders_per_warehouse * len(warehouse_locations)),
+            'avg_delivery_time': total_time / n_orders,
+            'avg_distance': total_distance / n_orders,
+            'orders_per_rider_hour': n_orders / (total_time / 60) / results['total_riders'],
             'fuel_efficiency': total_distance / (total_time / 60),  # km per hour
-            'cost_per_order': results['costs']['total_cost'] / len(orders)
+            'cost_per_order': results['costs']['total_cost'] / n_orders
         }
         
         self.traditional_results = results
-        return results
     
-    def simulate_mfu_delivery(self, orders: List, mfu_locations: List[Tuple[float, float]]) -> Dict:
+    def simulate_mfu_delivery(self, orders: List, mfu_locations: List[Tuple[float, float]],
+                              average_speed_kmh: float = None, sink=None, travel_time_model=None) -> Dict:
         """
         Simulate MFU-based delivery model
+        
+        With a simulation_sink.SimulationSink, one record per route is
+        streamed to its 'routes' table and summarised in `route_stats`.
         """
         print("=== Simulating MFU Delivery Model ===")
         
@@ -106,7 +227,9 @@ class DeliverySimulationEngine:
         from delivery_engine import DeliveryEngine, create_sample_orders
         
         # Initialize delivery engine
-        engine = DeliveryEngine()
+        engine = DeliveryEngine(travel_time_model=travel_time_model)
+        if average_speed_kmh:
+            engine.route_optimizer.average_speed_kmh = average_speed_kmh
         
         # Process orders through MFU system
         mfu_result = engine.process_orders(orders, mfu_locations)
@@ -122,6 +245,17 @@ class DeliverySimulationEngine:
             'efficiency_metrics': {}
         }
         
+        if sink is not None:
+            routes = mfu_result['routes']
+            sink.write('routes',
+                       route_id=np.array([route.route_id for route in routes], dtype=str),
+                       mfu_id=np.array([route.mfu_id for route in routes], dtype=str),
+                       orders=np.array([len(route.orders) for route in routes], dtype=np.int32),
+                       distance_km=np.array([route.total_distance for route in routes], dtype=np.float64),
+                       duration_minutes=np.array([route.total_time for route in routes], dtype=np.float64))
+            sink.flush('routes')
+            results['route_stats'] = sink.summary().get('routes', {})
+        
         # Calculate costs
         results['costs'] = self._calculate_mfu_costs(
             results['total_distance'], results['total_time'], len(mfu_locations)
@@ -140,38 +274,56 @@ class DeliverySimulationEngine:
         self.mfu_results = results
         return results
     
-    def _assign_orders_to_warehouses(self, orders: List, warehouse_locations: List[Tuple[float, float]]) -> Dict:
-        """Assign orders to nearest warehouses"""
-        assignments = {i: [] for i in range(len(warehouse_locations))}
-        
-        for order in orders:
-            # Find nearest warehouse
-            distances = [
-                self._haversine_distance((order.latitude, order.longitude), warehouse)
-                for warehouse in warehouse_locations
-            ]
-            nearest_warehouse = distances.index(min(distances))
-            assignments[nearest_warehouse].append(order)
-        
-        return assignments
-    
-    def _haversine_distance(self, point1: Tuple[float, float], point2: Tuple[float, float]) -> float:
-        """Calculate haversine distance between two points"""
-        import math
+    def simulate_discrete_event(self, orders, warehouse_locations: List[Tuple[float, float]],
+                                mfu_locations: List[Tuple[float, float]], riders_per_warehouse: int = 10,
+                                mfus_per_location: int = 1, mfu_batch_size: int = 8,
+                                average_speed_kmh: float = 25, deadline_minutes: float = 30) -> Dict:
+        """
+        Time-stepped simulation of both models over an order arrival stream.
+        
+        Unlike simulate_traditional_delivery/simulate_mfu_delivery this
+        respects arrival times, vehicle availability and queueing, and
+        reports per-order wait, travel and lateness distributions.
+        `orders` is a list of delivery_engine.Order objects or an OrderStream.
+        """
+        print("=== Running Discrete-Event Simulation ===")
         
-        lat1, lng1 = point1
-        lat2, lng2 = point2
+        from discrete_event_simulation import (
+            DiscreteEventSimulator, FleetConfig, OrderStream, order_stream_from_orders
+        )
         
-        R = 6371  # Earth's radius in km
+        stream = orders if isinstance(orders, OrderStream) else order_stream_from_orders(orders, deadline_minutes)
         
-        lat1, lng1, lat2, lng2 = map(math.radians, [lat1, lng1, lat2, lng2])
-        dlat = lat2 - lat1
-        dlng = lng2 - lng1
+        fleets = {
+            'traditional': FleetConfig('traditional', warehouse_locations, riders_per_warehouse,
+                                       average_speed_kmh, batch_size=1),
+            'mfu': FleetConfig('mfu', mfu_locations, mfus_per_location,
+                               average_speed_kmh, batch_size=mfu_batch_size, load_time_min=2.0)
+        }
         
-        a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlng/2)**2
-        c = 2 * math.asin(math.sqrt(a))
+        summaries = {}
+        for name, fleet in fleets.items():
+            result = DiscreteEventSimulator(fleet).run(stream)
+            summary = result.summary()
+            
+            # Fleets are paid for the whole simulated horizon, not just busy time
+            if name == 'traditional':
+                summary['costs'] = self._calculate_traditional_costs(
+                    result.total_distance_km, result.horizon_min, len(warehouse_locations), riders_per_warehouse
+                )
+            else:
+                summary['costs'] = self._calculate_mfu_costs(
+                    result.total_distance_km, result.horizon_min, len(mfu_locations) * mfus_per_location
+                )
+            summary['cost_per_order'] = summary['costs']['total_cost'] / max(len(stream), 1)
+            
+            self.event_results[name] = result
+            summaries[name] = summary
+            print(f"{name}: {summary['orders']} orders, p95 lead time "
+                  f"{summary['lead_time_minutes'].get('p95', 0):.1f} min, "
+                  f"on-time {summary['on_time_rate']:.1%} ({summary['wall_seconds']:.1f}s)")
         
-        return R * c
+        return summaries
     
     def _calculate_traditional_costs(self, total_distance: float, total_time: float, 
                                    warehouses: int, riders_per_warehouse: int) -> Dict:
@@ -249,7 +401,7 @@ class DeliverySimulationEngine:
         }
         
         # Environmental impact
-        traditional_total_distance = sum(self.traditional_results['distances'])
+        traditional_total_distance = self.traditional_results['total_distance']
         mfu_total_distance = self.mfu_results['total_distance']
         
         comparison['environmental_impact'] = {
@@ -455,6 +607,21 @@ class DeliverySimulationEngine:
                 report.append(f"- {cost_type.replace('_', ' ').title()}: ${amount:.2f}")
         report.append(f"- **Total Daily Cost**: ${self.mfu_results['costs']['total_cost']:.2f}\n")
         
+        # Streamed distribution statistics (runs with a SimulationSink)
+        streamed = [('Traditional per-order', self.traditional_results.get('order_stats', {})),
+                    ('MFU per-route', self.mfu_results.get('route_stats', {}))]
+        if any(stats for _, stats in streamed):
+            report.append("## Distribution Statistics\n")
+            report.append("| Series | Count | Mean | Std | p50 | p95 | p99 | Max |")
+            report.append("|---|---|---|---|---|---|---|---|")
+            for label, columns in streamed:
+                for column, stats in columns.items():
+                    if stats.get('count') and column in ('distance_km', 'delivery_minutes', 'duration_minutes'):
+                        report.append(f"| {label} {column} | {stats['count']:,} | {stats['mean']:.2f} | "
+                                      f"{stats['std']:.2f} | {stats['p50']:.2f} | {stats['p95']:.2f} | "
+                                      f"{stats['p99']:.2f} | {stats['max']:.2f} |")
+            report.append("")
+        
         # Recommendations
         report.append("## Recommendations\n")
         for recommendation in self.comparison_metrics['recommendations']:
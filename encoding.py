@@ -1,10 +1,11 @@
 import pandas as pd
 from sklearn.preprocessing import LabelEncoder
+from dataset_io import read_dataset, write_dataset
 
 # --- Instacart Encoding ---
 print('Encoding Instacart features...')
-orders = pd.read_csv('orders_features.csv')
-products = pd.read_csv('products_features.csv')
+orders = read_dataset('orders_features')
+products = read_dataset('products_features')
 
 # Label encoding for eval_set
 le_eval_set = LabelEncoder()
@@ -22,14 +23,14 @@ orders_onehot = pd.get_dummies(orders, columns=['eval_set'])
 # One-hot encoding for aisle and department (for linear models)
 products_onehot = pd.get_dummies(products, columns=['aisle', 'department'])
 
-orders.to_csv('orders_encoded.csv', index=False)
-products.to_csv('products_encoded.csv', index=False)
-orders_onehot.to_csv('orders_onehot.csv', index=False)
-products_onehot.to_csv('products_onehot.csv', index=False)
+write_dataset(orders, 'orders_encoded')
+write_dataset(products, 'products_encoded')
+write_dataset(orders_onehot, 'orders_onehot')
+write_dataset(products_onehot, 'products_onehot')
 
 # --- M5 Walmart Encoding ---
 print('Encoding M5 Walmart features...')
-train = pd.read_csv('train_features.csv')
+train = read_dataset('train_features')
 
 # Label encoding for Type and Store_Size_Bucket
 le_type = LabelEncoder()
@@ -40,7 +41,7 @@ train['Store_Size_Bucket_encoded'] = le_size.fit_transform(train['Store_Size_Buc
 # One-hot encoding for Type and Store_Size_Bucket
 train_onehot = pd.get_dummies(train, columns=['Type', 'Store_Size_Bucket'])
 
-train.to_csv('train_encoded.csv', index=False)
-train_onehot.to_csv('train_onehot.csv', index=False)
+write_dataset(train, 'train_encoded')
+write_dataset(train_onehot, 'train_onehot')
 
-print('Encoding complete. Encoded files saved.') 
\ No newline at end of file
+print('Encoding complete. Encoded datasets saved.') 
\ No newline at end of file
@@ -1,9 +1,10 @@
 import pandas as pd
 import numpy as np
+from dataset_io import read_dataset, write_dataset
 
 # --- Load Data ---
-zone_hour = pd.read_csv('zone_hour_order_counts.csv', index_col=0)
-zone_dow = pd.read_csv('zone_dow_order_counts.csv', index_col=0)
+zone_hour = read_dataset('zone_hour_order_counts', index_col='zone')
+zone_dow = read_dataset('zone_dow_order_counts', index_col='zone')
 
 # --- Feature Engineering for zone-hour data ---
 zone_hour_long = zone_hour.reset_index().melt(id_vars='zone', var_name='hour', value_name='demand')
@@ -24,7 +25,7 @@ zone_totals = zone_hour_long.groupby('zone')['demand'].sum()
 zone_totals_rank = zone_totals.rank(ascending=False).astype(int)
 zone_hour_long['zone_demand_rank'] = zone_hour_long['zone'].map(zone_totals_rank.to_dict())
 
-zone_hour_long.to_csv('zone_hour_features.csv', index=False)
+zone_hour_path = write_dataset(zone_hour_long, 'zone_hour_features')
 
 # --- Feature Engineering for zone-dow data ---
 zone_dow_long = zone_dow.reset_index().melt(id_vars='zone', var_name='dow', value_name='demand')
@@ -45,8 +46,8 @@ zone_totals_dow = zone_dow_long.groupby('zone')['demand'].sum()
 zone_totals_dow_rank = zone_totals_dow.rank(ascending=False).astype(int)
 zone_dow_long['zone_demand_rank'] = zone_dow_long['zone'].map(zone_totals_dow_rank.to_dict())
 
-zone_dow_long.to_csv('zone_dow_features.csv', index=False)
+zone_dow_path = write_dataset(zone_dow_long, 'zone_dow_features')
 
 print('Feature engineering complete. Outputs:')
-print(' - zone_hour_features.csv')
-print(' - zone_dow_features.csv') 
\ No newline at end of file
+print(f' - {zone_hour_path}')
+print(f' - {zone_dow_path}') 
\ No newline at end of file
@@ -6,6 +6,8 @@ let cart = [];
 let products = [];
 let user = null;
 let token = localStorage.getItem('token') || null;
+let trackingSource = null;
+let trackingDemoTimer = null;
 
 // Sample product data
 const sampleProducts = [
@@ -158,6 +160,7 @@ async function placeOrder() {
         showNotification('Order placed! ETA: ' + (res.estimated_delivery_time || 'soon'));
         cart = [];
         updateCartDisplay();
+        trackOrder(res.order_id);
     } catch (e) {
         showNotification('Order failed: ' + e.message);
     }
@@ -407,16 +410,64 @@ function animateTrackingSteps() {
     const steps = document.querySelectorAll('.tracking-step');
     let currentStep = 0;
     
-    setInterval(() => {
-        steps.forEach((step, index) => {
-            step.classList.remove('active');
-        });
-        
-        steps[currentStep].classList.add('active');
+    // Demo animation, replaced by live updates once an order is tracked
+    trackingDemoTimer = setInterval(() => {
+        setTrackingStep(currentStep);
         currentStep = (currentStep + 1) % steps.length;
     }, 2000);
 }
 
+function setTrackingStep(stepIndex) {
+    const steps = document.querySelectorAll('.tracking-step');
+    steps.forEach(step => step.classList.remove('active'));
+    steps[stepIndex].classList.add('active');
+}
+
+// Order status -> tracking step (Order Placed, MFU Loading, On the Way, Delivered)
+const TRACKING_STEP_BY_STATUS = {
+    pending: 0,
+    confirmed: 0,
+    preparing: 1,
+    delivering: 2,
+    delivered: 3
+};
+
+// Live order tracking over server-sent events (no polling)
+async function trackOrder(orderId) {
+    if (!token || !window.EventSource) return;
+    
+    clearInterval(trackingDemoTimer);
+    if (trackingSource) trackingSource.close();
+    
+    // EventSource cannot send the Authorization header, so trade the login
+    // token for a short-lived one that only opens this order's stream
+    let streamToken;
+    try {
+        ({ stream_token: streamToken } = await apiPost(`/orders/${orderId}/stream-token`, {}, true));
+    } catch (e) {
+        showNotification('Live tracking unavailable: ' + e.message);
+        return;
+    }
+    
+    const statusText = document.getElementById('trackingStatus');
+    trackingSource = new EventSource(`${API_BASE}/orders/${orderId}/events?stream_token=${encodeURIComponent(streamToken)}`);
+    
+    trackingSource.addEventListener('status', e => {
+        const data = JSON.parse(e.data);
+        setTrackingStep(TRACKING_STEP_BY_STATUS[data.status] || 0);
+        if (statusText) statusText.textContent = `Order #${data.order_id}: ${data.status}`;
+        if (data.status === 'delivered') {
+            trackingSource.close();
+            trackingSource = null;
+        }
+    });
+    
+    trackingSource.addEventListener('position', e => {
+        const data = JSON.parse(e.data);
+        if (statusText) statusText.title = `MFU ${data.mfu_id} at ${data.lat.toFixed(4)}, ${data.lng.toFixed(4)}`;
+    });
+}
+
 function showNotification(message) {
     // Create notification element
     const notification = document.createElement('div');
@@ -519,4 +570,5 @@ window.updateQuantity = updateQuantity;
 window.removeFromCart = removeFromCart; 
 window.registerUser = registerUser;
 window.loginUser = loginUser;
+window.trackOrder = trackOrder;
 window.logoutUser = logoutUser; 
\ No newline at end of file
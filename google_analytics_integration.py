@@ -6,6 +6,88 @@ from datetime import datetime, timedelta
 import time
 import os
 
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - depends on the environment
+    pa = None
+
+# Simulated traffic grid and its multiplicative patterns
+SIMULATED_CITIES = ['New York', 'Los Angeles', 'Chicago', 'Houston', 'Phoenix', 'Philadelphia']
+SIMULATED_DEVICES = ['desktop', 'mobile', 'tablet']
+SIMULATED_SOURCES = ['google / organic', 'facebook / social', 'direct / none', 'email / email']
+DEVICE_FACTORS = {'mobile': 1.8, 'tablet': 0.4}
+CITY_FACTORS = {'New York': 2.0}  # Simulate NYC focus
+
+def _source_factor(source):
+    if 'organic' in source:
+        return 1.2
+    if 'social' in source:
+        return 0.8
+    return 1.0
+
+def simulate_ga_traffic(start=None, end=None, periods=None, freq='h', cities=SIMULATED_CITIES,
+                        devices=SIMULATED_DEVICES, sources=SIMULATED_SOURCES, seed=None, output='pandas'):
+    """
+    Simulated GA traffic for every time x city x device x source combination.
+    
+    Time points follow pd.date_range(start, end, periods, freq); with no
+    arguments they are the 24 hours up to now. Each metric is drawn in one
+    vectorized RNG call over the whole grid, with the same business-hour,
+    device, source and city patterns as the original per-row simulator.
+    Returns a DataFrame with categorical dimensions, or a pyarrow Table
+    when output='arrow'.
+    """
+    if start is None and end is None:
+        end = pd.Timestamp(datetime.now()).floor('min')
+    if sum(arg is not None for arg in (start, end, periods)) < 2:
+        periods = 24
+    times = pd.date_range(start=start, end=end, periods=periods, freq=freq)
+    rng = np.random.default_rng(seed)
+    
+    # Multiplicative patterns, broadcast to shape (times, cities, devices, sources)
+    hour = times.hour.to_numpy()
+    hour_factor = np.select([(hour >= 9) & (hour <= 17), (hour >= 18) & (hour <= 22)], [1.5, 2.0], 0.3)
+    city_factor = np.array([CITY_FACTORS.get(city, 1.0) for city in cities])
+    device_factor = np.array([DEVICE_FACTORS.get(device, 1.0) for device in devices])
+    source_factor = np.array([_source_factor(source) for source in sources])
+    factor = (hour_factor[:, None, None, None] * city_factor[None, :, None, None] *
+              device_factor[None, None, :, None] * source_factor[None, None, None, :]).ravel()
+    
+    n = len(factor)
+    base_users = rng.poisson(50, n) * factor
+    active_users = np.maximum(1, (base_users * rng.uniform(0.8, 1.2, n)).astype(np.int64))
+    page_views = (active_users * rng.uniform(2, 5, n)).astype(np.int64)
+    events = (page_views * rng.uniform(3, 8, n)).astype(np.int64)
+    
+    per_time = len(cities) * len(devices) * len(sources)
+    grid = np.arange(n) % per_time
+    frame = pd.DataFrame({
+        'dateHourMinute': np.repeat(times.to_numpy(), per_time),
+        'city': pd.Categorical.from_codes(grid // (len(devices) * len(sources)), categories=cities),
+        'deviceCategory': pd.Categorical.from_codes(grid // len(sources) % len(devices), categories=devices),
+        'sourceMedium': pd.Categorical.from_codes(grid % len(sources), categories=sources),
+        'activeUsers': active_users,
+        'screenPageViews': page_views,
+        'eventCount': events,
+        'averageSessionDuration': rng.uniform(60, 300, n)  # seconds
+    })
+    if output == 'arrow':
+        if pa is None:
+            raise ImportError("output='arrow' needs pyarrow (pip install pyarrow)")
+        return pa.Table.from_pandas(frame, preserve_index=False)
+    return frame
+
+def simulate_ga_traffic_chunks(start, end, freq='h', chunk_periods=24 * 30, seed=None, **kwargs):
+    """
+    Simulated GA traffic over an arbitrarily long span, yielded as frames of
+    `chunk_periods` time points so years of traffic never sit in memory at once
+    """
+    times = pd.date_range(start, end, freq=freq)
+    offsets = range(0, len(times), chunk_periods)
+    for offset, chunk_seed in zip(offsets, np.random.SeedSequence(seed).spawn(len(offsets))):
+        yield simulate_ga_traffic(start=times[offset], periods=min(chunk_periods, len(times) - offset),
+                                  freq=freq, seed=chunk_seed, **kwargs)
+
 class GoogleAnalyticsIntegration:
     """
     Google Analytics integration for enriching Quick Commerce data
@@ -64,88 +146,25 @@ class GoogleAnalyticsIntegration:
     
     def _generate_simulated_ga_data(self):
         """
-        Generate realistic simulated Google Analytics data
+        Generate realistic simulated Google Analytics data in the API response format
         """
         print("Generating simulated Google Analytics data...")
         
-        # Generate time series data
-        now = datetime.now()
-        hours = []
-        for i in range(24):
-            time_point = now - timedelta(hours=i)
-            hours.append(time_point.strftime("%Y-%m-%d %H:%M"))
-        
-        # Simulate realistic patterns
-        cities = ['New York', 'Los Angeles', 'Chicago', 'Houston', 'Phoenix', 'Philadelphia']
-        devices = ['desktop', 'mobile', 'tablet']
-        sources = ['google / organic', 'facebook / social', 'direct / none', 'email / email']
-        
-        data = []
-        for hour in hours:
-            for city in cities:
-                for device in devices:
-                    for source in sources:
-                        # Simulate realistic user behavior patterns
-                        base_users = np.random.poisson(50)  # Base user count
-                        
-                        # Time-based patterns
-                        hour_of_day = int(hour.split()[-1])
-                        if 9 <= hour_of_day <= 17:  # Business hours
-                            base_users *= 1.5
-                        elif 18 <= hour_of_day <= 22:  # Evening peak
-                            base_users *= 2.0
-                        else:  # Night hours
-                            base_users *= 0.3
-                        
-                        # Device-based patterns
-                        if device == 'mobile':
-                            base_users *= 1.8
-                        elif device == 'tablet':
-                            base_users *= 0.4
-                        
-                        # Source-based patterns
-                        if 'organic' in source:
-                            base_users *= 1.2
-                        elif 'social' in source:
-                            base_users *= 0.8
-                        
-                        # City-based patterns (simulate NYC focus)
-                        if city == 'New York':
-                            base_users *= 2.0
-                        
-                        # Add some randomness
-                        base_users = max(1, int(base_users * np.random.uniform(0.8, 1.2)))
-                        
-                        # Calculate related metrics
-                        page_views = int(base_users * np.random.uniform(2, 5))
-                        events = int(page_views * np.random.uniform(3, 8))
-                        session_duration = np.random.uniform(60, 300)  # seconds
-                        
-                        data.append({
-                            'dateHourMinute': hour,
-                            'city': city,
-                            'deviceCategory': device,
-                            'sourceMedium': source,
-                            'activeUsers': base_users,
-                            'screenPageViews': page_views,
-                            'eventCount': events,
-                            'averageSessionDuration': session_duration
-                        })
+        # Last 24 hours of traffic
+        frame = simulate_ga_traffic()
+        dimensions = ['dateHourMinute', 'city', 'deviceCategory', 'sourceMedium']
+        metrics = ['activeUsers', 'screenPageViews', 'eventCount', 'averageSessionDuration']
+        values = {name: frame[name].astype(str).tolist() for name in dimensions[1:] + metrics}
+        values['dateHourMinute'] = frame['dateHourMinute'].dt.strftime("%Y-%m-%d %H:%M").tolist()
         
         return {
-            'dimensionHeaders': [
-                {'name': 'dateHourMinute'},
-                {'name': 'city'},
-                {'name': 'deviceCategory'},
-                {'name': 'sourceMedium'}
-            ],
-            'metricHeaders': [
-                {'name': 'activeUsers'},
-                {'name': 'screenPageViews'},
-                {'name': 'eventCount'},
-                {'name': 'averageSessionDuration'}
-            ],
-            'rows': data
+            'dimensionHeaders': [{'name': name} for name in dimensions],
+            'metricHeaders': [{'name': name} for name in metrics],
+            'rows': [
+                {'dimensionValues': [{'value': values[name][i]} for name in dimensions],
+                 'metricValues': [{'value': values[name][i]} for name in metrics]}
+                for i in range(len(frame))
+            ]
         }
     
     def process_ga_data(self, ga_response):
@@ -178,47 +197,76 @@ class GoogleAnalyticsIntegration:
         
         return df
     
+    def hourly_ga_metrics(self, ga_df, by_city=False):
+        """
+        Aggregate GA metrics once per hour of day (and per city if requested),
+        including the mobile and organic traffic ratios
+        """
+        keys = [ga_df['dateHourMinute'].dt.hour.rename('ga_hour')]
+        if by_city:
+            keys.append(ga_df['city'])
+        
+        users = ga_df['activeUsers']
+        frame = pd.DataFrame({
+            'ga_active_users': users,
+            'ga_page_views': ga_df['screenPageViews'],
+            'ga_events': ga_df['eventCount'],
+            'ga_avg_session_duration': ga_df['averageSessionDuration'],
+            'mobile_users': users.where(ga_df['deviceCategory'] == 'mobile', 0),
+            'organic_users': users.where(ga_df['sourceMedium'].str.contains('organic', na=False), 0)
+        })
+        metrics = frame.groupby(keys, observed=True).agg({
+            'ga_active_users': 'sum',
+            'ga_page_views': 'sum',
+            'ga_events': 'sum',
+            'ga_avg_session_duration': 'mean',
+            'mobile_users': 'sum',
+            'organic_users': 'sum'
+        })
+        
+        total_users = metrics['ga_active_users'].where(metrics['ga_active_users'] > 0)
+        metrics['ga_mobile_ratio'] = (metrics.pop('mobile_users') / total_users).fillna(0)
+        metrics['ga_organic_traffic_ratio'] = (metrics.pop('organic_users') / total_users).fillna(0)
+        return metrics
+    
+    def _order_hours(self, orders_df):
+        """Hour of day of every order: order_date if present, else Instacart's order_hour_of_day"""
+        if 'order_date' in orders_df.columns:
+            return pd.to_datetime(orders_df['order_date']).dt.hour.to_numpy()
+        if 'order_hour_of_day' in orders_df.columns:
+            return orders_df['order_hour_of_day'].to_numpy()
+        return np.full(len(orders_df), datetime.now().hour)
+    
     def enrich_order_data(self, orders_df, ga_df):
         """
-        Enrich order data with Google Analytics insights
+        Enrich order data with Google Analytics insights.
+        
+        GA metrics are aggregated once per hour of day and joined to the
+        orders on that hour, and on city as well when both frames have a
+        city column (orders in cities without GA data fall back to the
+        all-city hourly figures). Orders in hours without GA data get zeros.
         """
         print("Enriching order data with Google Analytics insights...")
         
-        # Merge GA data with orders based on time and location
         enriched_df = orders_df.copy()
+        columns = ['ga_active_users', 'ga_page_views', 'ga_events', 'ga_avg_session_duration',
+                   'ga_mobile_ratio', 'ga_organic_traffic_ratio']
+        hours = pd.Series(self._order_hours(orders_df), index=enriched_df.index, name='ga_hour')
         
-        # Add GA-derived features
-        enriched_df['ga_active_users'] = 0
-        enriched_df['ga_page_views'] = 0
-        enriched_df['ga_events'] = 0
-        enriched_df['ga_avg_session_duration'] = 0
-        enriched_df['ga_mobile_ratio'] = 0
-        enriched_df['ga_organic_traffic_ratio'] = 0
-        
-        # For each order, find matching GA data
-        for idx, order in enriched_df.iterrows():
-            # Extract time and location from order
-            order_time = pd.to_datetime(order.get('order_date', datetime.now()))
-            order_hour = order_time.hour
-            
-            # Find matching GA data for the same hour
-            matching_ga = ga_df[ga_df['dateHourMinute'].dt.hour == order_hour]
-            
-            if len(matching_ga) > 0:
-                # Aggregate GA metrics for the hour
-                enriched_df.loc[idx, 'ga_active_users'] = matching_ga['activeUsers'].sum()
-                enriched_df.loc[idx, 'ga_page_views'] = matching_ga['screenPageViews'].sum()
-                enriched_df.loc[idx, 'ga_events'] = matching_ga['eventCount'].sum()
-                enriched_df.loc[idx, 'ga_avg_session_duration'] = matching_ga['averageSessionDuration'].mean()
-                
-                # Calculate ratios
-                total_users = matching_ga['activeUsers'].sum()
-                if total_users > 0:
-                    mobile_users = matching_ga[matching_ga['deviceCategory'] == 'mobile']['activeUsers'].sum()
-                    organic_users = matching_ga[matching_ga['sourceMedium'].str.contains('organic', na=False)]['activeUsers'].sum()
-                    
-                    enriched_df.loc[idx, 'ga_mobile_ratio'] = mobile_users / total_users
-                    enriched_df.loc[idx, 'ga_organic_traffic_ratio'] = organic_users / total_users
+        # Hour-of-day lookup table, indexed directly by the order hour
+        hourly = self.hourly_ga_metrics(ga_df).reindex(range(24)).fillna(0)
+        valid = hours.between(0, 23)
+        positions = hours.where(valid, 0).astype(int).to_numpy()
+        features = pd.DataFrame(hourly[columns].to_numpy()[positions], index=enriched_df.index, columns=columns)
+        features[~valid.to_numpy()] = 0
+        
+        if 'city' in orders_df.columns and 'city' in ga_df.columns:
+            by_city = self.hourly_ga_metrics(ga_df, by_city=True)
+            keys = pd.DataFrame({'ga_hour': hours, 'city': orders_df['city']})
+            matched = keys.join(by_city[columns], on=['ga_hour', 'city'])[columns]
+            features = matched.fillna(features)
+        
+        enriched_df[columns] = features
         
         # Add derived features
         enriched_df['ga_engagement_rate'] = enriched_df['ga_events'] / enriched_df['ga_page_views'].replace(0, 1)
@@ -244,15 +292,15 @@ class GoogleAnalyticsIntegration:
         hourly_features.columns = ['_'.join(col).strip() for col in hourly_features.columns]
         
         # Device preferences
-        device_features = ga_df.groupby('deviceCategory')['activeUsers'].sum()
+        device_features = ga_df.groupby('deviceCategory', observed=True)['activeUsers'].sum()
         device_ratios = device_features / device_features.sum()
         
         # Traffic source analysis
-        source_features = ga_df.groupby('sourceMedium')['activeUsers'].sum()
+        source_features = ga_df.groupby('sourceMedium', observed=True)['activeUsers'].sum()
         source_ratios = source_features / source_features.sum()
         
         # Geographic patterns
-        city_features = ga_df.groupby('city')['activeUsers'].sum()
+        city_features = ga_df.groupby('city', observed=True)['activeUsers'].sum()
         city_ratios = city_features / city_features.sum()
         
         behavioral_features = {
@@ -272,19 +320,24 @@ class GoogleAnalyticsIntegration:
         print(f"Saved GA data to {filename}")
         
         # Also save behavioral features
-        behavioral_features = self.create_behavioral_features(ga_df)
-        
+        self.save_behavioral_features(self.create_behavioral_features(ga_df))
+    
+    def save_behavioral_features(self, behavioral_features, directory='.'):
+        """
+        Save behavioral features (as returned by create_behavioral_features
+        or BehavioralAggregates.to_features) to separate CSV files
+        """
         # Save hourly patterns
-        behavioral_features['hourly_patterns'].to_csv('ga_hourly_patterns.csv')
+        behavioral_features['hourly_patterns'].to_csv(os.path.join(directory, 'ga_hourly_patterns.csv'))
         
         # Save device preferences
-        behavioral_features['device_preferences'].to_csv('ga_device_preferences.csv')
+        behavioral_features['device_preferences'].to_csv(os.path.join(directory, 'ga_device_preferences.csv'))
         
         # Save traffic sources
-        behavioral_features['traffic_sources'].to_csv('ga_traffic_sources.csv')
+        behavioral_features['traffic_sources'].to_csv(os.path.join(directory, 'ga_traffic_sources.csv'))
         
         # Save geographic distribution
-        behavioral_features['geographic_distribution'].to_csv('ga_geographic_distribution.csv')
+        behavioral_features['geographic_distribution'].to_csv(os.path.join(directory, 'ga_geographic_distribution.csv'))
         
         print("Saved behavioral features to separate CSV files")
 
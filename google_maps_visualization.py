@@ -1,4 +1,8 @@
 import folium
+from folium.plugins import FastMarkerCluster, HeatMap
+import branca.colormap
+from branca.element import MacroElement
+from jinja2 import Template
 import pandas as pd
 import numpy as np
 from datetime import datetime
@@ -7,21 +11,250 @@ import webbrowser
 import os
 from typing import List, Dict, Tuple
 
+RENDER_MODES = ('auto', 'markers', 'cluster', 'heatmap', 'hexbin')
+KM_PER_DEG_LAT = 110.574
+KM_PER_DEG_LNG_EQUATOR = 111.320
+SIMPLIFY_MAX_ZOOM = 17  # Route coordinates keep 5 decimals (~1 m), coarser than a pixel beyond this zoom
+
+def order_coordinates(orders) -> Tuple[np.ndarray, np.ndarray]:
+    """Latitude and longitude arrays of Order objects or an order_store.OrderStore"""
+    if hasattr(orders, 'lat') and hasattr(orders, 'lng'):
+        return np.asarray(orders.lat, dtype=np.float64), np.asarray(orders.lng, dtype=np.float64)
+    lats = np.fromiter((order.latitude for order in orders), dtype=np.float64, count=len(orders))
+    lngs = np.fromiter((order.longitude for order in orders), dtype=np.float64, count=len(orders))
+    return lats, lngs
+
+def grid_aggregate(lats: np.ndarray, lngs: np.ndarray, weights: np.ndarray = None,
+                   cells: int = 200) -> np.ndarray:
+    """
+    Sum weights onto a cells x cells grid over the points' bounding box.
+    
+    Returns [[lat, lng, weight], ...] for the non-empty cells at their
+    weighted centroids, so a HeatMap layer gets at most cells**2 points
+    however many orders there are. Weights are scaled to a maximum of 1.
+    """
+    if len(lats) == 0:
+        return np.empty((0, 3))
+    weights = np.ones(len(lats)) if weights is None else np.asarray(weights, dtype=np.float64)
+    
+    span_lat = max(lats.max() - lats.min(), 1e-9)
+    span_lng = max(lngs.max() - lngs.min(), 1e-9)
+    row = np.minimum(((lats - lats.min()) / span_lat * cells).astype(np.int64), cells - 1)
+    col = np.minimum(((lngs - lngs.min()) / span_lng * cells).astype(np.int64), cells - 1)
+    cell = row * cells + col
+    
+    total = np.bincount(cell, weights=weights, minlength=cells * cells)
+    count = np.bincount(cell, minlength=cells * cells)
+    occupied = count > 0
+    center_lat = np.bincount(cell, weights=lats, minlength=cells * cells)[occupied] / count[occupied]
+    center_lng = np.bincount(cell, weights=lngs, minlength=cells * cells)[occupied] / count[occupied]
+    weight = total[occupied] / max(total[occupied].max(), 1e-12)
+    return np.column_stack([center_lat, center_lng, weight])
+
+def hexbin(lats: np.ndarray, lngs: np.ndarray, size_km: float, weights: np.ndarray = None):
+    """
+    Aggregate points into pointy-top hexagons of circumradius `size_km`.
+    
+    Points are projected to local km, binned by cube-coordinate rounding
+    and grouped with np.unique. Returns (center_lats, center_lngs, counts,
+    weight_sums) per non-empty hexagon.
+    """
+    lat0 = float(np.mean(lats)) if len(lats) else 0.0
+    km_per_deg_lng = KM_PER_DEG_LNG_EQUATOR * np.cos(np.radians(lat0))
+    x = lngs * km_per_deg_lng
+    y = lats * KM_PER_DEG_LAT
+    
+    # Axial coordinates, then round in cube space to the nearest hex centre
+    q = (np.sqrt(3) / 3 * x - y / 3) / size_km
+    r = (2 / 3 * y) / size_km
+    cube = np.stack([q, r, -q - r])
+    rounded = np.round(cube)
+    diff = np.abs(rounded - cube)
+    largest = diff.argmax(axis=0)
+    rounded[0] = np.where(largest == 0, -rounded[1] - rounded[2], rounded[0])
+    rounded[1] = np.where(largest == 1, -rounded[0] - rounded[2], rounded[1])
+    
+    keys, inverse, counts = np.unique(rounded[:2].T.astype(np.int64), axis=0,
+                                      return_inverse=True, return_counts=True)
+    inverse = inverse.ravel()
+    weight_sums = np.bincount(inverse, weights=weights, minlength=len(keys)) if weights is not None else counts
+    hq, hr = keys[:, 0], keys[:, 1]
+    center_x = size_km * np.sqrt(3) * (hq + hr / 2)
+    center_y = size_km * 1.5 * hr
+    return center_y / KM_PER_DEG_LAT, center_x / km_per_deg_lng, counts, weight_sums
+
+def hexagon_ring(lat: float, lng: float, size_km: float) -> List[List[float]]:
+    """GeoJSON [lng, lat] ring of a pointy-top hexagon"""
+    km_per_deg_lng = KM_PER_DEG_LNG_EQUATOR * np.cos(np.radians(lat))
+    angles = np.radians(30 + 60 * np.arange(7))
+    return [[round(lng + size_km * np.cos(a) / km_per_deg_lng, 6),
+             round(lat + size_km * np.sin(a) / KM_PER_DEG_LAT, 6)] for a in angles]
+
+def douglas_peucker(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Simplify a polyline, keeping every vertex further than `tolerance`
+    from the chord it would be replaced by (iterative, NumPy distances)
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if len(points) < 3:
+        return points
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last <= first + 1:
+            continue
+        chord = points[last] - points[first]
+        offsets = points[first + 1:last] - points[first]
+        length = np.hypot(chord[0], chord[1])
+        if length == 0:
+            distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        else:
+            distances = np.abs(chord[0] * offsets[:, 1] - chord[1] * offsets[:, 0]) / length
+        furthest = int(distances.argmax())
+        if distances[furthest] > tolerance:
+            split = first + 1 + furthest
+            keep[split] = True
+            stack.extend([(first, split), (split, last)])
+    return points[keep]
+
+def simplified_line_features(coords: List[Tuple[float, float]], properties: Dict,
+                             zoom_bands: List[Tuple[int, int]]) -> List[Dict]:
+    """
+    GeoJSON LineString features of one polyline, simplified for each zoom
+    band to one screen pixel at the band's highest zoom (capped at
+    SIMPLIFY_MAX_ZOOM), so the error stays within a pixel across the
+    band. Bands whose simplified lines are identical share one feature.
+    """
+    points = np.asarray(coords, dtype=np.float64)
+    scale = np.cos(np.radians(points[:, 0].mean()))
+    projected = np.column_stack([points[:, 1] * scale, points[:, 0]])  # roughly isotropic degrees
+    
+    features = []
+    for min_zoom, max_zoom in zoom_bands:
+        tolerance = 360.0 / (256 * 2 ** min(max_zoom, SIMPLIFY_MAX_ZOOM)) * scale
+        simplified = douglas_peucker(projected, tolerance)
+        line = [[round(x / scale, 5), round(y, 5)] for x, y in simplified.tolist()]
+        if features and features[-1]['geometry']['coordinates'] == line:
+            features[-1]['properties']['max_zoom'] = max_zoom
+            continue
+        features.append({
+            'type': 'Feature',
+            'properties': dict(properties, min_zoom=min_zoom, max_zoom=max_zoom),
+            'geometry': {'type': 'LineString', 'coordinates': line}
+        })
+    return features
+
+class RouteGeoJsonLayer(MacroElement):
+    """
+    All routes as one GeoJSON FeatureCollection drawn by a single Leaflet
+    layer. Line colour, width, opacity and tooltip come from each feature's
+    properties; on every zoom change only the features whose
+    [min_zoom, max_zoom] band contains the zoom are shown.
+    """
+    
+    _template = Template(u"""
+        {% macro script(this, kwargs) %}
+        var {{ this.get_name() }}_data = {{ this.data }};
+        var {{ this.get_name() }} = L.geoJson(null, {
+            style: function(feature) {
+                var p = feature.properties;
+                return {color: p.color, weight: p.weight, opacity: p.opacity, dashArray: p.dash || null};
+            },
+            onEachFeature: function(feature, layer) {
+                if (feature.properties.tooltip) {
+                    layer.bindTooltip(feature.properties.tooltip, {sticky: true});
+                }
+            }
+        }).addTo({{ this._parent.get_name() }});
+        function {{ this.get_name() }}_refresh() {
+            var zoom = {{ this.map_name }}.getZoom();
+            {{ this.get_name() }}.clearLayers();
+            {{ this.get_name() }}.addData({{ this.get_name() }}_data.features.filter(function(f) {
+                return zoom >= f.properties.min_zoom && zoom <= f.properties.max_zoom;
+            }));
+        }
+        {{ this.map_name }}.on('zoomend', {{ this.get_name() }}_refresh);
+        {{ this.get_name() }}_refresh();
+        {% endmacro %}
+    """)
+    
+    def __init__(self, features: List[Dict]):
+        super().__init__()
+        self._name = 'RouteGeoJsonLayer'
+        self.features = features
+        self.data = json.dumps({'type': 'FeatureCollection', 'features': features}, separators=(',', ':'))
+        self.map_name = None
+    
+    def render(self, **kwargs):
+        parent = self._parent
+        while parent is not None and not isinstance(parent, folium.Map):
+            parent = getattr(parent, '_parent', None)
+        self.map_name = parent.get_name()
+        super().render(**kwargs)
+
 class GoogleMapsVisualization:
     """
     Create interactive Google Maps visualization for MFU vs Traditional delivery comparison
+    
+    `render_mode` controls how orders are drawn. 'markers' emits one marker
+    (and route line) per order, which only suits small samples. 'cluster'
+    sends compact coordinates to a FastMarkerCluster; 'heatmap' feeds a
+    HeatMap layer with weights pre-aggregated onto a grid; 'hexbin'
+    aggregates orders into hexagons with counts. In the aggregated modes
+    traditional routes are drawn as one flow line per warehouse and hexagon
+    and at most `max_routes` MFU routes are drawn, so the HTML size stays
+    bounded whatever the order count. 'auto' picks markers up to
+    `max_markers` orders, clustering up to `max_cluster_points`, and
+    hexbins beyond.
+    
+    With route_layer='geojson' all routes go into one RouteGeoJsonLayer
+    per group, simplified per entry of `zoom_bands`, instead of a PolyLine
+    and arrow markers per route ('polylines').
     """
     
-    def __init__(self):
+    def __init__(self, render_mode: str = 'auto', max_markers: int = 500, max_cluster_points: int = 20000,
+                 max_bins: int = 1500, heat_grid: int = 200, max_routes: int = 2000,
+                 route_layer: str = 'geojson', zoom_bands: List[Tuple[int, int]] = ((0, 11), (12, 13), (14, 22))):
+        if render_mode not in RENDER_MODES:
+            raise ValueError(f"render_mode must be one of {RENDER_MODES}")
+        if route_layer not in ('geojson', 'polylines'):
+            raise ValueError("route_layer must be 'geojson' or 'polylines'")
         self.map_center = [40.7128, -74.0060]  # NYC center
         self.zoom_level = 12
-        
+        self.render_mode = render_mode
+        self.max_markers = max_markers
+        self.max_cluster_points = max_cluster_points
+        self.max_bins = max_bins
+        self.heat_grid = heat_grid
+        self.max_routes = max_routes
+        self.route_layer = route_layer
+        self.zoom_bands = list(zoom_bands)
+    
+    def _resolve_mode(self, n_orders: int) -> str:
+        if self.render_mode != 'auto':
+            return self.render_mode
+        if n_orders <= self.max_markers:
+            return 'markers'
+        if n_orders <= self.max_cluster_points:
+            return 'cluster'
+        return 'hexbin'
+    
+    def _hex_size_km(self, lats: np.ndarray, lngs: np.ndarray) -> float:
+        """Hexagon radius giving at most about max_bins hexagons over the points' extent"""
+        height = max(np.ptp(lats) * KM_PER_DEG_LAT, 0.1)
+        width = max(np.ptp(lngs) * KM_PER_DEG_LNG_EQUATOR * np.cos(np.radians(np.mean(lats))), 0.1)
+        # A hexagon of radius s covers 2.6 s^2; allow for partly filled edge rows
+        return max(np.sqrt(height * width / (2.6 * self.max_bins)) * 1.1, 0.05)
+    
     def create_delivery_comparison_map(self, orders: List, warehouse_locations: List[Tuple[float, float]], 
                                      mfu_locations: List[Tuple[float, float]], simulation_results: Dict):
         """
         Create interactive map showing MFU vs Traditional delivery routes
         """
-        print("Creating Google Maps visualization...")
+        mode = self._resolve_mode(len(orders))
+        print(f"Creating Google Maps visualization ({len(orders)} orders as {mode})...")
         
         # Create base map
         m = folium.Map(
@@ -40,11 +273,18 @@ class GoogleMapsVisualization:
         mfu_stations_group = folium.FeatureGroup(name="MFU Stations", overlay=True)
         orders_group = folium.FeatureGroup(name="Customer Orders", overlay=True)
         
-        # Add traditional delivery routes
-        self._add_traditional_routes(m, traditional_group, orders, warehouse_locations, simulation_results)
-        
-        # Add MFU delivery routes
-        self._add_mfu_routes(m, mfu_group, orders, mfu_locations, simulation_results)
+        # Add traditional and MFU delivery routes
+        if self.route_layer == 'geojson':
+            RouteGeoJsonLayer(self._traditional_route_features(orders, warehouse_locations, mode)).add_to(
+                traditional_group)
+            RouteGeoJsonLayer(self._mfu_route_features(orders, mfu_locations)).add_to(mfu_group)
+        else:
+            if mode == 'markers':
+                self._add_traditional_routes(m, traditional_group, orders, warehouse_locations, simulation_results)
+            else:
+                self._add_traditional_flows(traditional_group, orders, warehouse_locations)
+            self._add_mfu_routes(m, mfu_group, orders, mfu_locations, simulation_results,
+                                 arrows=mode == 'markers')
         
         # Add warehouses
         self._add_warehouses(m, warehouses_group, warehouse_locations)
@@ -53,7 +293,14 @@ class GoogleMapsVisualization:
         self._add_mfu_stations(m, mfu_stations_group, mfu_locations)
         
         # Add customer orders
-        self._add_customer_orders(m, orders_group, orders)
+        if mode == 'markers':
+            self._add_customer_orders(m, orders_group, orders)
+        elif mode == 'cluster':
+            self._add_order_clusters(orders_group, orders)
+        elif mode == 'heatmap':
+            self._add_order_heatmap(orders_group, orders)
+        else:
+            self._add_order_hexbins(orders_group, orders)
         
         # Add performance comparison popup
         self._add_performance_popup(m, simulation_results)
@@ -101,18 +348,102 @@ class GoogleMapsVisualization:
                 # Add direction arrow
                 self._add_direction_arrow(route_coords, color, group)
     
-    def _add_mfu_routes(self, m, group, orders: List, mfu_locations: List[Tuple[float, float]], 
-                       simulation_results: Dict):
-        """Add MFU delivery routes to map"""
-        
+    def _plan_mfu_routes(self, orders: List, mfu_locations: List[Tuple[float, float]], columnar: bool = True):
+        """Run the delivery engine on the orders; returns (engine, process_orders result)"""
         # Import delivery engine to get optimized routes
         from delivery_engine import DeliveryEngine
+        from order_store import OrderStore
         
         engine = DeliveryEngine()
-        mfu_result = engine.process_orders(orders, mfu_locations)
+        if columnar and not isinstance(orders, OrderStore) and len(orders) > self.max_markers:
+            orders = OrderStore.from_orders(orders)  # Columnar pipeline for large inputs
+        return engine, engine.process_orders(orders, mfu_locations)
+    
+    def _mfu_route_features(self, orders: List, mfu_locations: List[Tuple[float, float]]) -> List[Dict]:
+        """Simplified GeoJSON features of up to max_routes MFU routes, on road geometry when available"""
+        engine, mfu_result = self._plan_mfu_routes(orders, mfu_locations)
+        routes = mfu_result['routes']
+        colors = ['blue', 'darkblue', 'navy', 'royalblue']
+        
+        features = []
+        for i, route in enumerate(routes[:self.max_routes]):
+            start = mfu_locations[i % len(mfu_locations)]
+            coords = [start] + list(route.waypoints)
+            if engine.google_maps.road_network is not None and len(coords) > 1:
+                directions = engine.google_maps.get_route(start, coords[-1], coords[1:-1])
+                if directions['routes']:
+                    coords = directions['routes'][0]['geometry']
+            features.extend(simplified_line_features(coords, {
+                'kind': 'mfu',
+                'route_id': route.route_id,
+                'color': colors[i % len(colors)],
+                'weight': 4,
+                'opacity': 0.8,
+                'tooltip': f"MFU Route {i+1}<br>Orders: {len(route.orders)}<br>"
+                           f"Distance: {route.total_distance:.2f} km<br>Time: {route.total_time:.1f} min"
+            }, self.zoom_bands))
+        return features
+    
+    def _traditional_route_features(self, orders: List, warehouse_locations: List[Tuple[float, float]],
+                                     mode: str) -> List[Dict]:
+        """Warehouse-to-order lines, or warehouse-to-hexagon flows outside markers mode"""
+        colors = ['red', 'darkred', 'crimson', 'firebrick']
+        all_zooms = {'min_zoom': self.zoom_bands[0][0], 'max_zoom': self.zoom_bands[-1][1]}
+        features = []
+        
+        if mode == 'markers':
+            warehouse_assignments = self._assign_orders_to_warehouses(orders, warehouse_locations)
+            for warehouse_idx, warehouse_orders in warehouse_assignments.items():
+                warehouse_location = warehouse_locations[warehouse_idx]
+                for i, order in enumerate(warehouse_orders):
+                    distance = self._haversine_distance(warehouse_location, (order.latitude, order.longitude))
+                    features.append({
+                        'type': 'Feature',
+                        'properties': dict(all_zooms, kind='traditional', color=colors[warehouse_idx % len(colors)],
+                                           weight=3, opacity=0.7,
+                                           tooltip=f"Traditional Route {i+1}<br>Distance: {distance:.2f} km<br>"
+                                                   f"Time: {distance * 2:.1f} min"),
+                        'geometry': {'type': 'LineString', 'coordinates': [
+                            [round(warehouse_location[1], 5), round(warehouse_location[0], 5)],
+                            [round(order.longitude, 5), round(order.latitude, 5)]
+                        ]}
+                    })
+            return features
+        
+        for w, location, lat, lng, width, count in self._traditional_flows(orders, warehouse_locations):
+            features.append({
+                'type': 'Feature',
+                'properties': dict(all_zooms, kind='traditional_flow', color=colors[w % len(colors)],
+                                   weight=round(width, 1), opacity=0.5,
+                                   tooltip=f"Warehouse {w+1}: {count} orders"),
+                'geometry': {'type': 'LineString', 'coordinates': [
+                    [round(location[1], 5), round(location[0], 5)], [round(lng, 5), round(lat, 5)]
+                ]}
+            })
+        return features
+    
+    def _add_mfu_routes(self, m, group, orders: List, mfu_locations: List[Tuple[float, float]], 
+                       simulation_results: Dict, arrows: bool = True):
+        """Add MFU delivery routes to map (at most max_routes of them when not drawing arrows)"""
+        
+        engine, mfu_result = self._plan_mfu_routes(orders, mfu_locations, columnar=not arrows)
         
         colors = ['blue', 'darkblue', 'navy', 'royalblue']
         
+        if not arrows:
+            # One multi-line per colour instead of a PolyLine with popup per route
+            routes = mfu_result['routes']
+            shown = routes[:self.max_routes]
+            for c, color in enumerate(colors):
+                lines = []
+                for i in range(c, len(shown), len(colors)):
+                    start = mfu_locations[i % len(mfu_locations)]
+                    lines.append([[round(lat, 5), round(lng, 5)] for lat, lng in [start] + shown[i].waypoints])
+                if lines:
+                    folium.PolyLine(locations=lines, color=color, weight=3, opacity=0.7,
+                                    tooltip=f"MFU routes: showing {len(shown)} of {len(routes)}").add_to(group)
+            return
+        
         for i, route in enumerate(mfu_result['routes']):
             color = colors[i % len(colors)]
             
@@ -174,6 +505,78 @@ class GoogleMapsVisualization:
                 tooltip=f"Order {order.order_id}"
             ).add_to(group)
     
+    def _add_order_clusters(self, group, orders: List):
+        """Orders as a FastMarkerCluster of rounded coordinates (sampled beyond max_cluster_points)"""
+        lats, lngs = order_coordinates(orders)
+        if len(lats) > self.max_cluster_points:
+            keep = np.sort(np.random.default_rng(0).choice(len(lats), self.max_cluster_points, replace=False))
+            lats, lngs = lats[keep], lngs[keep]
+        data = np.round(np.column_stack([lats, lngs]), 5).tolist()
+        FastMarkerCluster(data, name="Customer Orders").add_to(group)
+    
+    def _add_order_heatmap(self, group, orders: List, weights: np.ndarray = None, name: str = "Order Density"):
+        """Orders as a HeatMap layer over grid-aggregated weights"""
+        lats, lngs = order_coordinates(orders)
+        data = grid_aggregate(lats, lngs, weights, self.heat_grid)
+        HeatMap(np.round(data, 5).tolist(), name=name, radius=12, blur=10, min_opacity=0.3).add_to(group)
+    
+    def _add_order_hexbins(self, group, orders: List):
+        """Orders as hexagons coloured by count, with the count as tooltip"""
+        lats, lngs = order_coordinates(orders)
+        if len(lats) == 0:
+            return
+        size_km = self._hex_size_km(lats, lngs)
+        center_lats, center_lngs, counts, _ = hexbin(lats, lngs, size_km)
+        
+        colormap = branca.colormap.linear.YlOrRd_09.scale(1, max(int(counts.max()), 2))
+        colormap.caption = f"Orders per hexagon ({size_km:.2f} km)"
+        features = [{
+            'type': 'Feature',
+            'properties': {'orders': int(count), 'color': colormap(count)},
+            'geometry': {'type': 'Polygon', 'coordinates': [hexagon_ring(lat, lng, size_km)]}
+        } for lat, lng, count in zip(center_lats.tolist(), center_lngs.tolist(), counts.tolist())]
+        
+        folium.GeoJson(
+            {'type': 'FeatureCollection', 'features': features},
+            name="Order Hexbins",
+            style_function=lambda feature: {'fillColor': feature['properties']['color'], 'color': 'none',
+                                            'fillOpacity': 0.6},
+            tooltip=folium.GeoJsonTooltip(fields=['orders'], aliases=['Orders'])
+        ).add_to(group)
+        colormap.add_to(group)
+    
+    def _traditional_flows(self, orders: List, warehouse_locations: List[Tuple[float, float]]) -> List[Tuple]:
+        """(warehouse, location, hex lat, hex lng, line width, orders) per warehouse and hexagon"""
+        from delivery_simulation_engine import nearest_location
+        
+        lats, lngs = order_coordinates(orders)
+        if len(lats) == 0:
+            return []
+        warehouse, _ = nearest_location(lats, lngs, warehouse_locations)
+        size_km = self._hex_size_km(lats, lngs) * 2
+        
+        flows = []
+        for w, location in enumerate(warehouse_locations):
+            mine = warehouse == w
+            if not mine.any():
+                continue
+            center_lats, center_lngs, counts, _ = hexbin(lats[mine], lngs[mine], size_km)
+            widths = 1 + 5 * counts / counts.max()
+            flows.extend(zip([w] * len(counts), [location] * len(counts), center_lats.tolist(),
+                             center_lngs.tolist(), widths.tolist(), counts.tolist()))
+        return flows
+    
+    def _add_traditional_flows(self, group, orders: List, warehouse_locations: List[Tuple[float, float]]):
+        """One line per (warehouse, hexagon) with width by order count, instead of one per order"""
+        colors = ['red', 'darkred', 'crimson', 'firebrick']
+        for w, location, lat, lng, width, _ in self._traditional_flows(orders, warehouse_locations):
+            folium.PolyLine(
+                locations=[location, (round(lat, 5), round(lng, 5))],
+                color=colors[w % len(colors)],
+                weight=round(width, 1),
+                opacity=0.5
+            ).add_to(group)
+    
     def _add_performance_popup(self, m, simulation_results: Dict):
         """Add performance comparison popup to map"""
         
@@ -275,6 +678,24 @@ class GoogleMapsVisualization:
         traditional_group = folium.FeatureGroup(name="Traditional Delivery Density")
         mfu_group = folium.FeatureGroup(name="MFU Delivery Density")
         
+        mode = self._resolve_mode(len(orders))
+        if mode != 'markers':
+            # Traditional density weighted by each order's delivery time when the simulation has it
+            delivery_times = simulation_results.get('traditional_results', {}).get('delivery_times')
+            weights = None
+            if delivery_times is not None and len(delivery_times) == len(orders):
+                weights = np.asarray(delivery_times, dtype=np.float64)
+            self._add_order_heatmap(traditional_group, orders, weights, name="Traditional Delivery Density")
+            if mode == 'hexbin':
+                self._add_order_hexbins(mfu_group, orders)
+            else:
+                self._add_order_heatmap(mfu_group, orders, name="MFU Delivery Density")
+            
+            traditional_group.add_to(m)
+            mfu_group.add_to(m)
+            folium.LayerControl().add_to(m)
+            return m
+        
         # Add markers with different colors for density visualization
         for order in orders:
             # Traditional delivery marker (red)
@@ -308,6 +729,47 @@ class GoogleMapsVisualization:
         
         return m
     
+    def create_tiled_density_map(self, tile_directory: str, base_tiles: str = None, assets_url: str = None):
+        """
+        Map over pre-rendered map_tiles.TileAggregator tiles
+        
+        Each tile layer is referenced by a relative {z}/{x}/{y}.png URL, so the
+        HTML stays a few KB and the browser only fetches visible tiles. Save
+        the map next to `tile_directory`. With base_tiles=None no online base
+        map is requested; `assets_url` points Leaflet's scripts and styles at
+        local copies (by file name) instead of their CDNs.
+        """
+        with open(os.path.join(tile_directory, 'metadata.json')) as f:
+            metadata = json.load(f)
+        lat_min, lng_min, lat_max, lng_max = metadata['bounds']
+        
+        m = folium.Map(
+            location=[(lat_min + lat_max) / 2, (lng_min + lng_max) / 2],
+            zoom_start=metadata['min_zoom'] + 2,
+            tiles=base_tiles,
+            min_zoom=metadata['min_zoom'],
+            max_zoom=metadata['max_zoom'] + 3
+        )
+        if assets_url:
+            m.default_js = [(name, f"{assets_url}/{url.rsplit('/', 1)[-1]}") for name, url in m.default_js]
+            m.default_css = [(name, f"{assets_url}/{url.rsplit('/', 1)[-1]}") for name, url in m.default_css]
+        
+        names = {'orders': "Order Density", 'routes': "MFU Route Density"}
+        for layer, info in metadata['layers'].items():
+            folium.TileLayer(
+                tiles=f"{os.path.basename(os.path.normpath(tile_directory))}/{layer}/{{z}}/{{x}}/{{y}}.png",
+                attr=f"{info['features']:,} {layer}",
+                name=names.get(layer, layer),
+                overlay=True,
+                min_zoom=metadata['min_zoom'],
+                max_native_zoom=metadata['max_zoom'],
+                max_zoom=metadata['max_zoom'] + 3
+            ).add_to(m)
+        m.fit_bounds([[lat_min, lng_min], [lat_max, lng_max]])
+        folium.LayerControl().add_to(m)
+        
+        return m
+    
     def save_and_open_map(self, m, filename: str = "delivery_comparison_map.html"):
         """Save map and open in browser"""
         
@@ -0,0 +1,20 @@
+"""
+Gunicorn settings for serving app.py: gunicorn -c gunicorn.conf.py app:app
+
+/api/orders/<id>/events keeps its request open for as long as the customer
+watches the order, so each open EventSource holds a worker thread. Sync
+workers would be exhausted by a handful of tracking tabs; threaded workers
+let one process hold many idle streams while still serving the JSON API.
+Size `threads` for the expected concurrent trackers plus API headroom.
+
+Keep a single worker process: order_events is an in-process broker, so a
+status change published in one process never reaches streams held by another.
+"""
+import os
+
+bind = os.getenv('BIND', '0.0.0.0:5000')
+worker_class = 'gthread'
+workers = 1
+threads = int(os.getenv('GUNICORN_THREADS', '32'))
+# Streams send a keep-alive every TRACKING_HEARTBEAT_SECONDS, well inside this
+timeout = 60
@@ -0,0 +1,203 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import time
+from functools import wraps
+
+from flask import Response, abort, current_app, make_response, render_template, request
+
+try:
+    import brotli  # Optional: pip install Brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/javascript',
+    'application/javascript', 'application/json', 'image/svg+xml'
+}
+ASSET_EXTENSIONS = ('.css', '.js')
+
+
+def _compress(data: bytes, encoding: str, level: int) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=min(level + 3, 11))
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def _content_hash(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()[:10]
+
+
+class HttpCaching:
+    """
+    Response compression and HTTP caching for the QuickCart app.
+
+    - Compresses text/JSON responses with brotli (if installed) or gzip
+      once they exceed COMPRESS_MIN_SIZE bytes.
+    - Serves frontend CSS/JS under content-hashed URLs with an immutable
+      one-year Cache-Control, precompressed once in memory.
+    - Renders pages once per template/asset version and answers
+      revalidations with 304 via ETags.
+
+    The asset manifest is built once at startup. Changed frontend files
+    are picked up only when ASSET_RELOAD_INTERVAL is set (seconds between
+    checks) or, by default, in debug mode; production requests never
+    touch the filesystem.
+    """
+
+    def __init__(self, app=None, frontend_dir: str = None):
+        self.frontend_dir = frontend_dir
+        self._assets = {}
+        self._asset_urls = {}
+        self._asset_mtimes = None
+        self._assets_checked = 0.0
+        self._pages = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('COMPRESS_MIN_SIZE', 500)
+        app.config.setdefault('COMPRESS_LEVEL', 6)
+        app.config.setdefault('STATIC_MAX_AGE', 31536000)
+        app.config.setdefault('CATALOG_MAX_AGE', 60)
+        app.config.setdefault('ASSET_RELOAD_INTERVAL', None)  # None: every 1s in debug, never otherwise
+
+        self.app = app
+        self.frontend_dir = self.frontend_dir or os.path.join(app.root_path, 'frontend')
+        app.add_url_rule('/assets/<path:filename>', 'hashed_asset', self.serve_asset)
+        app.after_request(self._compress_response)
+        self._build_assets(*self._scan_assets())
+
+    # --- Content-hashed static assets ---
+    def _scan_assets(self):
+        """Frontend asset names and their modification times"""
+        if not os.path.isdir(self.frontend_dir):
+            return [], ()
+        names = sorted(f for f in os.listdir(self.frontend_dir) if f.endswith(ASSET_EXTENSIONS))
+        return names, tuple(os.path.getmtime(os.path.join(self.frontend_dir, name)) for name in names)
+
+    def _refresh_assets(self):
+        """Rebuild the asset manifest if reloading is enabled, due and a frontend file changed"""
+        interval = self.app.config['ASSET_RELOAD_INTERVAL']
+        if interval is None:
+            if not self.app.debug:
+                return
+            interval = 1.0
+        now = time.monotonic()
+        if now - self._assets_checked < interval:
+            return
+        self._assets_checked = now
+
+        names, mtimes = self._scan_assets()
+        if mtimes != self._asset_mtimes or len(names) != len(self._asset_urls):
+            self._build_assets(names, mtimes)
+
+    def _build_assets(self, names, mtimes):
+        """Hash and precompress every frontend asset"""
+        level = self.app.config['COMPRESS_LEVEL']
+        assets, urls = {}, {}
+        for name in names:
+            with open(os.path.join(self.frontend_dir, name), 'rb') as f:
+                data = f.read()
+            stem, ext = os.path.splitext(name)
+            hashed_name = f"{stem}.{_content_hash(data)}{ext}"
+            variants = {'identity': data, 'gzip': _compress(data, 'gzip', level)}
+            if brotli is not None:
+                variants['br'] = _compress(data, 'br', level)
+            assets[hashed_name] = (mimetypes.guess_type(name)[0] or 'application/octet-stream', variants)
+            urls[name] = f"/assets/{hashed_name}"
+
+        self._assets, self._asset_urls, self._asset_mtimes = assets, urls, mtimes
+        self._pages.clear()
+
+    def asset_url(self, name: str) -> str:
+        """Content-hashed URL for a frontend asset"""
+        self._refresh_assets()
+        return self._asset_urls.get(name, name)
+
+    def serve_asset(self, filename):
+        self._refresh_assets()
+        if filename not in self._assets:
+            abort(404)
+
+        mimetype, variants = self._assets[filename]
+        encoding = self._negotiate_encoding(variants)
+        response = Response(variants[encoding], mimetype=mimetype)
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        response.set_etag(filename, weak=True)
+        response.cache_control.public = True
+        response.cache_control.max_age = self.app.config['STATIC_MAX_AGE']
+        response.cache_control.immutable = True
+        return response.make_conditional(request)
+
+    # --- Cached pages ---
+    def cached_page(self, template_name: str):
+        """Render a page once per version and serve it with revalidation"""
+        self._refresh_assets()
+        page = self._pages.get(template_name)
+        if page is None:
+            html = render_template(template_name)
+            # Point local asset references at their content-hashed URLs
+            for name, url in self._asset_urls.items():
+                html = re.sub(r'(\b(?:href|src)=")' + re.escape(name) + '"', r'\g<1>' + url + '"', html)
+            data = html.encode('utf-8')
+            page = self._pages[template_name] = (data, _content_hash(data))
+
+        data, etag = page
+        response = Response(data, mimetype='text/html')
+        response.set_etag(etag, weak=True)
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+
+    # --- Compression ---
+    def _negotiate_encoding(self, available) -> str:
+        accepted = request.accept_encodings
+        for encoding in ('br', 'gzip'):
+            if encoding in available and accepted[encoding] > 0:
+                return encoding
+        return 'identity'
+
+    def _compress_response(self, response):
+        if (response.status_code != 200
+                or response.direct_passthrough
+                or response.is_streamed
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        data = response.get_data()
+        if len(data) < self.app.config['COMPRESS_MIN_SIZE']:
+            return response
+
+        available = ('br', 'gzip') if brotli is not None else ('gzip',)
+        encoding = self._negotiate_encoding(available)
+        response.vary.add('Accept-Encoding')
+        if encoding == 'identity':
+            return response
+
+        # Strong validators describe the identity bytes; downgrade so they stay valid per encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+
+        response.set_data(_compress(data, encoding, self.app.config['COMPRESS_LEVEL']))
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+
+def conditional(f):
+    """Add a weak ETag and short public caching to a GET endpoint, answering 304 when unchanged"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        response = make_response(f(*args, **kwargs))
+        if request.method in ('GET', 'HEAD') and response.status_code == 200:
+            response.add_etag(weak=True)
+            response.cache_control.public = True
+            response.cache_control.max_age = current_app.config['CATALOG_MAX_AGE']
+            response.make_conditional(request)
+        return response
+    return decorated
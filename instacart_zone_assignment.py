@@ -1,9 +1,10 @@
 import pandas as pd
 import numpy as np
 from sklearn.cluster import KMeans
+from dataset_io import read_dataset, write_dataset
 
 # Load orders data
-orders = pd.read_csv('orders.csv')
+orders = read_dataset('orders')
 
 # Aggregate user order patterns (e.g., order frequency, avg order hour, avg days between orders)
 user_features = orders.groupby('user_id').agg({
@@ -28,5 +29,5 @@ user_zone_map = user_features['zone'].to_dict()
 orders['zone'] = orders['user_id'].map(user_zone_map)
 
 # Save orders with zone assignment
-orders.to_csv('orders_with_zones.csv', index=False)
-print('Zone assignment complete. Saved as orders_with_zones.csv.') 
\ No newline at end of file
+path = write_dataset(orders, 'orders_with_zones')
+print(f'Zone assignment complete. Saved as {path}.') 
\ No newline at end of file
@@ -0,0 +1,215 @@
+import hmac
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, deque
+from typing import Dict, List, Tuple
+
+from flask import Response, abort, current_app, g, has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger('quickcart.instrumentation')
+
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+QUERY_COUNT_BUCKETS = [0, 1, 2, 5, 10, 20, 50, 100]
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus exposition model"""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: List[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+class MetricsRegistry:
+    """Thread-safe store of labelled counters and histograms"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[tuple, float]] = {}
+        self._histograms: Dict[str, Dict[tuple, Histogram]] = {}
+        self._bucket_specs: Dict[str, List[float]] = {}
+        self._help: Dict[str, str] = {}
+
+    def counter(self, name: str, help_text: str):
+        self._counters.setdefault(name, {})
+        self._help[name] = help_text
+
+    def histogram(self, name: str, help_text: str, buckets: List[float]):
+        self._histograms.setdefault(name, {})
+        self._bucket_specs[name] = buckets
+        self._help[name] = help_text
+
+    def inc(self, name: str, labels: tuple = (), amount: float = 1):
+        with self._lock:
+            series = self._counters[name]
+            series[labels] = series.get(labels, 0) + amount
+
+    def observe(self, name: str, value: float, labels: tuple = ()):
+        with self._lock:
+            series = self._histograms[name]
+            hist = series.get(labels)
+            if hist is None:
+                hist = series[labels] = Histogram(self._bucket_specs[name])
+            hist.observe(value)
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        with self._lock:
+            for name, series in self._counters.items():
+                lines.append(f'# HELP {name} {self._help[name]}')
+                lines.append(f'# TYPE {name} counter')
+                for labels, value in series.items():
+                    lines.append(f'{name}{_format_labels(labels)} {value}')
+
+            for name, series in self._histograms.items():
+                lines.append(f'# HELP {name} {self._help[name]}')
+                lines.append(f'# TYPE {name} histogram')
+                for labels, hist in series.items():
+                    cumulative = 0
+                    for bound, count in zip(hist.buckets + [float('inf')], hist.counts):
+                        cumulative += count
+                        le = '+Inf' if bound == float('inf') else repr(bound)
+                        lines.append(f'{name}_bucket{_format_labels(labels, (("le", le),))} {cumulative}')
+                    lines.append(f'{name}_sum{_format_labels(labels)} {hist.sum}')
+                    lines.append(f'{name}_count{_format_labels(labels)} {hist.count}')
+        return '\n'.join(lines) + '\n'
+
+
+class Instrumentation:
+    """
+    Request and SQL instrumentation for the QuickCart app.
+
+    Times every request per route, counts SQLAlchemy queries per request,
+    flags repeated identical statements as likely N+1 patterns, logs slow
+    queries and exposes everything at /metrics in Prometheus format.
+    Register it before other after_request hooks so its timing covers them.
+
+    /metrics is closed by default (404). Scrapers get in with
+    `Authorization: Bearer <METRICS_TOKEN>` or from an address listed in
+    METRICS_ALLOWED_IPS.
+    """
+
+    def __init__(self, app=None, db=None):
+        self.registry = MetricsRegistry()
+        self.slow_queries = deque(maxlen=100)
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        app.config.setdefault('METRICS_ENABLED', True)
+        app.config.setdefault('SLOW_QUERY_SECONDS', 0.1)
+        app.config.setdefault('N_PLUS_ONE_THRESHOLD', 5)
+        app.config.setdefault('METRICS_TOKEN', os.getenv('METRICS_TOKEN'))
+        app.config.setdefault('METRICS_ALLOWED_IPS', ())
+        if not app.config['METRICS_ENABLED']:
+            return
+
+        self.slow_query_seconds = app.config['SLOW_QUERY_SECONDS']
+        self.n_plus_one_threshold = app.config['N_PLUS_ONE_THRESHOLD']
+
+        registry = self.registry
+        registry.histogram('quickcart_request_duration_seconds',
+                           'Request latency by route', LATENCY_BUCKETS)
+        registry.histogram('quickcart_request_queries',
+                           'SQL queries issued per request by route', QUERY_COUNT_BUCKETS)
+        registry.histogram('quickcart_sql_query_duration_seconds',
+                           'SQL statement latency', LATENCY_BUCKETS)
+        registry.counter('quickcart_requests_total', 'Requests by route, method and status')
+        registry.counter('quickcart_slow_queries_total', 'SQL statements slower than SLOW_QUERY_SECONDS')
+        registry.counter('quickcart_n_plus_one_total',
+                         'Requests repeating one statement at least N_PLUS_ONE_THRESHOLD times')
+
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.add_url_rule('/metrics', 'metrics', self.metrics_endpoint)
+
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    # --- Request hooks ---
+    def _start_request(self):
+        g._metrics_start = time.perf_counter()
+        g._metrics_statements = Counter()
+
+    def _finish_request(self, response):
+        start = g.pop('_metrics_start', None)
+        if start is None:
+            return response
+
+        duration = time.perf_counter() - start
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        statements = g.pop('_metrics_statements', Counter())
+        route_labels = (('route', route),)
+
+        self.registry.observe('quickcart_request_duration_seconds', duration, route_labels)
+        self.registry.observe('quickcart_request_queries', sum(statements.values()), route_labels)
+        self.registry.inc('quickcart_requests_total',
+                          route_labels + (('method', request.method), ('status', str(response.status_code))))
+
+        if statements:
+            statement, repeats = statements.most_common(1)[0]
+            if repeats >= self.n_plus_one_threshold:
+                self.registry.inc('quickcart_n_plus_one_total', route_labels)
+                logger.warning("Possible N+1 on %s: statement ran %d times: %s",
+                               route, repeats, statement.splitlines()[0][:200])
+        return response
+
+    # --- SQLAlchemy hooks ---
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('_metrics_query_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('_metrics_query_start')
+        if not starts:
+            return
+        duration = time.perf_counter() - starts.pop()
+
+        self.registry.observe('quickcart_sql_query_duration_seconds', duration)
+        route = 'none'
+        if has_request_context():
+            statements = g.get('_metrics_statements')
+            if statements is not None:
+                statements[statement] += 1
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+
+        if duration >= self.slow_query_seconds:
+            self.registry.inc('quickcart_slow_queries_total', (('route', route),))
+            self.slow_queries.append((time.time(), route, duration, statement))
+            logger.warning("Slow query (%.1f ms) on %s: %s", duration * 1000, route, statement[:500])
+
+    def _metrics_allowed(self) -> bool:
+        token = current_app.config['METRICS_TOKEN']
+        if token:
+            scheme, _, supplied = request.headers.get('Authorization', '').partition(' ')
+            if scheme.lower() == 'bearer' and hmac.compare_digest(supplied.encode(), token.encode()):
+                return True
+        return request.remote_addr in current_app.config['METRICS_ALLOWED_IPS']
+
+    def metrics_endpoint(self):
+        if not self._metrics_allowed():
+            abort(404)
+        return Response(self.registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
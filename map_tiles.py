@@ -0,0 +1,215 @@
+import json
+import math
+import os
+import struct
+import time
+import zlib
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+TILE_SIZE = 256
+MAX_LATITUDE = 85.05112878
+
+# Colour ramps as (position 0..1, r, g, b, alpha); empty pixels stay transparent
+COLOR_RAMPS = {
+    'orders': [(0.0, 255, 255, 178, 90), (0.35, 254, 178, 76, 160), (0.7, 240, 59, 32, 210),
+               (1.0, 128, 0, 38, 240)],
+    'routes': [(0.0, 158, 202, 225, 110), (0.5, 49, 130, 189, 190), (1.0, 8, 48, 107, 240)]
+}
+
+
+def encode_png(rgba: np.ndarray) -> bytes:
+    """Encode an (h, w, 4) uint8 array as an RGBA PNG with zlib only"""
+    height, width, _ = rgba.shape
+    raw = np.zeros((height, width * 4 + 1), dtype=np.uint8)  # leading 0 = no filter per scanline
+    raw[:, 1:] = rgba.reshape(height, -1)
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) +
+            chunk(b'IDAT', zlib.compress(raw.tobytes(), 6)) + chunk(b'IEND', b''))
+
+
+def mercator(lats, lngs) -> Tuple[np.ndarray, np.ndarray]:
+    """Web Mercator coordinates in 0..1 (x east, y south) as used by XYZ tiles"""
+    lat = np.radians(np.clip(np.asarray(lats, dtype=np.float64), -MAX_LATITUDE, MAX_LATITUDE))
+    x = (np.asarray(lngs, dtype=np.float64) + 180.0) / 360.0
+    y = (1.0 - np.log(np.tan(lat) + 1.0 / np.cos(lat)) / math.pi) / 2.0
+    return x, y
+
+
+def colorize(values: np.ndarray, max_value: float, ramp: List[Tuple]) -> np.ndarray:
+    """Log-scaled RGBA image of a density grid"""
+    scaled = np.log1p(values) / math.log1p(max_value) if max_value > 0 else np.zeros_like(values)
+    stops = np.array(ramp, dtype=np.float64)
+    rgba = np.empty(values.shape + (4,), dtype=np.uint8)
+    for channel in range(4):
+        rgba[..., channel] = np.interp(scaled, stops[:, 0], stops[:, channel + 1])
+    rgba[values <= 0] = 0
+    return rgba
+
+
+class TileAggregator:
+    """
+    Accumulates weighted points and polylines into XYZ density tiles.
+
+    For every zoom level each input is projected to Web Mercator pixels and
+    summed into sparse per-tile 256x256 float32 grids, one layer per name
+    ('orders', 'routes', ...). Inputs can be fed chunk by chunk, so a month
+    of orders never has to be in memory at once; memory is bounded by the
+    number of non-empty tiles. `write` renders every grid to
+    `<directory>/<layer>/<z>/<x>/<y>.png` with a log colour scale
+    normalised per zoom level, plus a metadata.json describing the set.
+    """
+
+    def __init__(self, min_zoom: int = 10, max_zoom: int = 15):
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self.layers: Dict[str, Dict[Tuple[int, int, int], np.ndarray]] = {}
+        self.bounds = [math.inf, math.inf, -math.inf, -math.inf]  # lat_min, lng_min, lat_max, lng_max
+        self.counts: Dict[str, int] = {}
+
+    def _accumulate(self, layer: str, zoom: int, px: np.ndarray, py: np.ndarray, weights: np.ndarray):
+        """Add weights at global pixel coordinates of one zoom level"""
+        n_tiles = 1 << zoom
+        inside = (px >= 0) & (py >= 0) & (px < n_tiles * TILE_SIZE) & (py < n_tiles * TILE_SIZE)
+        px, py, weights = px[inside], py[inside], weights[inside]
+        if len(px) == 0:
+            return
+
+        # One sort groups samples by (tile, pixel); each tile then gets a single scatter-add
+        key = ((px >> 8) * n_tiles + (py >> 8)) * (TILE_SIZE * TILE_SIZE) + (py & 255) * TILE_SIZE + (px & 255)
+        unique, inverse = np.unique(key, return_inverse=True)
+        sums = np.bincount(inverse.ravel(), weights=weights)
+        tile = unique // (TILE_SIZE * TILE_SIZE)
+        pixel = unique % (TILE_SIZE * TILE_SIZE)
+        bounds = np.flatnonzero(np.diff(tile)) + 1
+
+        tiles = self.layers.setdefault(layer, {})
+        for start, stop in zip(np.r_[0, bounds], np.r_[bounds, len(tile)]):
+            tx, ty = divmod(int(tile[start]), n_tiles)
+            grid = tiles.get((zoom, tx, ty))
+            if grid is None:
+                grid = tiles[(zoom, tx, ty)] = np.zeros(TILE_SIZE * TILE_SIZE, dtype=np.float32)
+            grid[pixel[start:stop]] += sums[start:stop]
+
+    def _extend_bounds(self, lats: np.ndarray, lngs: np.ndarray):
+        if len(lats):
+            self.bounds = [min(self.bounds[0], float(lats.min())), min(self.bounds[1], float(lngs.min())),
+                           max(self.bounds[2], float(lats.max())), max(self.bounds[3], float(lngs.max()))]
+
+    def add_points(self, lats: np.ndarray, lngs: np.ndarray, weights: np.ndarray = None, layer: str = 'orders'):
+        """Add a chunk of points (e.g. order locations), optionally weighted"""
+        lats = np.asarray(lats, dtype=np.float64)
+        lngs = np.asarray(lngs, dtype=np.float64)
+        weights = np.ones(len(lats)) if weights is None else np.asarray(weights, dtype=np.float64)
+        self._extend_bounds(lats, lngs)
+        self.counts[layer] = self.counts.get(layer, 0) + len(lats)
+
+        x, y = mercator(lats, lngs)
+        for zoom in range(self.min_zoom, self.max_zoom + 1):
+            scale = TILE_SIZE * (1 << zoom)
+            self._accumulate(layer, zoom, (x * scale).astype(np.int64), (y * scale).astype(np.int64), weights)
+
+    def add_polylines(self, lines: Iterable, layer: str = 'routes'):
+        """
+        Add polylines given as sequences of (lat, lng). Each segment is
+        sampled at one-pixel spacing per zoom level, so a route adds about
+        one unit of density per pixel it crosses.
+        """
+        starts, ends = [], []
+        for line in lines:
+            line = np.asarray(line, dtype=np.float64).reshape(-1, 2)
+            if len(line) >= 2:
+                starts.append(line[:-1])
+                ends.append(line[1:])
+                self.counts[layer] = self.counts.get(layer, 0) + 1
+        if not starts:
+            return
+        starts, ends = np.concatenate(starts), np.concatenate(ends)
+        self._extend_bounds(np.r_[starts[:, 0], ends[:, 0]], np.r_[starts[:, 1], ends[:, 1]])
+
+        x0, y0 = mercator(starts[:, 0], starts[:, 1])
+        x1, y1 = mercator(ends[:, 0], ends[:, 1])
+        for zoom in range(self.min_zoom, self.max_zoom + 1):
+            scale = TILE_SIZE * (1 << zoom)
+            length = np.maximum(np.abs(x1 - x0), np.abs(y1 - y0)) * scale
+            samples = np.ceil(length).astype(np.int64) + 1
+            segment = np.repeat(np.arange(len(samples)), samples)
+            step = np.arange(len(segment)) - np.repeat(np.cumsum(samples) - samples, samples)
+            t = step / np.maximum(samples[segment] - 1, 1)
+            px = ((x0[segment] + (x1 - x0)[segment] * t) * scale).astype(np.int64)
+            py = ((y0[segment] + (y1 - y0)[segment] * t) * scale).astype(np.int64)
+            self._accumulate(layer, zoom, px, py, np.ones(len(px)))
+
+    def write(self, directory: str) -> Dict:
+        """Render all tiles as PNGs and write metadata.json; returns the metadata"""
+        metadata = {
+            'min_zoom': self.min_zoom,
+            'max_zoom': self.max_zoom,
+            'bounds': self.bounds,
+            'layers': {}
+        }
+        for layer, tiles in self.layers.items():
+            ramp = COLOR_RAMPS.get(layer, COLOR_RAMPS['orders'])
+            max_by_zoom: Dict[int, float] = {}
+            for (zoom, _, _), grid in tiles.items():
+                max_by_zoom[zoom] = max(max_by_zoom.get(zoom, 0.0), float(grid.max()))
+
+            for (zoom, tx, ty), grid in tiles.items():
+                path = os.path.join(directory, layer, str(zoom), str(tx))
+                os.makedirs(path, exist_ok=True)
+                image = colorize(grid.reshape(TILE_SIZE, TILE_SIZE), max_by_zoom[zoom], ramp)
+                with open(os.path.join(path, f"{ty}.png"), 'wb') as f:
+                    f.write(encode_png(image))
+
+            metadata['layers'][layer] = {
+                'tiles': len(tiles),
+                'features': self.counts.get(layer, 0),
+                'max_density': {str(zoom): value for zoom, value in sorted(max_by_zoom.items())}
+            }
+
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, 'metadata.json'), 'w') as f:
+            json.dump(metadata, f, indent=2)
+        return metadata
+
+
+def main():
+    """Tile a month of synthetic orders plus MFU routes and write an offline map"""
+    from delivery_engine import DeliveryEngine
+    from google_maps_visualization import GoogleMapsVisualization
+    from order_store import OrderStore
+    from simulation_sink import synthetic_order_chunks
+
+    print("=== Offline Delivery Density Tiles ===")
+    started = time.perf_counter()
+    aggregator = TileAggregator(min_zoom=10, max_zoom=15)
+
+    # 30 days at ~100k orders a day, streamed in chunks
+    for lat, lng, _ in synthetic_order_chunks(3_000_000, chunk_size=500_000):
+        aggregator.add_points(lat, lng)
+    print(f"Aggregated {aggregator.counts['orders']:,} orders in {time.perf_counter() - started:.1f}s")
+
+    lat, lng, _ = next(synthetic_order_chunks(5_000, seed=7))
+    mfu_locations = [(40.7128, -74.0060), (40.7505, -73.9934), (40.7831, -73.9712)]
+    routes = DeliveryEngine().process_orders(OrderStore(lat, lng), mfu_locations)['routes']
+    aggregator.add_polylines([mfu_locations[i % len(mfu_locations)]] + route.waypoints
+                             for i, route in enumerate(routes))
+
+    metadata = aggregator.write('delivery_tiles')
+    for layer, info in metadata['layers'].items():
+        print(f"- {layer}: {info['tiles']} tiles from {info['features']:,} features")
+    print(f"Tiles written in {time.perf_counter() - started:.1f}s")
+
+    viz = GoogleMapsVisualization()
+    m = viz.create_tiled_density_map('delivery_tiles')
+    m.save('delivery_tiles_map.html')
+    print("Map saved as delivery_tiles_map.html (open it next to the delivery_tiles directory)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import json
+import queue
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Set
+
+
+def order_topic(order_id) -> str:
+    """Topic carrying status changes for one order"""
+    return f"order:{order_id}"
+
+
+def mfu_topic(mfu_id) -> str:
+    """Topic carrying position updates for one MFU, keyed by its database id"""
+    return f"mfu:{mfu_id}"
+
+
+def mfu_position_payload(mfu_id, lat: float, lng: float, status: str, load: int) -> Dict:
+    """Body of a 'position' event, the same whether the app or the delivery engine publishes it"""
+    return {'mfu_id': mfu_id, 'lat': lat, 'lng': lng, 'status': status, 'load': load}
+
+
+class Event:
+    """A published event, encoded once as a server-sent events frame"""
+
+    __slots__ = ('topic', 'event_type', 'data', 'encoded')
+
+    def __init__(self, topic: str, event_type: str, data: Dict):
+        self.topic = topic
+        self.event_type = event_type
+        self.data = data
+        self.encoded = format_sse(event_type, data)
+
+
+def format_sse(event_type: str, data: Dict) -> str:
+    """Format a payload as a text/event-stream frame"""
+    return f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
+
+
+class Subscription:
+    """Mailbox for a single subscriber, fed by one or more topics"""
+
+    def __init__(self, broker: 'OrderEventBroker', max_queue_size: int):
+        self.broker = broker
+        self.topics: Set[str] = set()
+        self.queue = queue.Queue(maxsize=max_queue_size)
+
+    def add_topic(self, topic: str):
+        """Start receiving events for another topic"""
+        self.broker._attach(self, topic)
+
+    def get(self, timeout: float = None) -> Optional[Event]:
+        """Block until the next event arrives; None on timeout"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def deliver(self, event: Event):
+        """Enqueue an event, dropping the oldest one if the subscriber lags"""
+        while True:
+            try:
+                self.queue.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def close(self):
+        """Detach from every topic"""
+        self.broker.unsubscribe(self)
+
+
+class OrderEventBroker:
+    """
+    In-process pub/sub fan-out for order tracking.
+
+    Subscribers block on their own queue, so an idle tracker costs a
+    parked thread (or greenlet under gevent/eventlet workers) and no
+    database work. Publishing encodes each event once and only touches
+    the subscribers of that topic.
+    """
+
+    def __init__(self, max_queue_size: int = 100):
+        self.max_queue_size = max_queue_size
+        self._subscribers: Dict[str, Set[Subscription]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, topics: Iterable[str]) -> Subscription:
+        """Create a subscription for the given topics"""
+        subscription = Subscription(self, self.max_queue_size)
+        for topic in topics:
+            self._attach(subscription, topic)
+        return subscription
+
+    def _attach(self, subscription: Subscription, topic: str):
+        with self._lock:
+            self._subscribers[topic].add(subscription)
+            subscription.topics.add(topic)
+
+    def unsubscribe(self, subscription: Subscription):
+        """Remove a subscription from all of its topics"""
+        with self._lock:
+            for topic in subscription.topics:
+                subscribers = self._subscribers.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[topic]
+            subscription.topics.clear()
+
+    def publish(self, topic: str, event_type: str, data: Dict) -> int:
+        """Fan an event out to the topic's subscribers; returns the number reached"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(topic, ()))
+        if not subscribers:
+            return 0
+
+        event = Event(topic, event_type, data)
+        for subscription in subscribers:
+            subscription.deliver(event)
+        return len(subscribers)
+
+    def subscriber_count(self, topic: str = None) -> int:
+        """Number of subscriptions on a topic, or across all topics"""
+        with self._lock:
+            if topic is not None:
+                return len(self._subscribers.get(topic, ()))
+            return len({s for subs in self._subscribers.values() for s in subs})
+
+
+# Shared broker used by the Flask app and any in-process delivery engine
+order_events = OrderEventBroker()
@@ -0,0 +1,220 @@
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+
+class Interner:
+    """Maps repeated strings (product ids, addresses) to dense int32 codes"""
+
+    __slots__ = ('values', '_codes')
+
+    def __init__(self):
+        self.values: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def codes(self, values: Iterable[str]) -> List[int]:
+        return [self.code(value) for value in values]
+
+    def __len__(self):
+        return len(self.values)
+
+
+def _timestamp(value: datetime) -> float:
+    return value.timestamp() if value else np.nan
+
+
+def _datetime(value: float) -> datetime:
+    return None if np.isnan(value) else datetime.fromtimestamp(value)
+
+
+class OrderView:
+    """
+    Read-only, slotted stand-in for delivery_engine.Order backed by an OrderStore row.
+
+    Exposes the same attribute names as Order, so the batching, routing and
+    fleet code accepts views wherever it accepts orders.
+    """
+
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store: 'OrderStore', index: int):
+        self.store = store
+        self.index = index
+
+    @property
+    def order_id(self) -> str:
+        return self.store.order_id(self.index)
+
+    @property
+    def customer_address(self) -> str:
+        return self.store.addresses.values[self.store.address_code[self.index]]
+
+    @property
+    def latitude(self) -> float:
+        return float(self.store.lat[self.index])
+
+    @property
+    def longitude(self) -> float:
+        return float(self.store.lng[self.index])
+
+    @property
+    def products(self) -> List[str]:
+        return self.store.products(self.index)
+
+    @property
+    def priority(self) -> int:
+        return int(self.store.priority[self.index])
+
+    @property
+    def order_time(self) -> datetime:
+        return _datetime(self.store.order_time[self.index])
+
+    @property
+    def delivery_deadline(self) -> datetime:
+        return _datetime(self.store.deadline[self.index])
+
+    def __repr__(self):
+        return f"OrderView({self.order_id!r}, lat={self.latitude:.5f}, lng={self.longitude:.5f})"
+
+
+class OrderSlice(Sequence):
+    """A list-like selection of OrderStore rows that holds only an index array"""
+
+    __slots__ = ('store', 'indices')
+
+    def __init__(self, store: 'OrderStore', indices: np.ndarray):
+        self.store = store
+        self.indices = np.asarray(indices, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return OrderSlice(self.store, self.indices[item])
+        return OrderView(self.store, int(self.indices[item]))
+
+    def copy(self) -> List[OrderView]:
+        return list(self)
+
+
+class OrderStore:
+    """
+    Columnar store of orders for large simulations.
+
+    One NumPy array per field instead of one Order object per order:
+    coordinates as float64, priority as int8, times as float64 epoch seconds
+    (NaN when unset), addresses and product ids interned to int32 codes with
+    products kept in CSR form (`product_offsets` into `product_codes`).
+    A million orders with three products each take ~50 MB rather than the
+    gigabyte-plus of the equivalent dataclass objects.
+    """
+
+    def __init__(self, lat: np.ndarray, lng: np.ndarray, priority: np.ndarray = None,
+                 order_time: np.ndarray = None, deadline: np.ndarray = None,
+                 product_offsets: np.ndarray = None, product_codes: np.ndarray = None,
+                 address_code: np.ndarray = None, order_ids: np.ndarray = None,
+                 products: Interner = None, addresses: Interner = None):
+        n = len(lat)
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lng = np.asarray(lng, dtype=np.float64)
+        self.priority = np.ones(n, dtype=np.int8) if priority is None else np.asarray(priority, dtype=np.int8)
+        self.order_time = np.full(n, np.nan) if order_time is None else np.asarray(order_time, dtype=np.float64)
+        self.deadline = np.full(n, np.nan) if deadline is None else np.asarray(deadline, dtype=np.float64)
+        self.product_offsets = (np.zeros(n + 1, dtype=np.int64) if product_offsets is None
+                                else np.asarray(product_offsets, dtype=np.int64))
+        self.product_codes = (np.empty(0, dtype=np.int32) if product_codes is None
+                              else np.asarray(product_codes, dtype=np.int32))
+        self.addresses = addresses or Interner()
+        self.address_code = (np.full(n, self.addresses.code(''), dtype=np.int32) if address_code is None
+                             else np.asarray(address_code, dtype=np.int32))
+        self.order_ids = order_ids  # fixed-width UTF-8 bytes array, or None for generated ORDER_<n> ids
+        self.product_vocab = products or Interner()
+
+    @classmethod
+    def from_orders(cls, orders: List) -> 'OrderStore':
+        """Pack delivery_engine.Order objects into columns"""
+        n = len(orders)
+        products, addresses = Interner(), Interner()
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        codes: List[int] = []
+        for i, order in enumerate(orders):
+            codes.extend(products.codes(order.products or ()))
+            offsets[i + 1] = len(codes)
+
+        return cls(
+            lat=np.fromiter((o.latitude for o in orders), dtype=np.float64, count=n),
+            lng=np.fromiter((o.longitude for o in orders), dtype=np.float64, count=n),
+            priority=np.fromiter((o.priority for o in orders), dtype=np.int8, count=n),
+            order_time=np.fromiter((_timestamp(o.order_time) for o in orders), dtype=np.float64, count=n),
+            deadline=np.fromiter((_timestamp(o.delivery_deadline) for o in orders), dtype=np.float64, count=n),
+            product_offsets=offsets,
+            product_codes=np.array(codes, dtype=np.int32),
+            address_code=np.fromiter((addresses.code(o.customer_address or '') for o in orders),
+                                     dtype=np.int32, count=n),
+            order_ids=np.array([o.order_id.encode() for o in orders], dtype=np.bytes_),
+            products=products,
+            addresses=addresses
+        )
+
+    @classmethod
+    def from_stream(cls, stream, start: datetime = None) -> 'OrderStore':
+        """Build a store from a discrete_event_simulation.OrderStream (minutes from `start`)"""
+        base = (start or datetime(2024, 1, 1)).timestamp()
+        return cls(stream.lat, stream.lng,
+                   order_time=base + stream.arrival * 60,
+                   deadline=base + stream.deadline * 60)
+
+    def __len__(self):
+        return len(self.lat)
+
+    def __getitem__(self, index: int) -> OrderView:
+        return OrderView(self, int(index))
+
+    def __iter__(self):
+        return iter(OrderSlice(self, np.arange(len(self))))
+
+    def order_id(self, index: int) -> str:
+        if self.order_ids is None:
+            return f"ORDER_{index + 1}"
+        return self.order_ids[index].decode()
+
+    def products(self, index: int) -> List[str]:
+        start, stop = self.product_offsets[index], self.product_offsets[index + 1]
+        vocab = self.product_vocab.values
+        return [vocab[code] for code in self.product_codes[start:stop]]
+
+    def select(self, indices: np.ndarray) -> OrderSlice:
+        return OrderSlice(self, indices)
+
+    def to_order(self, index: int):
+        """Materialise one row as a full delivery_engine.Order"""
+        from delivery_engine import Order
+
+        view = self[index]
+        return Order(
+            order_id=view.order_id,
+            customer_address=view.customer_address,
+            latitude=view.latitude,
+            longitude=view.longitude,
+            products=view.products,
+            priority=view.priority,
+            order_time=view.order_time,
+            delivery_deadline=view.delivery_deadline
+        )
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.lat, self.lng, self.priority, self.order_time, self.deadline,
+                  self.product_offsets, self.product_codes, self.address_code)
+        total = sum(a.nbytes for a in arrays)
+        return total + (self.order_ids.nbytes if self.order_ids is not None else 0)
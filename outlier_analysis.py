@@ -1,7 +1,8 @@
 import pandas as pd
+from dataset_io import load_order_products, read_dataset
 
 # --- Instacart Outlier Analysis ---
-order_products_prior = pd.read_csv('order_products__prior.csv')
+order_products_prior = load_order_products('prior', columns=['add_to_cart_order'])
 
 # Outlier detection for add_to_cart_order using IQR rule
 q1 = order_products_prior['add_to_cart_order'].quantile(0.25)
@@ -19,7 +20,7 @@ print(f'- Method: IQR rule (values < {lower_bound:.2f} or > {upper_bound:.2f})')
 print(f'- Outliers in add_to_cart_order: {num_outliers} / {total} ({percent_outliers:.2f}%)')
 
 # --- M5 Walmart Outlier Analysis ---
-train_full = pd.read_csv('train_full.csv')
+train_full = read_dataset('train_full', columns=['Weekly_Sales'])
 
 # Outlier detection for Weekly_Sales using IQR rule
 q1 = train_full['Weekly_Sales'].quantile(0.25)
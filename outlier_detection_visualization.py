@@ -1,9 +1,10 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
+from dataset_io import load_order_products, read_dataset
 
 # --- Instacart Outlier Visualization ---
-order_products_prior = pd.read_csv('order_products__prior.csv')
+order_products_prior = load_order_products('prior', columns=['add_to_cart_order'])
 
 plt.figure(figsize=(10, 4))
 sns.boxplot(x=order_products_prior['add_to_cart_order'])
@@ -18,7 +19,7 @@ plt.savefig('instacart_add_to_cart_order_hist.png')
 plt.close()
 
 # --- M5 Walmart Outlier Visualization ---
-train_full = pd.read_csv('train_full.csv')
+train_full = read_dataset('train_full', columns=['Weekly_Sales'])
 
 plt.figure(figsize=(10, 4))
 sns.boxplot(x=train_full['Weekly_Sales'])
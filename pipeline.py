@@ -0,0 +1,329 @@
+"""
+Declarative runner for the data pipeline.
+
+Every ETL/modelling script is declared as a Step with the datasets it
+reads and the files it writes; the dependency graph follows from matching
+outputs to inputs. A step's key hashes its script, the local modules the
+script imports (e.g. dataset_io) and the content of its inputs. Steps
+whose key matches the last successful run, and whose outputs are still
+as that run left them, are skipped. A step that reruns but writes
+identical outputs does not invalidate its dependents.
+
+Ready steps run in parallel, each as its own Python process with the
+data directory as working directory. File hashes are memoised on
+(size, mtime), so an up-to-date rebuild only stats files. State and
+per-step logs live in <data-dir>/.pipeline/.
+
+Examples:
+
+    python pipeline.py                                  # rebuild whatever is out of date
+    python pipeline.py feature_engineering_demand -j 4  # one target and its upstream steps
+    python pipeline.py --dry-run
+    python pipeline.py --force data_cleaning --data-dir data
+"""
+import argparse
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+
+from dataset_io import dataset_path
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_DIR = '.pipeline'
+
+RAW_INSTACART = ['orders', 'order_products__prior', 'order_products__train', 'products', 'aisles', 'departments']
+RAW_M5 = ['train', 'test', 'features', 'stores']
+
+
+@dataclass
+class Step:
+    """One script with its declared inputs and outputs (dataset names or file paths)"""
+    name: str
+    script: str
+    inputs: List[str] = field(default_factory=list)
+    outputs: List[str] = field(default_factory=list)
+
+
+PIPELINE = [
+    Step('data_cleaning', 'data_cleaning.py', RAW_INSTACART + RAW_M5,
+         ['orders_cleaned', 'products_full', 'train_full', 'test_full']),
+    Step('instacart_zone_assignment', 'instacart_zone_assignment.py', ['orders'], ['orders_with_zones']),
+    Step('aggregate_zone_time_demand', 'aggregate_zone_time_demand.py', ['orders_with_zones'],
+         ['zone_hour_order_counts', 'zone_dow_order_counts', 'orders_by_zone_hour.png', 'orders_by_zone_dow.png']),
+    Step('feature_engineering_demand', 'feature_engineering_demand.py',
+         ['zone_hour_order_counts', 'zone_dow_order_counts'], ['zone_hour_features', 'zone_dow_features']),
+    Step('encoding', 'encoding.py', ['orders_features', 'products_features', 'train_features'],
+         ['orders_encoded', 'products_encoded', 'orders_onehot', 'products_onehot', 'train_encoded', 'train_onehot']),
+    Step('advanced_eda', 'advanced_eda.py',
+         ['orders_encoded', 'products_encoded', 'order_products__prior', 'train_encoded'], ['advanced_eda_report.md']),
+    Step('outlier_analysis', 'outlier_analysis.py', ['order_products__prior', 'train_full']),
+    Step('outlier_detection_visualization', 'outlier_detection_visualization.py',
+         ['order_products__prior', 'train_full'],
+         ['instacart_add_to_cart_order_boxplot.png', 'instacart_add_to_cart_order_hist.png',
+          'm5_weekly_sales_boxplot.png', 'm5_weekly_sales_hist.png', 'outlier_detection.md']),
+    # Derives the cycle feature while streaming orders_enriched_for_ml (add_cycle_feature_to_enriched_orders)
+    Step('prepare_training_data_for_product_forecasting', 'prepare_training_data_for_product_forecasting.py',
+         ['orders_enriched_for_ml'], ['product_demand_training_data_with_cycle']),
+    Step('baseline_demand_forecasting', 'baseline_demand_forecasting.py',
+         ['zone_hour_train.csv', 'zone_hour_test.csv', 'zone_dow_train.csv', 'zone_dow_test.csv'],
+         ['baseline_hourly_results.csv', 'baseline_dow_results.csv']),
+    Step('mape_baseline_eval', 'mape_baseline_eval.py',
+         ['zone_hour_train.csv', 'zone_hour_test.csv', 'zone_dow_train.csv', 'zone_dow_test.csv',
+          'baseline_hourly_results.csv', 'baseline_dow_results.csv'])
+]
+
+
+class HashCache:
+    """SHA-256 of files, memoised on (size, mtime_ns) across runs"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, list] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.entries = json.load(f)
+
+    def file(self, path: str) -> str:
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        entry = self.entries.get(key)
+        if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            return entry[2]
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        self.entries[key] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def save(self):
+        with open(self.path, 'w') as f:
+            json.dump(self.entries, f)
+
+
+def resolve(name: str) -> Optional[str]:
+    """File behind a declared input/output: a plain path or a dataset name"""
+    return name if os.path.isfile(name) else dataset_path(name)
+
+
+def local_modules(script: str) -> List[str]:
+    """The script plus every repository module it imports, transitively"""
+    seen, queue = [], [os.path.join(REPO_DIR, script)]
+    while queue:
+        path = queue.pop()
+        if path in seen:
+            continue
+        seen.append(path)
+        with open(path) as f:
+            tree = ast.parse(f.read(), path)
+        for node in ast.walk(tree):
+            names = [alias.name for alias in node.names] if isinstance(node, ast.Import) else \
+                [node.module] if isinstance(node, ast.ImportFrom) and node.module and not node.level else []
+            for module in names:
+                candidate = os.path.join(REPO_DIR, *module.split('.')) + '.py'
+                if os.path.exists(candidate):
+                    queue.append(candidate)
+    return sorted(seen)
+
+
+class PipelineRunner:
+    """
+    Plans and runs PIPELINE (or any list of Steps) in `data_dir`, skipping
+    steps whose code and inputs have not changed since their last success.
+    """
+
+    def __init__(self, steps: List[Step] = None, data_dir: str = '.', jobs: int = None):
+        self.steps = {step.name: step for step in (steps or PIPELINE)}
+        self.data_dir = os.path.abspath(data_dir)
+        self.jobs = jobs or os.cpu_count() or 1
+        self.state_dir = os.path.join(self.data_dir, STATE_DIR)
+        os.makedirs(os.path.join(self.state_dir, 'logs'), exist_ok=True)
+        self.state_path = os.path.join(self.state_dir, 'state.json')
+        self.state: Dict[str, Dict] = {}
+        if os.path.exists(self.state_path):
+            with open(self.state_path) as f:
+                self.state = json.load(f)
+        self.hashes = HashCache(os.path.join(self.state_dir, 'hashes.json'))
+
+        self.producers: Dict[str, str] = {}
+        for step in self.steps.values():
+            for output in step.outputs:
+                if output in self.producers:
+                    raise ValueError(f"{output} is produced by both {self.producers[output]} and {step.name}")
+                self.producers[output] = step.name
+        self.upstream = {name: {self.producers[i] for i in step.inputs if i in self.producers}
+                         for name, step in self.steps.items()}
+        self._check_acyclic()
+
+    def _check_acyclic(self):
+        visiting, done = set(), set()
+
+        def visit(name, path):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Pipeline cycle: {' -> '.join(path + [name])}")
+            visiting.add(name)
+            for parent in self.upstream[name]:
+                visit(parent, path + [name])
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.steps:
+            visit(name, [])
+
+    def select(self, targets: List[str] = None) -> Set[str]:
+        """Targets plus everything upstream of them (all steps by default)"""
+        if not targets:
+            return set(self.steps)
+        unknown = [t for t in targets if t not in self.steps]
+        if unknown:
+            raise ValueError(f"Unknown steps: {', '.join(unknown)}")
+        selected, queue = set(), list(targets)
+        while queue:
+            name = queue.pop()
+            if name not in selected:
+                selected.add(name)
+                queue.extend(self.upstream[name])
+        return selected
+
+    def _key(self, step: Step) -> Optional[str]:
+        """Hash of code and inputs, or None if an input is missing"""
+        digest = hashlib.sha256(step.name.encode())
+        for module in local_modules(step.script):
+            digest.update(os.path.relpath(module, REPO_DIR).encode())
+            digest.update(self.hashes.file(module).encode())
+        for name in step.inputs:
+            path = resolve(name)
+            if path is None:
+                return None
+            digest.update(f"{name}={self.hashes.file(path)}".encode())
+        return digest.hexdigest()
+
+    def _output_hashes(self, step: Step) -> Optional[Dict[str, str]]:
+        hashes = {}
+        for name in step.outputs:
+            path = resolve(name)
+            if path is None:
+                return None
+            hashes[name] = self.hashes.file(path)
+        return hashes
+
+    def _up_to_date(self, step: Step, key: str) -> bool:
+        previous = self.state.get(step.name)
+        return bool(previous) and previous['key'] == key and previous['outputs'] == self._output_hashes(step)
+
+    def _launch(self, step: Step) -> subprocess.CompletedProcess:
+        env = dict(os.environ, MPLBACKEND='Agg',
+                   PYTHONPATH=os.pathsep.join(filter(None, [REPO_DIR, os.environ.get('PYTHONPATH')])))
+        with open(os.path.join(self.state_dir, 'logs', f"{step.name}.log"), 'w') as log:
+            return subprocess.run([sys.executable, os.path.join(REPO_DIR, step.script)], cwd=self.data_dir,
+                                  env=env, stdout=log, stderr=subprocess.STDOUT)
+
+    def _save_state(self):
+        with open(self.state_path, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        self.hashes.save()
+
+    def run(self, targets: List[str] = None, force: List[str] = (), dry_run: bool = False) -> Dict[str, str]:
+        """
+        Run the selected steps in dependency order; returns each step's
+        status: 'fresh', 'ran', 'stale' (dry run), 'missing input',
+        'failed' or 'blocked'
+        """
+        selected = self.select(targets)
+        status: Dict[str, str] = {}
+        running = {}
+        cwd = os.getcwd()
+        os.chdir(self.data_dir)  # Inputs and outputs resolve relative to the data directory
+        try:
+            with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+                while len(status) < len(selected):
+                    in_flight = {step.name for step, _, _ in running.values()}
+                    for name in sorted(selected - set(status) - in_flight):
+                        parents = self.upstream[name] & selected
+                        if any(status.get(p) in ('failed', 'blocked', 'missing input') for p in parents):
+                            status[name] = 'blocked'
+                            print(f"[blocked] {name}")
+                        elif any(status.get(p) == 'stale' for p in parents):
+                            status[name] = 'stale'
+                            print(f"[stale]   {name} (upstream changes)")
+                        elif all(p in status for p in parents):
+                            self._start(self.steps[name], name in force, dry_run, pool, running, status)
+                    if running:
+                        finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            self._finish(running.pop(future), future.result(), status)
+        finally:
+            os.chdir(cwd)
+            self._save_state()
+        return status
+
+    def _start(self, step: Step, forced: bool, dry_run: bool, pool, running: Dict, status: Dict[str, str]):
+        key = self._key(step)
+        if key is None:
+            missing = [name for name in step.inputs if resolve(name) is None]
+            status[step.name] = 'missing input'
+            print(f"[missing] {step.name}: no {', '.join(missing)}")
+        elif not forced and self._up_to_date(step, key):
+            status[step.name] = 'fresh'
+            print(f"[fresh]   {step.name}")
+        elif dry_run:
+            status[step.name] = 'stale'
+            print(f"[stale]   {step.name}")
+        else:
+            print(f"[run]     {step.name}")
+            future = pool.submit(self._launch, step)
+            running[future] = (step, key, time.perf_counter())
+
+    def _finish(self, launched, result: subprocess.CompletedProcess, status: Dict[str, str]):
+        step, key, started = launched
+        elapsed = time.perf_counter() - started
+        outputs = self._output_hashes(step) if result.returncode == 0 else None
+        if outputs is None:
+            status[step.name] = 'failed'
+            reason = f"exit code {result.returncode}" if result.returncode else "declared outputs missing"
+            print(f"[failed]  {step.name} ({reason}; see {STATE_DIR}/logs/{step.name}.log)")
+            return
+        status[step.name] = 'ran'
+        self.state[step.name] = {'key': key, 'outputs': outputs, 'seconds': round(elapsed, 2)}
+        self._save_state()
+        print(f"[done]    {step.name} in {elapsed:.1f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the data pipeline, skipping up-to-date steps')
+    parser.add_argument('targets', nargs='*', help='Steps to build (default: all)')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='Parallel steps (default: CPU count)')
+    parser.add_argument('--data-dir', default='.', help='Directory holding the datasets')
+    parser.add_argument('--force', nargs='+', default=[], help='Rerun these steps even if up to date')
+    parser.add_argument('--dry-run', action='store_true', help='Only report which steps are stale')
+    parser.add_argument('--list', action='store_true', help='List the declared steps')
+    args = parser.parse_args(argv)
+
+    runner = PipelineRunner(data_dir=args.data_dir, jobs=args.jobs)
+    if args.list:
+        for step in runner.steps.values():
+            after = ', '.join(sorted(runner.upstream[step.name])) or '-'
+            print(f"{step.name:<48} after: {after}")
+        return 0
+
+    started = time.perf_counter()
+    status = runner.run(args.targets, force=args.force, dry_run=args.dry_run)
+    counts = {}
+    for value in status.values():
+        counts[value] = counts.get(value, 0) + 1
+    print(f"\nPipeline finished in {time.perf_counter() - started:.1f}s: "
+          + ', '.join(f"{count} {value}" for value, count in sorted(counts.items())))
+    return 1 if counts.get('failed') else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
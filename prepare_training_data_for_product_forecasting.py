@@ -1,23 +1,32 @@
 import pandas as pd
-from collections import defaultdict
+from add_cycle_feature_to_enriched_orders import stream_enriched_orders
+from dataset_io import write_dataset
 
 # Aggregation columns (use 'cycle' instead of 'hour')
 agg_cols = ['custom_category', 'product_id', 'product_name', 'cycle', 'day_of_week', 'season', 'is_holiday']
 
-# Use a dictionary to accumulate counts
-agg_dict = defaultdict(int)
+# Partial counts per chunk, combined every few chunks to bound memory
+partials = []
+combine_every = 16
 
-chunk_size = 100_000
-for chunk in pd.read_csv('orders_enriched_with_cycle.csv', chunksize=chunk_size):
-    grouped = chunk.groupby(agg_cols).size()
-    for idx, count in grouped.items():
-        agg_dict[idx] += count
+def combine(counts, sort=False):
+    return pd.concat(counts).groupby(level=list(range(len(agg_cols))), observed=True, sort=sort).sum()
+
+# Single pass over the enriched orders: cycle is derived while streaming and
+# only the aggregation columns (plus 'hour') are decoded
+rows = 0
+for chunk in stream_enriched_orders('orders_enriched_for_ml', columns=agg_cols):
+    partials.append(chunk.groupby(agg_cols, observed=True, sort=False).size())
+    rows += len(chunk)
+    if len(partials) >= combine_every:
+        partials = [combine(partials)]
 
 # Convert to DataFrame
-rows = [list(idx) + [count] for idx, count in agg_dict.items()]
-train_data = pd.DataFrame(rows, columns=agg_cols + ['sales_count'])
+# Partials are unsorted; sort once on the final combine
+counts = combine(partials, sort=True) if partials else pd.Series(dtype='int64')
+train_data = counts.rename('sales_count').reset_index() if len(counts) else pd.DataFrame(columns=agg_cols + ['sales_count'])
 
 # Save for ML model training
-train_data.to_csv('product_demand_training_data_with_cycle.csv', index=False)
+path = write_dataset(train_data, 'product_demand_training_data_with_cycle')
 
-print('Aggregated training data saved as product_demand_training_data_with_cycle.csv (by cycle, chunked)') 
\ No newline at end of file
+print(f'Aggregated {rows:,} orders into {len(train_data):,} rows; training data saved as {path} (by cycle, streamed)')
\ No newline at end of file
@@ -0,0 +1,329 @@
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from delivery_engine import MFU, GoogleMapsAPI, MFUFleetManager, Order
+from delivery_simulation_engine import nearest_location
+from vrp_solver import DEFAULT_SERVICE_MINUTES, CVRPTWSolver, VRPProblem, VRPSolution
+
+
+class _Vehicle:
+    """Live plan of one MFU: the stop it is driving to and the stops after it"""
+
+    __slots__ = ('mfu', 'plan', 'leg_target', 'leg_origin', 'leg_minutes', 'leg_elapsed')
+
+    def __init__(self, mfu: MFU):
+        self.mfu = mfu
+        self.plan: List[str] = []          # order ids after the current leg
+        self.leg_target: Optional[str] = None
+        self.leg_origin = (mfu.current_lat, mfu.current_lng)
+        self.leg_minutes = 0.0             # travel + service of the current leg
+        self.leg_elapsed = 0.0
+
+    @property
+    def load(self) -> int:
+        return len(self.plan) + (self.leg_target is not None)
+
+
+class RollingHorizonPlanner:
+    """
+    Re-plans live MFU routes every cycle instead of solving once.
+
+    Each `step(now)` first moves every MFU along its current leg by the
+    elapsed time (interpolating its position and marking reached orders as
+    delivered), then re-optimizes. The stop an MFU is already driving to is
+    frozen; everything after it is open for change. Work per cycle is
+    bounded by `cycle_budget` seconds and by solving small regions rather
+    than the whole fleet: new orders are inserted into the `region_size`
+    MFUs nearest to them, warm-started from those MFUs' current plans, and
+    leftover time improves one more region in round-robin order. Orders
+    that do not fit in a cycle's budget wait in the queue for the next one.
+
+    The planned MFUs follow `fleet_manager.mfus` every cycle: MFUs added to
+    the fleet join the plan, and the orders of MFUs removed from it go back
+    to the queue.
+    """
+
+    def __init__(self, fleet_manager: MFUFleetManager, google_maps: GoogleMapsAPI = None,
+                 cycle_budget: float = 0.5, region_size: int = 8, max_new_per_region: int = 24,
+                 service_minutes: float = DEFAULT_SERVICE_MINUTES, seed: int = 0):
+        self.fleet_manager = fleet_manager
+        self.google_maps = google_maps or fleet_manager.google_maps
+        self.cycle_budget = cycle_budget
+        self.region_size = region_size
+        self.max_new_per_region = max_new_per_region
+        self.service_minutes = service_minutes
+        self.seed = seed
+
+        self.vehicles: List[_Vehicle] = []
+        self.orders: Dict[str, Order] = {}
+        self.queue: List[str] = []
+        self.delivered: Dict[str, datetime] = {}
+        self.clock: Optional[datetime] = None
+        self._cursor = 0
+        self._cycle = 0
+        self._sync_vehicles()
+
+    def add_orders(self, orders: List[Order]):
+        """Queue newly arrived orders for the next cycle"""
+        for order in orders:
+            self.orders[order.order_id] = order
+            self.queue.append(order.order_id)
+
+    def _sync_vehicles(self):
+        """Track MFUs added to or removed from the fleet, re-queueing the orders of removed ones"""
+        fleet = self.fleet_manager.mfus
+        kept, orphaned = [], []
+        for vehicle in self.vehicles:
+            if fleet.get(vehicle.mfu.mfu_id) is vehicle.mfu:
+                kept.append(vehicle)
+            else:
+                # The stop it was driving to was not reached, so it goes back in the queue too
+                if vehicle.leg_target is not None:
+                    orphaned.append(vehicle.leg_target)
+                orphaned.extend(vehicle.plan)
+        tracked = {id(vehicle.mfu) for vehicle in kept}
+        kept.extend(_Vehicle(mfu) for mfu in fleet.values() if id(mfu) not in tracked)
+        self.vehicles = kept
+        self.queue = orphaned + self.queue
+
+    # --- Movement ---
+    def _leg_minutes(self, origins: List, targets: List) -> np.ndarray:
+        """Travel minutes of paired legs, one matrix call per batch"""
+        _, minutes = self.google_maps.travel_matrix(origins, targets, self.clock)
+        return np.diagonal(minutes)
+
+    def _advance(self, minutes: float):
+        """Move every MFU `minutes` forward along its plan"""
+        remaining = np.full(len(self.vehicles), minutes)
+        active = list(range(len(self.vehicles)))
+        while active:
+            starting = [k for k in active if self.vehicles[k].leg_target is None and self.vehicles[k].plan]
+            if starting:
+                origins = [(self.vehicles[k].mfu.current_lat, self.vehicles[k].mfu.current_lng) for k in starting]
+                targets = []
+                for k in starting:
+                    vehicle = self.vehicles[k]
+                    vehicle.leg_target = vehicle.plan.pop(0)
+                    vehicle.leg_origin = origins[len(targets)]
+                    vehicle.leg_elapsed = 0.0
+                    order = self.orders[vehicle.leg_target]
+                    targets.append((order.latitude, order.longitude))
+                for k, travel in zip(starting, self._leg_minutes(origins, targets)):
+                    self.vehicles[k].leg_minutes = float(travel) + self.service_minutes
+
+            still_moving = []
+            for k in active:
+                vehicle = self.vehicles[k]
+                if vehicle.leg_target is None:
+                    continue
+                step = min(remaining[k], vehicle.leg_minutes - vehicle.leg_elapsed)
+                vehicle.leg_elapsed += step
+                remaining[k] -= step
+                self._place(vehicle)
+                if vehicle.leg_elapsed >= vehicle.leg_minutes - 1e-9:
+                    arrived = self.clock - timedelta(minutes=float(remaining[k]))
+                    self.delivered[vehicle.leg_target] = arrived
+                    vehicle.leg_target = None
+                    vehicle.mfu.current_load = vehicle.load
+                    if remaining[k] > 1e-9 and vehicle.plan:
+                        still_moving.append(k)
+            active = still_moving
+
+    def _place(self, vehicle: _Vehicle):
+        """Interpolate the MFU position along its leg (it waits at the stop during service)"""
+        order = self.orders[vehicle.leg_target]
+        travel = vehicle.leg_minutes - self.service_minutes
+        fraction = min(vehicle.leg_elapsed / travel, 1.0) if travel > 0 else 1.0
+        mfu = vehicle.mfu
+        mfu.current_lat = vehicle.leg_origin[0] + (order.latitude - vehicle.leg_origin[0]) * fraction
+        mfu.current_lng = vehicle.leg_origin[1] + (order.longitude - vehicle.leg_origin[1]) * fraction
+
+    # --- Re-optimization ---
+    def _positions(self) -> np.ndarray:
+        return np.array([(v.mfu.current_lat, v.mfu.current_lng) for v in self.vehicles], dtype=np.float64)
+
+    def _nearest_vehicles(self, point, positions: np.ndarray, k: int) -> np.ndarray:
+        distances = self.google_maps._haversine_distances(point, positions[:, 0], positions[:, 1])
+        k = min(k, len(distances))
+        nearest = np.argpartition(distances, k - 1)[:k]
+        return nearest[np.argsort(distances[nearest])]
+
+    def _solve_region(self, region: List[int], new_orders: List[str], budget: float) -> List[str]:
+        """Re-plan the MFUs in `region` with extra orders; return the orders left over"""
+        vehicles = [self.vehicles[k] for k in region]
+        order_ids = [order_id for vehicle in vehicles for order_id in vehicle.plan] + list(new_orders)
+        if not order_ids:
+            return []
+        n_depots = len(vehicles)
+        node_of = {order_id: n_depots + i for i, order_id in enumerate(order_ids)}
+
+        # An MFU mid-leg is planned from the stop it is driving to, once it has served it
+        anchors, depot_ready = [], []
+        for vehicle in vehicles:
+            if vehicle.leg_target is not None:
+                order = self.orders[vehicle.leg_target]
+                anchors.append((order.latitude, order.longitude))
+                depot_ready.append(vehicle.leg_minutes - vehicle.leg_elapsed)
+            else:
+                anchors.append((vehicle.mfu.current_lat, vehicle.mfu.current_lng))
+                depot_ready.append(0.0)
+
+        orders = [self.orders[order_id] for order_id in order_ids]
+        points = anchors + [(order.latitude, order.longitude) for order in orders]
+        km, minutes = self.google_maps.travel_matrix(points, points, self.clock)
+
+        ready = np.zeros(len(points))
+        due = np.full(len(points), np.inf)
+        ready[:n_depots] = depot_ready
+        for i, order in enumerate(orders):
+            if order.order_time:
+                ready[n_depots + i] = max((order.order_time - self.clock).total_seconds() / 60, 0.0)
+            if order.delivery_deadline:
+                due[n_depots + i] = (order.delivery_deadline - self.clock).total_seconds() / 60
+        # Orders no MFU can reach in time are still delivered, as late as needed
+        earliest = (ready[:n_depots, None] + minutes[:n_depots, n_depots:]).min(axis=0)
+        due[n_depots:] = np.where(earliest > due[n_depots:], np.inf, due[n_depots:])
+        service = np.full(len(points), self.service_minutes)
+        service[:n_depots] = 0.0
+
+        problem = VRPProblem(
+            travel_time=minutes,
+            distance=km,
+            depots=list(range(n_depots)),
+            capacities=[max(vehicle.mfu.capacity - (vehicle.leg_target is not None), 0) for vehicle in vehicles],
+            demand=np.r_[np.zeros(n_depots), np.ones(len(order_ids))],
+            ready=ready,
+            due=due,
+            service=service,
+            customers=list(range(n_depots, len(points))),
+            open_routes=True
+        )
+        initial = VRPSolution(
+            routes=[[node_of[order_id] for order_id in vehicle.plan] for vehicle in vehicles],
+            unassigned=[node_of[order_id] for order_id in new_orders],
+            cost=0.0, distance=0.0, lateness=0.0
+        )
+        solution = CVRPTWSolver(problem, time_budget=budget, seed=self.seed + self._cycle).solve(initial)
+
+        for vehicle, nodes in zip(vehicles, solution.routes):
+            vehicle.plan = [order_ids[node - n_depots] for node in nodes]
+            vehicle.mfu.current_load = vehicle.load
+        return [order_ids[node - n_depots] for node in solution.unassigned]
+
+    def step(self, now: datetime) -> Dict:
+        """Advance the fleet to `now` and re-plan within the cycle budget"""
+        started = time.perf_counter()
+        deadline = started + self.cycle_budget
+        self._sync_vehicles()
+        if self.clock is not None and now > self.clock:
+            elapsed = (now - self.clock).total_seconds() / 60
+            self.clock = now
+            self._advance(elapsed)
+        self.clock = now
+        self._cycle += 1
+        delivered_before = len(self.delivered)
+
+        positions = self._positions()
+        region_budget = self.cycle_budget / 4
+        insert_budget = self.cycle_budget / 20  # Mostly warm-start insertion, a few search iterations
+        dispatched = 0
+        deferred = []
+
+        # Insert new orders region by region until the budget runs out
+        if self.queue and self.vehicles:
+            queued = [self.orders[order_id] for order_id in self.queue]
+            nearest, _ = nearest_location(np.array([order.latitude for order in queued]),
+                                          np.array([order.longitude for order in queued]), positions)
+            owner = dict(zip(self.queue, nearest.tolist()))
+        while self.queue and self.vehicles and time.perf_counter() < deadline - insert_budget:
+            seed = self.orders[self.queue[0]]
+            region = self._nearest_vehicles((seed.latitude, seed.longitude), positions, self.region_size)
+            members = set(region.tolist())
+            batch, rest = [], []
+            for order_id in self.queue:
+                if len(batch) < self.max_new_per_region and owner[order_id] in members:
+                    batch.append(order_id)
+                else:
+                    rest.append(order_id)
+            if not batch:
+                batch, rest = [self.queue[0]], self.queue[1:]
+            self.queue = rest
+            budget = min(insert_budget, max(deadline - time.perf_counter(), 0.0))
+            leftover = self._solve_region(region.tolist(), batch, budget)
+            dispatched += len(batch) - len(leftover)
+            deferred.extend(leftover)
+        self.queue = deferred + self.queue
+
+        # Spend what is left improving one region around the next MFU in turn
+        remaining = deadline - time.perf_counter()
+        if remaining > region_budget / 2 and self.vehicles:
+            anchor = self._cursor % len(self.vehicles)
+            self._cursor += 1
+            region = self._nearest_vehicles(tuple(positions[anchor]), positions, self.region_size)
+            leftover = self._solve_region(region.tolist(), [], min(region_budget, remaining))
+            self.queue = leftover + self.queue
+
+        for vehicle in self.vehicles:
+            self.fleet_manager._publish_position(vehicle.mfu)
+
+        return {
+            'time': now,
+            'compute_seconds': time.perf_counter() - started,
+            'dispatched': dispatched,
+            'queued': len(self.queue),
+            'delivered': len(self.delivered) - delivered_before,
+            'planned': sum(vehicle.load for vehicle in self.vehicles)
+        }
+
+    def late_deliveries(self) -> int:
+        return sum(1 for order_id, at in self.delivered.items()
+                   if self.orders[order_id].delivery_deadline and at > self.orders[order_id].delivery_deadline)
+
+
+def main():
+    """Re-plan a 300-MFU fleet at 1 Hz against a stream of incoming orders"""
+    print("=== Rolling-Horizon MFU Re-planning ===")
+    rng = np.random.default_rng(7)
+    center = (40.7400, -73.9900)
+
+    fleet_manager = MFUFleetManager(GoogleMapsAPI())
+    for i in range(300):
+        fleet_manager.add_mfu(MFU(
+            mfu_id=f"MFU_{i+1}",
+            current_lat=center[0] + rng.normal(0, 0.04),
+            current_lng=center[1] + rng.normal(0, 0.04),
+            capacity=20
+        ))
+    planner = RollingHorizonPlanner(fleet_manager, cycle_budget=0.5)
+
+    # Each 1 Hz cycle advances the simulated clock by 10 s
+    clock = datetime(2024, 1, 3, 17, 0)
+    cycles, orders_per_cycle = 120, 25
+    compute = []
+    for cycle in range(cycles):
+        arrivals = rng.poisson(orders_per_cycle if cycle else 600)
+        planner.add_orders([
+            Order(order_id=f"ORDER_{cycle}_{k}", customer_address="",
+                  latitude=center[0] + rng.normal(0, 0.04), longitude=center[1] + rng.normal(0, 0.04),
+                  products=[], order_time=clock, delivery_deadline=clock + timedelta(minutes=45))
+            for k in range(arrivals)
+        ])
+        stats = planner.step(clock)
+        compute.append(stats['compute_seconds'])
+        if cycle % 20 == 0:
+            print(f"cycle {cycle:>3}: dispatched {stats['dispatched']:>3}, queued {stats['queued']:>3}, "
+                  f"planned {stats['planned']:>4}, compute {stats['compute_seconds'] * 1000:.0f} ms")
+        clock += timedelta(seconds=10)
+
+    compute = np.array(compute) * 1000
+    print(f"\nCycle compute: p50 {np.percentile(compute, 50):.0f} ms, p95 {np.percentile(compute, 95):.0f} ms, "
+          f"max {compute.max():.0f} ms")
+    print(f"Delivered {len(planner.delivered)} orders ({planner.late_deliveries()} late), "
+          f"{len(planner.queue)} still queued")
+
+
+if __name__ == "__main__":
+    main()
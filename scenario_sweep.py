@@ -0,0 +1,209 @@
+import contextlib
+import io
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Named depot layouts: (warehouse_locations, mfu_locations)
+DEPOT_SETS = {
+    'manhattan_2w_3m': (
+        [(40.7128, -74.0060), (40.7505, -73.9934)],
+        [(40.7128, -74.0060), (40.7505, -73.9934), (40.7589, -73.9851)]
+    ),
+    'manhattan_3w_5m': (
+        [(40.7128, -74.0060), (40.7505, -73.9934), (40.7831, -73.9712)],
+        [(40.7128, -74.0060), (40.7505, -73.9934), (40.7589, -73.9851),
+         (40.7831, -73.9712), (40.7282, -73.9942)]
+    )
+}
+
+# Named cost scenarios: per-model overrides of DeliverySimulationEngine.cost_params
+COST_SCENARIOS = {
+    'base': {},
+    'high_fuel': {
+        'traditional': {'fuel_cost_per_km': 0.25},
+        'mfu': {'fuel_cost_per_km': 0.32}
+    },
+    'high_labor': {
+        'traditional': {'rider_hourly_cost': 32},
+        'mfu': {'mfu_hourly_cost': 52}
+    }
+}
+
+DEFAULT_GRID = {
+    'depot_set': list(DEPOT_SETS),
+    'riders_per_warehouse': [5, 10, 20],
+    'mfus_per_location': [1, 2, 3],
+    'speed_kmh': [20, 25, 30],
+    'demand_multiplier': [0.5, 1.0, 2.0],
+    'cost_scenario': list(COST_SCENARIOS)
+}
+
+SCENARIO_KEYS = list(DEFAULT_GRID)
+
+
+def build_scenarios(grid: Dict[str, List] = None, seeds: int = 10, base_orders: int = 200) -> List[Dict]:
+    """Cartesian product of the grid, repeated over `seeds` random seeds"""
+    grid = grid or DEFAULT_GRID
+    keys = list(grid)
+    scenarios = []
+    for values in itertools.product(*(grid[k] for k in keys)):
+        for seed in range(seeds):
+            scenario = dict(zip(keys, values))
+            scenario['seed'] = seed
+            scenario['orders'] = max(1, int(round(base_orders * scenario.get('demand_multiplier', 1.0))))
+            scenarios.append(scenario)
+    return scenarios
+
+
+def synthetic_orders(n_orders: int, seed: int, center: Tuple[float, float] = (40.7400, -73.9900),
+                     radius_km: float = 5.0) -> List:
+    """Seeded delivery_engine.Order objects for one scenario run"""
+    from delivery_engine import Order
+    from discrete_event_simulation import generate_order_stream
+
+    stream = generate_order_stream(n_orders, center=center, radius_km=radius_km, seed=seed)
+    start = datetime(2024, 1, 1)
+    return [
+        Order(
+            order_id=f"ORDER_{i+1}",
+            customer_address="",
+            latitude=float(lat),
+            longitude=float(lng),
+            products=[],
+            priority=1,
+            order_time=start + timedelta(minutes=float(arrival)),
+            delivery_deadline=start + timedelta(minutes=float(deadline))
+        )
+        for i, (lat, lng, arrival, deadline) in enumerate(
+            zip(stream.lat, stream.lng, stream.arrival, stream.deadline))
+    ]
+
+
+def _flatten(prefix: str, values: Dict, row: Dict):
+    for key, value in values.items():
+        if isinstance(value, (int, float, np.number)):
+            row[f"{prefix}{key}"] = float(value)
+
+
+def run_scenario(scenario: Dict) -> Dict:
+    """Run one traditional-vs-MFU comparison and return a flat result row"""
+    from delivery_simulation_engine import DeliverySimulationEngine
+
+    started = time.perf_counter()
+    warehouse_locations, mfu_locations = DEPOT_SETS[scenario['depot_set']]
+    # MFU_<n> is registered per listed location, so repeating a location stations several MFUs there
+    mfu_locations = [location for location in mfu_locations
+                     for _ in range(scenario.get('mfus_per_location', 1))]
+    orders = synthetic_orders(scenario['orders'], scenario['seed'])
+
+    simulation = DeliverySimulationEngine()
+    for model, overrides in COST_SCENARIOS[scenario['cost_scenario']].items():
+        simulation.cost_params[model].update(overrides)
+
+    # The engines narrate every step; keep worker output quiet
+    with contextlib.redirect_stdout(io.StringIO()):
+        traditional = simulation.simulate_traditional_delivery(
+            orders, warehouse_locations,
+            riders_per_warehouse=scenario['riders_per_warehouse'],
+            average_speed_kmh=scenario['speed_kmh']
+        )
+        mfu = simulation.simulate_mfu_delivery(orders, mfu_locations, average_speed_kmh=scenario['speed_kmh'])
+        comparison = simulation.compare_models()
+
+    row = dict(scenario)
+    _flatten('cost.', comparison['cost_comparison'], row)
+    _flatten('efficiency.', comparison['efficiency_comparison'], row)
+    _flatten('environment.', comparison['environmental_impact'], row)
+    _flatten('traditional.', traditional['efficiency_metrics'], row)
+    _flatten('mfu.', mfu['efficiency_metrics'], row)
+    row['mfu.routes_created'] = mfu['routes_created']
+    row['mfu.utilization'] = mfu['mfu_utilization']
+    row['runtime_seconds'] = time.perf_counter() - started
+    return row
+
+
+def run_sweep(scenarios: List[Dict], workers: int = None, chunksize: int = 4) -> pd.DataFrame:
+    """Run scenarios across a process pool and collect a columnar results table"""
+    workers = workers or os.cpu_count() or 1
+    print(f"Running {len(scenarios)} scenarios on {workers} processes...")
+
+    started = time.perf_counter()
+    columns: Dict[str, List] = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for done, row in enumerate(executor.map(run_scenario, scenarios, chunksize=chunksize), 1):
+            for key in row.keys() - columns.keys():
+                columns[key] = [np.nan] * (done - 1)
+            for key, values in columns.items():
+                values.append(row.get(key, np.nan))
+            if done % 100 == 0 or done == len(scenarios):
+                print(f"  {done}/{len(scenarios)} scenarios ({time.perf_counter() - started:.0f}s)")
+
+    return pd.DataFrame(columns)
+
+
+def confidence_intervals(results: pd.DataFrame, metrics: List[str] = None,
+                         group_by: List[str] = None, z: float = 1.96) -> pd.DataFrame:
+    """Mean and normal-approximation confidence interval of each metric across seeds"""
+    group_by = group_by or [k for k in SCENARIO_KEYS if k in results.columns]
+    metrics = metrics or [c for c in results.columns
+                          if '.' in c and pd.api.types.is_numeric_dtype(results[c])]
+
+    grouped = results.groupby(group_by)[metrics]
+    mean, std, count = grouped.mean(), grouped.std(ddof=1), grouped.count()
+    half_width = z * std / np.sqrt(count)
+
+    summary = pd.concat({
+        'mean': mean,
+        'ci_low': mean - half_width,
+        'ci_high': mean + half_width,
+        'n': count
+    }, axis=1)
+    summary.columns = [f"{metric}.{stat}" for stat, metric in summary.columns]
+    return summary.reset_index()
+
+
+def save_results(results: pd.DataFrame, path: str):
+    """Write a results table as Parquet when pyarrow is available, else CSV"""
+    if path.endswith('.parquet'):
+        try:
+            results.to_parquet(path, index=False)
+            print(f"Saved {len(results)} rows to {path}")
+            return
+        except ImportError:
+            path = path[:-len('.parquet')] + '.csv'
+    results.to_csv(path, index=False)
+    print(f"Saved {len(results)} rows to {path}")
+
+
+def main():
+    """Sweep fleet sizes, depots, speeds, demand and costs over seeds"""
+    print("=== MFU vs Traditional Scenario Sweep ===")
+
+    scenarios = build_scenarios(seeds=int(os.getenv('SWEEP_SEEDS', 10)),
+                                base_orders=int(os.getenv('SWEEP_BASE_ORDERS', 200)))
+    results = run_sweep(scenarios, workers=int(os.getenv('SWEEP_WORKERS', 0)) or None)
+    save_results(results, 'scenario_sweep_results.parquet')
+
+    summary = confidence_intervals(results, metrics=[
+        'cost.cost_savings', 'cost.cost_savings_percent',
+        'efficiency.delivery_time_improvement', 'environment.carbon_reduction_percent'
+    ])
+    save_results(summary, 'scenario_sweep_summary.csv')
+
+    print("\nTop scenarios by mean daily cost savings:")
+    top = summary.sort_values('cost.cost_savings.mean', ascending=False).head(5)
+    for _, row in top.iterrows():
+        label = ', '.join(f"{k}={row[k]}" for k in SCENARIO_KEYS)
+        print(f"- {label}: ${row['cost.cost_savings.mean']:.0f} "
+              f"[{row['cost.cost_savings.ci_low']:.0f}, {row['cost.cost_savings.ci_high']:.0f}]")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from collections import Counter
+from dataset_io import dataset_exists, read_dataset
 
 def analyze_and_fix_skewness():
     """
@@ -43,9 +44,9 @@ def analyze_and_fix_skewness():
         print("Saved balanced M5 Walmart data")
     
     # 3. Analyze zone data if available
-    if 'zone_hour_order_counts.csv' in os.listdir('.'):
+    if dataset_exists('zone_hour_order_counts'):
         print("\n--- Analyzing Zone Data ---")
-        zone_df = pd.read_csv('zone_hour_order_counts.csv')
+        zone_df = read_dataset('zone_hour_order_counts')
         
         # Analyze zone distribution
         zone_totals = zone_df.drop('zone', axis=1).sum(axis=1)
@@ -224,15 +225,15 @@ def generate_summary_report():
     
     # Check original vs balanced files
     files_to_check = [
-        ('order_products__train.csv', 'order_products__train_balanced.csv'),
-        ('train.csv', 'train_balanced.csv'),
-        ('zone_hour_order_counts.csv', 'zone_hour_order_counts_balanced.csv')
+        ('order_products__train', 'order_products__train_balanced'),
+        ('train', 'train_balanced'),
+        ('zone_hour_order_counts', 'zone_hour_order_counts_balanced')
     ]
     
     for original, balanced in files_to_check:
-        if original in os.listdir('.') and balanced in os.listdir('.'):
-            orig_df = pd.read_csv(original)
-            bal_df = pd.read_csv(balanced)
+        if dataset_exists(original) and dataset_exists(balanced):
+            orig_df = read_dataset(original)
+            bal_df = read_dataset(balanced)
             
             report.append(f"## {original} -> {balanced}")
             report.append(f"- Original records: {len(orig_df):,}")
@@ -0,0 +1,34 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from delivery_engine import Order
+from order_store import OrderStore
+
+
+def _orders():
+    placed = datetime(2024, 1, 3, 17, 0)
+    return [
+        Order('ORD-1', '1 Main St', 40.71, -73.99, ['milk', 'eggs'], priority=2,
+              order_time=placed, delivery_deadline=placed + timedelta(minutes=30)),
+        Order('ORD-é', 'Café Rue 2', 40.72, -73.98, [], order_time=placed),
+        Order('注文-3', '1 Main St', 40.73, -73.97, ['milk'])
+    ]
+
+
+def test_rows_round_trip_to_orders():
+    orders = _orders()
+    store = OrderStore.from_orders(orders)
+
+    assert [store.to_order(i) for i in range(len(store))] == orders
+    assert [view.order_id for view in store] == ['ORD-1', 'ORD-é', '注文-3']
+    assert len(store.addresses) == 2 and len(store.product_vocab) == 2
+
+
+def test_slices_select_rows_by_index():
+    store = OrderStore.from_orders(_orders())
+    selection = store.select(np.array([2, 0]))
+
+    assert [view.order_id for view in selection] == ['注文-3', 'ORD-1']
+    assert [view.order_id for view in selection[1:]] == ['ORD-1']
+    assert selection[0].products == ['milk'] and selection[0].delivery_deadline is None
@@ -0,0 +1,86 @@
+import os
+
+import pytest
+
+from pipeline import PipelineRunner, Step
+
+# a.txt keeps the first line of source.txt; b.txt upper-cases a.txt
+SCRIPTS = {
+    'make_a.py': "open('a.txt', 'w').write(open('source.txt').readline())\n",
+    'make_b.py': "open('b.txt', 'w').write(open('a.txt').read().upper())\n",
+    'broken.py': "raise SystemExit(1)\n",
+}
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    for name, code in SCRIPTS.items():
+        (tmp_path / name).write_text(code)
+    (tmp_path / 'source.txt').write_text('first\nsecond\n')
+    return tmp_path
+
+
+def _runner(data_dir, extra=()):
+    steps = [Step('a', str(data_dir / 'make_a.py'), ['source.txt'], ['a.txt']),
+             Step('b', str(data_dir / 'make_b.py'), ['a.txt'], ['b.txt'])] + list(extra)
+    # A fresh runner per call, as every command-line run loads the saved state anew
+    return PipelineRunner(steps, data_dir=str(data_dir), jobs=2)
+
+
+def test_second_run_is_fresh(data_dir):
+    assert _runner(data_dir).run() == {'a': 'ran', 'b': 'ran'}
+    assert (data_dir / 'b.txt').read_text() == 'FIRST\n'
+    assert _runner(data_dir).run() == {'a': 'fresh', 'b': 'fresh'}
+
+
+def test_changed_input_reruns_downstream(data_dir):
+    _runner(data_dir).run()
+    (data_dir / 'source.txt').write_text('changed\nsecond\n')
+
+    assert _runner(data_dir).run(dry_run=True) == {'a': 'stale', 'b': 'stale'}
+    assert _runner(data_dir).run() == {'a': 'ran', 'b': 'ran'}
+    assert (data_dir / 'b.txt').read_text() == 'CHANGED\n'
+
+
+def test_identical_outputs_keep_dependents_fresh(data_dir):
+    _runner(data_dir).run()
+    (data_dir / 'source.txt').write_text('first\nsomething else entirely\n')
+
+    assert _runner(data_dir).run() == {'a': 'ran', 'b': 'fresh'}
+
+
+def test_changed_script_or_missing_output_reruns_step(data_dir):
+    _runner(data_dir).run()
+    with open(data_dir / 'make_b.py', 'a') as f:
+        f.write("# reformatted\n")
+    assert _runner(data_dir).run() == {'a': 'fresh', 'b': 'ran'}
+
+    os.remove(data_dir / 'a.txt')
+    assert _runner(data_dir).run() == {'a': 'ran', 'b': 'fresh'}
+
+
+def test_targets_select_upstream_steps_only(data_dir):
+    assert _runner(data_dir).run(['a']) == {'a': 'ran'}
+    assert not (data_dir / 'b.txt').exists()
+    assert _runner(data_dir).run(['b'], force=['a']) == {'a': 'ran', 'b': 'ran'}
+
+
+def test_failures_and_missing_inputs_block_dependents(data_dir):
+    extra = [Step('broken', str(data_dir / 'broken.py'), ['b.txt'], ['c.txt']),
+             Step('after_broken', str(data_dir / 'make_b.py'), ['c.txt'], ['d.txt'])]
+    assert _runner(data_dir, extra).run() == {'a': 'ran', 'b': 'ran', 'broken': 'failed',
+                                              'after_broken': 'blocked'}
+
+    os.remove(data_dir / 'source.txt')
+    os.remove(data_dir / 'a.txt')
+    status = _runner(data_dir).run()
+    assert status == {'a': 'missing input', 'b': 'blocked'}
+
+
+def test_cycles_and_duplicate_outputs_are_rejected(data_dir):
+    script = str(data_dir / 'make_a.py')
+    with pytest.raises(ValueError, match='cycle'):
+        PipelineRunner([Step('x', script, ['y.txt'], ['x.txt']), Step('y', script, ['x.txt'], ['y.txt'])],
+                       data_dir=str(data_dir))
+    with pytest.raises(ValueError, match='produced by both'):
+        PipelineRunner([Step('x', script, [], ['x.txt']), Step('y', script, [], ['x.txt'])], data_dir=str(data_dir))
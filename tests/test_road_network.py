@@ -0,0 +1,100 @@
+import heapq
+import math
+
+import numpy as np
+import pytest
+
+from road_network import RoadNetwork
+
+
+def _random_network(n_nodes=120, seed=3) -> RoadNetwork:
+    """Random junctions joined to their nearest neighbours, some streets one-way"""
+    rng = np.random.default_rng(seed)
+    lat = 40.73 + rng.uniform(-0.03, 0.03, n_nodes)
+    lng = -73.99 + rng.uniform(-0.03, 0.03, n_nodes)
+    src, dst, speed = [], [], []
+    for u in range(n_nodes):
+        distance = (lat - lat[u]) ** 2 + (lng - lng[u]) ** 2
+        for v in np.argsort(distance)[1:4].tolist():
+            kmh = float(rng.choice([20, 30, 50]))
+            src.append(u), dst.append(v), speed.append(kmh)
+            if rng.random() < 0.7:
+                src.append(v), dst.append(u), speed.append(kmh)
+    return RoadNetwork._from_edges(lat, lng, np.array(src), np.array(dst), np.array(speed))
+
+
+def _dijkstra(network: RoadNetwork, source: int) -> np.ndarray:
+    """Seconds from `source` to every node over the uncontracted edges"""
+    adjacency = [[] for _ in range(len(network))]
+    for u, v, s in zip(network.src.tolist(), network.dst.tolist(), network.seconds.tolist()):
+        adjacency[u].append((v, s))
+    best = np.full(len(network), math.inf)
+    best[source] = 0.0
+    heap = [(0.0, source)]
+    while heap:
+        d, u = heapq.heappop(heap)
+        if d > best[u]:
+            continue
+        for v, s in adjacency[u]:
+            if d + s < best[v]:
+                best[v] = d + s
+                heapq.heappush(heap, (d + s, v))
+    return best
+
+
+@pytest.fixture(scope='module')
+def network():
+    network = _random_network()
+    network.build_index()
+    return network
+
+
+def test_matrix_matches_dijkstra(network):
+    nodes = np.arange(len(network))
+    seconds, _ = network._node_matrix(nodes, nodes)
+    expected = np.array([_dijkstra(network, source) for source in nodes.tolist()])
+
+    assert np.array_equal(np.isinf(seconds), np.isinf(expected))
+    reachable = np.isfinite(expected)
+    np.testing.assert_allclose(seconds[reachable], expected[reachable], rtol=1e-9, atol=1e-6)
+
+
+def test_travel_times_between_junctions_match_dijkstra(network):
+    rng = np.random.default_rng(0)
+    sources = rng.choice(len(network), 15, replace=False)
+    targets = rng.choice(len(network), 15, replace=False)
+    points = lambda nodes: list(zip(network.lat[nodes].tolist(), network.lng[nodes].tolist()))
+    minutes, _ = network.travel_times(points(sources), points(targets))
+
+    for i, source in enumerate(sources.tolist()):
+        expected = _dijkstra(network, source)[targets] / 60
+        expected[targets == source] = 0.0
+        np.testing.assert_allclose(minutes[i], expected, rtol=1e-9, atol=1e-6)
+
+
+def test_route_unpacks_to_a_shortest_path_of_original_edges(network):
+    edges = {}
+    for u, v, s in zip(network.src.tolist(), network.dst.tolist(), network.seconds.tolist()):
+        edges[u, v] = min(s, edges.get((u, v), math.inf))
+    expected = _dijkstra(network, 0)
+
+    checked = 0
+    for target in range(1, len(network)):
+        if math.isinf(expected[target]):
+            continue
+        route = network.route((network.lat[0], network.lng[0]), (network.lat[target], network.lng[target]))
+        nodes = route['nodes']
+        assert nodes[0] == 0 and nodes[-1] == target
+        assert sum(edges[a, b] for a, b in zip(nodes, nodes[1:])) == pytest.approx(expected[target])
+        assert route['minutes'] == pytest.approx(expected[target] / 60)
+        checked += 1
+    assert checked > len(network) // 2
+
+
+def test_saved_index_answers_the_same(network, tmp_path):
+    path = str(tmp_path / 'network.npz')
+    network.save(path)
+    loaded = RoadNetwork.load(path)
+
+    nodes = np.arange(0, len(network), 7)
+    np.testing.assert_array_equal(loaded._node_matrix(nodes, nodes)[0], network._node_matrix(nodes, nodes)[0])
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from delivery_engine import MFU, GoogleMapsAPI, MFUFleetManager, Order
+from rolling_horizon import RollingHorizonPlanner
+
+CENTER = (40.74, -73.99)
+
+
+def _orders(rng, clock, n, tag, minutes=60):
+    return [Order(order_id=f"{tag}_{k}", customer_address='', latitude=CENTER[0] + rng.normal(0, 0.02),
+                  longitude=CENTER[1] + rng.normal(0, 0.02), products=[], order_time=clock,
+                  delivery_deadline=clock + timedelta(minutes=minutes))
+            for k in range(n)]
+
+
+def _accounted(planner):
+    """Every order exactly once: queued, planned, being driven to or delivered"""
+    places = list(planner.queue) + list(planner.delivered)
+    for vehicle in planner.vehicles:
+        places.extend(vehicle.plan)
+        if vehicle.leg_target is not None:
+            places.append(vehicle.leg_target)
+    return sorted(places)
+
+
+def test_no_order_is_lost_when_the_fleet_changes():
+    rng = np.random.default_rng(0)
+    fleet = MFUFleetManager(GoogleMapsAPI())
+    for i in range(6):
+        fleet.add_mfu(MFU(f"MFU_{i+1}", CENTER[0] + rng.normal(0, 0.02), CENTER[1] + rng.normal(0, 0.02), 10))
+    planner = RollingHorizonPlanner(fleet, cycle_budget=0.2, region_size=3)
+    clock = datetime(2024, 1, 3, 17)
+
+    # Tight deadlines leave late stops the improvement search prefers to drop from the plans
+    planner.add_orders(_orders(rng, clock, 50, 'a', minutes=8))
+    planner.step(clock)
+    assert _accounted(planner) == sorted(planner.orders)
+
+    # Shrink capacity below the current plans, retire one MFU and add another
+    for mfu in fleet.mfus.values():
+        mfu.capacity = 2
+    del fleet.mfus['MFU_1']
+    fleet.add_mfu(MFU('MFU_NEW', CENTER[0], CENTER[1], 10))
+    for cycle in range(10):
+        clock += timedelta(seconds=30)
+        planner.add_orders(_orders(rng, clock, 3, f"b{cycle}"))
+        planner.step(clock)
+        assert _accounted(planner) == sorted(planner.orders)
+    assert {vehicle.mfu.mfu_id for vehicle in planner.vehicles} == set(fleet.mfus)
+    assert all(vehicle.load <= vehicle.mfu.capacity for vehicle in planner.vehicles
+               if vehicle.mfu.mfu_id == 'MFU_NEW')
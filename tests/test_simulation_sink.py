@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from simulation_sink import QuantileSketch, RunningStats, SimulationSink, pq, read_table
+
+
+def _batches(seed=0, n_batches=7):
+    """Uneven batches of delivery times with NaNs, and integer route sizes"""
+    rng = np.random.default_rng(seed)
+    for n in rng.integers(1, 5000, n_batches).tolist():
+        minutes = rng.lognormal(3, 0.6, n)
+        minutes[rng.random(n) < 0.05] = np.nan
+        yield {'order_id': np.arange(n), 'minutes': minutes, 'stops': rng.integers(1, 20, n),
+               'zone': rng.choice(['north', 'south'], n)}
+
+
+@pytest.mark.parametrize('use_parquet', [False, pytest.param(True, marks=pytest.mark.skipif(
+    pq is None, reason='needs pyarrow'))])
+def test_summary_matches_numpy_over_all_rows(tmp_path, use_parquet):
+    batches = list(_batches())
+    with SimulationSink(str(tmp_path), batch_rows=3000, use_parquet=use_parquet) as sink:
+        for batch in batches:
+            sink.write('orders', **batch)
+        summary = sink.summary()['orders']
+
+    assert set(summary) == {'order_id', 'minutes', 'stops'}  # strings are stored, not summarised
+    for column in ('minutes', 'stops'):
+        values = np.concatenate([batch[column] for batch in batches]).astype(np.float64)
+        values = values[~np.isnan(values)]
+        stats = summary[column]
+        assert stats['count'] == len(values)
+        assert stats['sum'] == pytest.approx(values.sum(), rel=1e-9)
+        assert stats['mean'] == pytest.approx(values.mean(), rel=1e-9)
+        assert stats['std'] == pytest.approx(values.std(ddof=1), rel=1e-9)
+        assert stats['min'] == values.min() and stats['max'] == values.max()
+        for q in (50, 90, 95, 99):
+            # Within the sketch's 1% relative accuracy of the nearest-rank quantile
+            exact = np.percentile(values, q, method='lower')
+            assert stats[f'p{q}'] == pytest.approx(exact, rel=0.011)
+
+    table = read_table(str(tmp_path), 'orders')
+    expected = np.concatenate([batch['minutes'] for batch in batches])
+    np.testing.assert_array_equal(table['minutes'].to_numpy(), expected)
+    assert list(table['zone']) == [z for batch in batches for z in batch['zone'].tolist()]
+
+
+def test_running_stats_merge_matches_one_pass():
+    rng = np.random.default_rng(1)
+    values = rng.normal(1e6, 3.0, 10_000)  # Large mean, small spread: naive sum-of-squares loses precision
+    stats = RunningStats()
+    for part in np.array_split(values, [1, 2, 500, 9_000]):
+        stats.update(part)
+    stats.update(np.array([]))
+
+    assert stats.count == len(values)
+    assert stats.mean == pytest.approx(values.mean(), rel=1e-12)
+    assert stats.std == pytest.approx(values.std(ddof=1), rel=1e-9)
+
+
+def test_quantile_sketch_zero_bucket_and_empty():
+    sketch = QuantileSketch()
+    assert np.isnan(sketch.quantile(0.5))
+    sketch.update(np.array([0.0, 0.0, 0.0, 5.0]))
+    assert sketch.quantile(0.5) == 0.0
+    assert sketch.quantile(1.0) == pytest.approx(5.0, rel=0.01)
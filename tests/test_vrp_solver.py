@@ -0,0 +1,86 @@
+import math
+
+import numpy as np
+import pytest
+
+from vrp_solver import CVRPTWSolver, VRPProblem, problem_from_orders
+
+
+def _random_problem(n_customers=40, n_vehicles=6, capacity=10, seed=0, open_routes=False) -> VRPProblem:
+    """One depot at node 0, customers with 1-3 units of demand and 60-minute windows"""
+    rng = np.random.default_rng(seed)
+    xy = rng.uniform(0, 30, (n_customers + 1, 2))
+    distance = np.hypot(*(xy[:, None, :] - xy[None, :, :]).transpose(2, 0, 1))
+    ready = np.r_[0.0, rng.uniform(0, 180, n_customers)]
+    due = np.r_[400.0, ready[1:] + 60]
+    return VRPProblem(
+        travel_time=distance * 2,  # 30 km/h
+        distance=distance,
+        depots=[0] * n_vehicles,
+        capacities=[capacity] * n_vehicles,
+        demand=np.r_[0, rng.integers(1, 4, n_customers)].astype(float),
+        ready=ready,
+        due=due,
+        service=np.r_[0.0, np.full(n_customers, 5.0)],
+        customers=list(range(1, n_customers + 1)),
+        open_routes=open_routes
+    )
+
+
+def _check_feasible(problem: VRPProblem, solution):
+    """Every customer served once or reported, within capacity and time windows"""
+    served = [c for route in solution.routes for c in route]
+    assert sorted(served + solution.unassigned) == sorted(problem.customers)
+
+    for vehicle, route in enumerate(solution.routes):
+        depot = problem.depots[vehicle]
+        assert problem.demand[route].sum() <= problem.capacities[vehicle] + 1e-9
+        t, prev = problem.ready[depot], depot
+        for c in route:
+            t = max(problem.ready[c], t + problem.service[prev] + problem.travel_time[prev, c])
+            assert t <= problem.due[c] + 1e-6, f"vehicle {vehicle} reaches {c} at {t:.1f} > {problem.due[c]:.1f}"
+            prev = c
+        if route and not problem.open_routes:
+            assert t + problem.service[prev] + problem.travel_time[prev, depot] <= problem.due[depot] + 1e-6
+
+
+@pytest.mark.parametrize('open_routes', [False, True])
+def test_solution_respects_capacity_and_time_windows(open_routes):
+    problem = _random_problem(open_routes=open_routes)
+    solution = CVRPTWSolver(problem, time_budget=0.3, seed=1).solve()
+
+    _check_feasible(problem, solution)
+    assert solution.lateness == 0
+    assert solution.iterations > 0
+    assert len(solution.unassigned) < len(problem.customers) // 2
+
+
+def test_tight_fleet_reports_unassigned_customers():
+    problem = _random_problem(n_vehicles=2, capacity=5)
+    solution = CVRPTWSolver(problem, time_budget=0.2, seed=1).solve()
+
+    _check_feasible(problem, solution)
+    assert problem.demand[solution.unassigned].sum() >= problem.demand.sum() - 10
+
+
+def test_problem_from_orders_takes_per_depot_capacities():
+    rng = np.random.default_rng(4)
+    points = rng.uniform(0, 5, (3 + 30, 2))
+    km = np.hypot(*(points[:, None, :] - points[None, :, :]).transpose(2, 0, 1))
+    order_times = np.full(30, 1_700_000_000.0)
+    deadlines = np.full(30, np.nan)
+    problem = problem_from_orders(km, km * 2, 3, 1, [4, 0, 6], order_times, deadlines, order_times[0])
+    solution = CVRPTWSolver(problem, time_budget=0.2, seed=0).solve()
+
+    _check_feasible(problem, solution)
+    assert [len(route) for route in solution.routes][1] == 0
+    assert len(solution.unassigned) == 30 - 10
+
+
+def test_construction_stops_at_the_time_budget():
+    problem = _random_problem(n_customers=800, n_vehicles=200, capacity=20, seed=2)
+    solution = CVRPTWSolver(problem, time_budget=0.2, seed=0).solve()
+
+    assert solution.runtime_seconds < 0.2 + 0.25
+    _check_feasible(problem, solution)
+    assert math.isfinite(solution.cost)
@@ -0,0 +1,195 @@
+import time
+from datetime import datetime
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+from dateutil.tz import tzlocal
+
+from dataset_io import dataset_exists, read_dataset
+
+KM_PER_DEG_LAT = 110.574
+KM_PER_DEG_LNG_EQUATOR = 111.320
+
+# Share of orders by hour of day (Instacart order_hour_of_day) used when no zone counts are available
+DEFAULT_HOURLY_PROFILE = [
+    0.7, 0.4, 0.2, 0.2, 0.2, 0.3, 0.9, 2.8, 5.4, 7.6, 8.5, 8.5,
+    8.2, 8.3, 8.3, 8.2, 7.8, 6.4, 5.0, 3.9, 3.0, 2.5, 2.0, 1.3
+]
+# Share of orders by order_dow (0 = Sunday)
+DEFAULT_DOW_PROFILE = [17.6, 17.3, 13.0, 12.1, 11.7, 12.9, 15.4]
+
+
+def instacart_dow(when: datetime) -> int:
+    """Instacart order_dow (0 = Sunday) of a datetime"""
+    return (when.weekday() + 1) % 7
+
+
+def dow_hour(timestamps: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Local Instacart order_dow and hour of epoch-second timestamps (as in
+    order_store.OrderStore); missing times count as now. Each timestamp
+    gets its own UTC offset, so times across a DST change agree with
+    datetime.fromtimestamp.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    flat = np.where(np.isnan(timestamps), time.time(), timestamps).ravel()
+    local = pd.to_datetime(flat, unit='s', utc=True).tz_convert(tzlocal())
+    dow = ((local.dayofweek.to_numpy() + 1) % 7).astype(np.int64)
+    hours = local.hour.to_numpy().astype(np.int64)
+    return dow.reshape(timestamps.shape), hours.reshape(timestamps.shape)
+
+
+class TravelTimeModel:
+    """
+    Time-dependent travel speeds between zones of the service area.
+
+    The area is split into a rows x cols grid of zones. `speed_kmh` is a
+    precomputed float16 tensor indexed [origin zone, destination zone,
+    order_dow, hour], so a whole matrix of travel times is one fancy-index
+    lookup. Speeds come from demand intensity: each zone's orders per
+    (dow, hour) are scaled to 0..1 of its own peak and a pair at peak runs
+    at (1 - max_slowdown) of free-flow. Road distance is the haversine
+    distance times `detour_factor`.
+    """
+
+    def __init__(self, speed_kmh: np.ndarray, bounds: Tuple[float, float, float, float],
+                 grid_shape: Tuple[int, int], detour_factor: float = 1.3):
+        self.speed_kmh = np.asarray(speed_kmh, dtype=np.float16)
+        self.bounds = tuple(float(b) for b in bounds)  # (lat_min, lat_max, lng_min, lng_max)
+        self.grid_shape = tuple(int(n) for n in grid_shape)
+        self.detour_factor = detour_factor
+        self._free_flow = None
+
+    @property
+    def n_zones(self) -> int:
+        return self.grid_shape[0] * self.grid_shape[1]
+
+    # --- Construction ---
+    @classmethod
+    def from_congestion(cls, congestion: np.ndarray, bounds: Tuple[float, float, float, float],
+                        grid_shape: Tuple[int, int], free_flow_kmh: float = 35.0,
+                        max_slowdown: float = 0.6, detour_factor: float = 1.3) -> 'TravelTimeModel':
+        """Build from a (zone, dow, hour) congestion array with values in 0..1"""
+        congestion = np.clip(np.asarray(congestion, dtype=np.float64), 0, 1)
+        pair = (congestion[:, None] + congestion[None, :]) / 2
+        speed = free_flow_kmh * (1 - max_slowdown * pair)
+        return cls(speed, bounds, grid_shape, detour_factor)
+
+    @classmethod
+    def from_zone_counts(cls, zone_hour: pd.DataFrame, zone_dow: pd.DataFrame,
+                         bounds: Tuple[float, float, float, float], grid_shape: Tuple[int, int] = (4, 4),
+                         zone_map: List[int] = None, **kwargs) -> 'TravelTimeModel':
+        """
+        Build from zone_hour_order_counts / zone_dow_order_counts tables.
+
+        Demand zones (from instacart_zone_assignment) are customer clusters
+        without coordinates, so `zone_map[i]` names the demand zone whose
+        profile grid cell i takes; by default the cells cycle through them.
+        Hour and day profiles are combined as count[z, d, h] =
+        hour[z, h] * dow[z, d] / total[z].
+        """
+        hour = zone_hour.reindex(columns=range(24), fill_value=0).to_numpy(dtype=np.float64)
+        dow = zone_dow.reindex(columns=range(7), fill_value=0).to_numpy(dtype=np.float64)
+        totals = np.maximum(hour.sum(axis=1), 1)
+        counts = dow[:, :, None] * hour[:, None, :] / totals[:, None, None]
+        intensity = counts / np.maximum(counts.max(axis=(1, 2), keepdims=True), 1e-9)
+
+        n_cells = grid_shape[0] * grid_shape[1]
+        zone_map = np.asarray(zone_map if zone_map is not None else np.arange(n_cells) % len(intensity))
+        return cls.from_congestion(intensity[zone_map], bounds, grid_shape, **kwargs)
+
+    @classmethod
+    def from_orders(cls, orders: pd.DataFrame, bounds: Tuple[float, float, float, float],
+                    grid_shape: Tuple[int, int] = (4, 4), **kwargs) -> 'TravelTimeModel':
+        """Build from an orders_with_zones table (zone, order_dow, order_hour_of_day)"""
+        zone_hour = orders.groupby(['zone', 'order_hour_of_day']).size().unstack(fill_value=0)
+        zone_dow = orders.groupby(['zone', 'order_dow']).size().unstack(fill_value=0)
+        return cls.from_zone_counts(zone_hour, zone_dow, bounds, grid_shape, **kwargs)
+
+    @classmethod
+    def default(cls, center: Tuple[float, float] = (40.7328, -73.9860), radius_km: float = 10.0,
+                grid_shape: Tuple[int, int] = (4, 4), **kwargs) -> 'TravelTimeModel':
+        """
+        Model for a city around `center`, from the aggregate_zone_time_demand
+        outputs when present, else the Instacart-wide hour/day profiles.
+        """
+        lat0, lng0 = center
+        dlat = radius_km / KM_PER_DEG_LAT
+        dlng = radius_km / (KM_PER_DEG_LNG_EQUATOR * np.cos(np.radians(lat0)))
+        bounds = (lat0 - dlat, lat0 + dlat, lng0 - dlng, lng0 + dlng)
+
+        if dataset_exists('zone_hour_order_counts') and dataset_exists('zone_dow_order_counts'):
+            zone_hour = read_dataset('zone_hour_order_counts', index_col='zone')
+            zone_dow = read_dataset('zone_dow_order_counts', index_col='zone')
+            zone_hour.columns = zone_hour.columns.astype(int)
+            zone_dow.columns = zone_dow.columns.astype(int)
+            return cls.from_zone_counts(zone_hour, zone_dow, bounds, grid_shape, **kwargs)
+
+        zone_hour = pd.DataFrame([DEFAULT_HOURLY_PROFILE])
+        zone_dow = pd.DataFrame([DEFAULT_DOW_PROFILE])
+        return cls.from_zone_counts(zone_hour, zone_dow, bounds, grid_shape, **kwargs)
+
+    def save(self, path: str):
+        np.savez_compressed(path, speed_kmh=self.speed_kmh, bounds=np.array(self.bounds),
+                            grid_shape=np.array(self.grid_shape), detour_factor=self.detour_factor)
+
+    @classmethod
+    def load(cls, path: str) -> 'TravelTimeModel':
+        data = np.load(path)
+        return cls(data['speed_kmh'], tuple(data['bounds']), tuple(data['grid_shape']),
+                   float(data['detour_factor']))
+
+    # --- Queries ---
+    def zone_of(self, lat, lng) -> np.ndarray:
+        """Grid zone of each point; points outside the bounds fall in the nearest edge zone"""
+        lat_min, lat_max, lng_min, lng_max = self.bounds
+        rows, cols = self.grid_shape
+        row = np.clip(((np.asarray(lat) - lat_min) / (lat_max - lat_min) * rows).astype(np.int64), 0, rows - 1)
+        col = np.clip(((np.asarray(lng) - lng_min) / (lng_max - lng_min) * cols).astype(np.int64), 0, cols - 1)
+        return row * cols + col
+
+    def speeds(self, origin_lat, origin_lng, dest_lat, dest_lng, dow, hour) -> np.ndarray:
+        """Speed (km/h) for broadcastable arrays of origins, destinations, days and hours"""
+        origin_zone = self.zone_of(origin_lat, origin_lng)
+        dest_zone = self.zone_of(dest_lat, dest_lng)
+        return self.speed_kmh[origin_zone, dest_zone, np.asarray(dow) % 7, np.asarray(hour) % 24].astype(np.float64)
+
+    def free_flow_kmh(self, origin_lat, origin_lng, dest_lat, dest_lng) -> np.ndarray:
+        """Fastest speed of each zone pair over the week"""
+        if self._free_flow is None:
+            self._free_flow = self.speed_kmh.max(axis=(2, 3)).astype(np.float64)
+        return self._free_flow[self.zone_of(origin_lat, origin_lng), self.zone_of(dest_lat, dest_lng)]
+
+    def travel_matrix(self, origins: List[Tuple[float, float]], destinations: List[Tuple[float, float]],
+                      when: datetime = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(km, minutes) matrices between points for a departure at `when` (default: now)"""
+        when = when or datetime.now()
+        origins = np.asarray(origins, dtype=np.float64).reshape(-1, 2)
+        destinations = np.asarray(destinations, dtype=np.float64).reshape(-1, 2)
+
+        o_lat, o_lng = np.radians(origins[:, 0])[:, None], np.radians(origins[:, 1])[:, None]
+        d_lat, d_lng = np.radians(destinations[:, 0])[None, :], np.radians(destinations[:, 1])[None, :]
+        a = np.sin((d_lat - o_lat) / 2) ** 2 + np.cos(o_lat) * np.cos(d_lat) * np.sin((d_lng - o_lng) / 2) ** 2
+        km = 2 * 6371 * np.arcsin(np.sqrt(a)) * self.detour_factor
+
+        speed = self.speeds(origins[:, 0][:, None], origins[:, 1][:, None],
+                            destinations[:, 0][None, :], destinations[:, 1][None, :],
+                            instacart_dow(when), when.hour)
+        return km, km / speed * 60
+
+
+def main():
+    """Compare travel times across the day for one origin/destination pair"""
+    print("=== Time-Dependent Travel Time Model ===")
+    model = TravelTimeModel.default()
+    print(f"Speed tensor {model.speed_kmh.shape} ({model.speed_kmh.nbytes / 1024:.0f} KiB)")
+
+    origin, destination = (40.7128, -74.0060), (40.7589, -73.9851)
+    for hour in (3, 6, 9, 12, 18, 22):
+        km, minutes = model.travel_matrix([origin], [destination], datetime(2024, 1, 3, hour))
+        print(f"Wednesday {hour:02d}:00 - {km[0, 0]:.1f} km in {minutes[0, 0]:.1f} min")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,552 @@
+import math
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+EPSILON = 1e-6
+DEFAULT_SERVICE_MINUTES = 2.0  # Handover time at each stop
+
+
+@dataclass
+class VRPProblem:
+    """
+    Capacitated VRP with time windows over a shared node matrix.
+
+    Nodes are indexed into `travel_time` (minutes) and `distance` (km);
+    depots and customers share the index space. Vehicle k starts at node
+    `depots[k]` with capacity `capacities[k]`. Service at a customer must
+    start within [ready, due]; `due` may be inf. With `open_routes`
+    vehicles end at their last customer, otherwise they return to their
+    depot before its due time.
+    """
+    travel_time: np.ndarray
+    distance: np.ndarray
+    depots: List[int]
+    capacities: List[float]
+    demand: np.ndarray
+    ready: np.ndarray
+    due: np.ndarray
+    service: np.ndarray
+    customers: List[int]
+    open_routes: bool = False
+    vehicle_cost: float = 0.0
+
+    @property
+    def n_vehicles(self) -> int:
+        return len(self.depots)
+
+
+@dataclass
+class VRPSolution:
+    """Customer sequence per vehicle plus objective breakdown"""
+    routes: List[List[int]]
+    unassigned: List[int]
+    cost: float
+    distance: float
+    lateness: float
+    iterations: int = 0
+    runtime_seconds: float = 0.0
+    history: List[Tuple[float, float]] = field(default_factory=list)  # (seconds, best cost)
+
+    @property
+    def vehicles_used(self) -> int:
+        return sum(1 for route in self.routes if route)
+
+
+class _Route:
+    """Immutable evaluated route: service start times and latest feasible starts"""
+
+    __slots__ = ('vehicle', 'nodes', 'load', 'distance', 'starts', 'latest', 'lateness')
+
+    def __init__(self, vehicle, nodes, load, distance, starts, latest, lateness):
+        self.vehicle = vehicle
+        self.nodes = nodes
+        self.load = load
+        self.distance = distance
+        self.starts = starts
+        self.latest = latest
+        self.lateness = lateness
+
+
+class CVRPTWSolver:
+    """
+    Clarke-Wright savings construction improved by adaptive large
+    neighbourhood search (Ropke & Pisinger) under a wall-clock budget.
+
+    Destroy operators: random, worst-distance, related (Shaw) and whole
+    route removal. Repair operators: greedy and regret-2 insertion with
+    O(1) time-window checks from cached earliest/latest start times.
+    Operator weights adapt per segment of iterations, and candidates are
+    accepted by simulated annealing cooled over the time budget.
+    Customers that fit nowhere stay unassigned at a large penalty.
+
+    The budget covers construction too: savings merges and insertions
+    stop at the deadline, leaving the customers not yet placed unassigned.
+    """
+
+    SEGMENT = 50
+    REACTION = 0.2
+    SCORE_BEST, SCORE_BETTER, SCORE_ACCEPTED = 33, 9, 13
+
+    def __init__(self, problem: VRPProblem, time_budget: float = 5.0, seed: int = 0,
+                 max_iterations: int = None, unassigned_penalty: float = None, lateness_penalty: float = 100.0):
+        self.problem = problem
+        self.time_budget = time_budget
+        self.max_iterations = max_iterations
+        self._deadline = None  # perf_counter() at which solve() must stop, None outside solve()
+        self.rng = random.Random(seed)
+
+        # Python lists index much faster than NumPy scalars in the inner loops
+        self.T = problem.travel_time.tolist()
+        self.D = problem.distance.tolist()
+        self.demand = np.asarray(problem.demand, dtype=float).tolist()
+        self.ready = np.asarray(problem.ready, dtype=float).tolist()
+        self.due = np.asarray(problem.due, dtype=float).tolist()
+        self.service = np.asarray(problem.service, dtype=float).tolist()
+        self.depots = list(problem.depots)
+        self.capacities = list(problem.capacities)
+        self.open_routes = problem.open_routes
+
+        finite = problem.distance[np.isfinite(problem.distance)]
+        self.max_distance = float(finite.max()) if len(finite) else 1.0
+        self.unassigned_penalty = (unassigned_penalty if unassigned_penalty is not None
+                                   else 4 * self.max_distance + 2 * problem.vehicle_cost)
+        self.lateness_penalty = lateness_penalty
+        due_finite = [d for d in self.due if math.isfinite(d)]
+        self.horizon = max(due_finite) - min(self.ready) if due_finite else 1.0
+
+        self.destroy_operators = [self._random_removal, self._worst_removal,
+                                  self._related_removal, self._route_removal]
+        self.repair_operators = [self._greedy_insertion, self._regret_insertion]
+
+    # --- Route evaluation ---
+    def _evaluate(self, vehicle: int, nodes: List[int]) -> _Route:
+        T, D, ready, due, service = self.T, self.D, self.ready, self.due, self.service
+        depot = self.depots[vehicle]
+        t = ready[depot]
+        prev = depot
+        load = distance = lateness = 0.0
+        starts = []
+        for c in nodes:
+            t = max(ready[c], t + service[prev] + T[prev][c])
+            if t > due[c]:
+                lateness += t - due[c]
+            distance += D[prev][c]
+            load += self.demand[c]
+            starts.append(t)
+            prev = c
+
+        end_latest = math.inf
+        if not self.open_routes and nodes:
+            distance += D[prev][depot]
+            end = t + service[prev] + T[prev][depot]
+            end_latest = due[depot]
+            if end > end_latest:
+                lateness += end - end_latest
+
+        latest = [0.0] * len(nodes)
+        next_latest, nxt = end_latest, depot
+        for k in range(len(nodes) - 1, -1, -1):
+            c = nodes[k]
+            bound = next_latest - service[c] - T[c][nxt] if math.isfinite(next_latest) else math.inf
+            latest[k] = min(due[c], bound)
+            next_latest, nxt = latest[k], c
+
+        return _Route(vehicle, nodes, load, distance, starts, latest, lateness)
+
+    def _cost(self, routes: List[_Route], unassigned: List[int]) -> float:
+        cost = len(unassigned) * self.unassigned_penalty
+        for route in routes:
+            if route.nodes:
+                cost += route.distance + self.problem.vehicle_cost + route.lateness * self.lateness_penalty
+        return cost
+
+    def _insertion(self, route: _Route, c: int) -> Tuple[float, int]:
+        """Cheapest feasible (delta distance, position) for customer c in route, or (inf, -1)"""
+        if route.load + self.demand[c] > self.capacities[route.vehicle] + EPSILON:
+            return math.inf, -1
+        T, D, ready, due, service = self.T, self.D, self.ready, self.due, self.service
+        depot = self.depots[route.vehicle]
+        nodes, starts, latest = route.nodes, route.starts, route.latest
+        closed = not self.open_routes
+        ready_c, due_c, service_c = ready[c], due[c], service[c]
+
+        best, best_pos = math.inf, -1
+        if not nodes:
+            delta = D[depot][c] + (D[c][depot] if closed else 0.0) + self.problem.vehicle_cost
+            arrival = max(ready_c, ready[depot] + T[depot][c])
+            if arrival <= due_c + EPSILON and (not closed or
+                                               arrival + service_c + T[c][depot] <= due[depot] + EPSILON):
+                return delta, 0
+            return math.inf, -1
+
+        for pos in range(len(nodes) + 1):
+            prev = nodes[pos - 1] if pos else depot
+            prev_start = starts[pos - 1] if pos else ready[depot]
+            arrival = max(ready_c, prev_start + service[prev] + T[prev][c])
+            if arrival > due_c + EPSILON:
+                break  # later positions only start later
+            if pos < len(nodes):
+                nxt = nodes[pos]
+                delta = D[prev][c] + D[c][nxt] - D[prev][nxt]
+                if delta >= best:
+                    continue
+                if max(ready[nxt], arrival + service_c + T[c][nxt]) > latest[pos] + EPSILON:
+                    continue
+            elif closed:
+                delta = D[prev][c] + D[c][depot] - D[prev][depot]
+                if delta >= best or arrival + service_c + T[c][depot] > due[depot] + EPSILON:
+                    continue
+            else:
+                delta = D[prev][c]
+                if delta >= best:
+                    continue
+            best, best_pos = delta, pos
+        return best, best_pos
+
+    def _out_of_time(self) -> bool:
+        return self._deadline is not None and time.perf_counter() >= self._deadline
+
+    # --- Construction ---
+    def construct(self) -> Tuple[List[_Route], List[int]]:
+        """Parallel savings per depot, then greedy insertion of leftovers"""
+        D = self.D
+        vehicles_by_depot: Dict[int, List[int]] = {}
+        for vehicle, depot in enumerate(self.depots):
+            vehicles_by_depot.setdefault(depot, []).append(vehicle)
+
+        groups: Dict[int, List[int]] = {depot: [] for depot in vehicles_by_depot}
+        for c in self.problem.customers:
+            groups[min(groups, key=lambda depot: D[depot][c])].append(c)
+
+        routes = [self._evaluate(v, []) for v in range(self.problem.n_vehicles)]
+        unassigned = []
+        for depot, customers in groups.items():
+            vehicles = sorted(vehicles_by_depot[depot], key=lambda v: -self.capacities[v])
+            probe = vehicles[0]
+            capacity = self.capacities[probe]
+
+            route_of: Dict[int, List[int]] = {}
+            for c in customers:
+                single = self._evaluate(probe, [c])
+                if single.lateness > EPSILON or single.load > capacity + EPSILON:
+                    unassigned.append(c)
+                else:
+                    route_of[c] = [c]
+
+            # Saving of linking i -> j (as one route) instead of serving both from the depot
+            members = np.array(list(route_of), dtype=np.int64)
+            distance = self.problem.distance
+            savings = distance[depot, members][None, :] - distance[np.ix_(members, members)]
+            if not self.open_routes:
+                savings += distance[members, depot][:, None]
+            np.fill_diagonal(savings, -np.inf)
+            pairs = np.flatnonzero(savings > 0)
+            pairs = pairs[np.argsort(-savings.ravel()[pairs], kind='stable')]
+
+            for k, (i, j) in enumerate(zip(members[pairs // len(members)].tolist(),
+                                           members[pairs % len(members)].tolist())):
+                if k % 64 == 0 and self._out_of_time():
+                    break
+                ri, rj = route_of[i], route_of[j]
+                if ri is rj or ri[-1] != i or rj[0] != j:
+                    continue
+                merged = ri + rj
+                candidate = self._evaluate(probe, merged)
+                if candidate.load > capacity + EPSILON or candidate.lateness > EPSILON:
+                    continue
+                for c in merged:
+                    route_of[c] = merged
+
+            built = {id(r): r for r in route_of.values()}.values()
+            for vehicle, nodes in zip(vehicles, sorted(built, key=len, reverse=True)):
+                routes[vehicle] = self._evaluate(vehicle, nodes)
+            assigned = {c for vehicle in vehicles for c in routes[vehicle].nodes}
+            unassigned.extend(c for c in route_of if c not in assigned)
+
+        self._greedy_insertion(routes, unassigned)
+        return routes, unassigned
+
+    # --- Destroy operators (remove customers in place, return them) ---
+    def _remove(self, routes: List[_Route], customers: List[int]):
+        drop = set(customers)
+        for k, route in enumerate(routes):
+            if drop.intersection(route.nodes):
+                routes[k] = self._evaluate(route.vehicle, [c for c in route.nodes if c not in drop])
+
+    def _assigned(self, routes: List[_Route]) -> List[int]:
+        return [c for route in routes for c in route.nodes]
+
+    def _random_removal(self, routes, q):
+        customers = self.rng.sample(self._assigned(routes), min(q, len(self._assigned(routes))))
+        self._remove(routes, customers)
+        return customers
+
+    def _worst_removal(self, routes, q):
+        D = self.D
+        gains = []
+        for route in routes:
+            depot = self.depots[route.vehicle]
+            nodes = route.nodes
+            for k, c in enumerate(nodes):
+                prev = nodes[k - 1] if k else depot
+                nxt = nodes[k + 1] if k + 1 < len(nodes) else (None if self.open_routes else depot)
+                gain = D[prev][c] + (D[c][nxt] - D[prev][nxt] if nxt is not None else 0.0)
+                gains.append((gain, c))
+        gains.sort(reverse=True)
+        customers = []
+        while gains and len(customers) < q:
+            customers.append(gains.pop(int(self.rng.random() ** 3 * len(gains)))[1])
+        self._remove(routes, customers)
+        return customers
+
+    def _related_removal(self, routes, q):
+        assigned = self._assigned(routes)
+        if not assigned:
+            return []
+        D, ready = self.D, self.ready
+        seed = self.rng.choice(assigned)
+        customers = [seed]
+        remaining = [c for c in assigned if c != seed]
+        while remaining and len(customers) < q:
+            anchor = self.rng.choice(customers)
+            remaining.sort(key=lambda c: D[anchor][c] / self.max_distance + abs(ready[anchor] - ready[c]) / self.horizon)
+            customers.append(remaining.pop(int(self.rng.random() ** 6 * len(remaining))))
+        self._remove(routes, customers)
+        return customers
+
+    def _route_removal(self, routes, q):
+        used = [route for route in routes if route.nodes]
+        if not used:
+            return []
+        # Prefer short routes: emptying them is how vehicles are saved
+        used.sort(key=lambda route: len(route.nodes))
+        route = used[int(self.rng.random() ** 2 * len(used))]
+        customers = list(route.nodes)
+        self._remove(routes, customers)
+        return customers
+
+    # --- Repair operators (insert into routes in place, leftovers stay in `pending`) ---
+    def _candidate_routes(self, routes: List[_Route]) -> List[int]:
+        """Non-empty routes plus one empty vehicle per (depot, capacity)"""
+        seen = set()
+        candidates = []
+        for k, route in enumerate(routes):
+            if route.nodes:
+                candidates.append(k)
+            else:
+                key = (self.depots[route.vehicle], self.capacities[route.vehicle])
+                if key not in seen:
+                    seen.add(key)
+                    candidates.append(k)
+        return candidates
+
+    @staticmethod
+    def _rank(options: Dict[int, Tuple[float, int]]) -> Tuple[float, int, float, int]:
+        """(best cost, its route, second-best cost, its route) over per-route insertion options"""
+        best = second = math.inf
+        best_k = second_k = -1
+        for k, (cost, _) in options.items():
+            if cost < best:
+                best, best_k, second, second_k = cost, k, best, best_k
+            elif cost < second:
+                second, second_k = cost, k
+        return best, best_k, second, second_k
+
+    def _insert_all(self, routes: List[_Route], pending: List[int], regret: bool):
+        # Customers whose options were priced before the deadline; the rest stay pending
+        options, ranks = {}, {}
+        candidates = self._candidate_routes(routes)
+        for c in pending:
+            if self._out_of_time():
+                break
+            options[c] = {k: self._insertion(routes[k], c) for k in candidates}
+            ranks[c] = self._rank(options[c])
+        placing = list(options)
+
+        while placing and not self._out_of_time():
+            choice, choice_key = None, None
+            for c in placing:
+                best, _, second, _ = ranks[c]
+                if math.isinf(best):
+                    continue
+                if regret:
+                    key = (-(second - best) if math.isfinite(second) else -math.inf, best)
+                else:
+                    key = (best,)
+                if choice_key is None or key < choice_key:
+                    choice, choice_key = c, key
+            if choice is None:
+                break
+
+            k = ranks[choice][1]
+            pos = options[choice][k][1]
+            route = routes[k]
+            was_empty = not route.nodes
+            routes[k] = self._evaluate(route.vehicle, route.nodes[:pos] + [choice] + route.nodes[pos:])
+            pending.remove(choice)
+            placing.remove(choice)
+            del options[choice], ranks[choice]
+
+            # Only route k changed (plus a fresh empty vehicle when k was empty)
+            candidates = self._candidate_routes(routes) if was_empty else ()
+            for c in placing:
+                opts = options[c]
+                for j in candidates:
+                    if j not in opts:
+                        opts[j] = self._insertion(routes[j], c)
+                opts[k] = self._insertion(routes[k], c)
+                _, best_k, second, second_k = ranks[c]
+                if was_empty or k == best_k or k == second_k or opts[k][0] < second:
+                    ranks[c] = self._rank(opts)
+
+    def _greedy_insertion(self, routes, pending):
+        self._insert_all(routes, pending, regret=False)
+
+    def _regret_insertion(self, routes, pending):
+        self._insert_all(routes, pending, regret=True)
+
+    # --- Search ---
+    def _solution(self, routes: List[_Route], unassigned: List[int], **extra) -> VRPSolution:
+        return VRPSolution(
+            routes=[list(route.nodes) for route in routes],
+            unassigned=sorted(unassigned),
+            cost=self._cost(routes, unassigned),
+            distance=sum(route.distance for route in routes),
+            lateness=sum(route.lateness for route in routes),
+            **extra
+        )
+
+    def _roulette(self, weights: List[float]) -> int:
+        pick = self.rng.random() * sum(weights)
+        for k, weight in enumerate(weights):
+            pick -= weight
+            if pick <= 0:
+                return k
+        return len(weights) - 1
+
+    def solve(self, initial: Optional[VRPSolution] = None) -> VRPSolution:
+        """Construct (or warm-start from `initial`) and improve until the time budget runs out"""
+        started = time.perf_counter()
+        self._deadline = started + self.time_budget
+        try:
+            return self._solve(started, initial)
+        finally:
+            self._deadline = None
+
+    def _solve(self, started: float, initial: Optional[VRPSolution]) -> VRPSolution:
+        if initial is not None:
+            routes = [self._evaluate(v, list(nodes)) for v, nodes in enumerate(initial.routes)]
+            unassigned = list(initial.unassigned)
+            self._greedy_insertion(routes, unassigned)
+        else:
+            routes, unassigned = self.construct()
+
+        current_routes, current_unassigned = routes, unassigned
+        current_cost = best_cost = self._cost(routes, unassigned)
+        best_routes, best_unassigned = list(routes), list(unassigned)
+        history = [(time.perf_counter() - started, best_cost)]
+
+        n_customers = len(self.problem.customers)
+        if n_customers == 0:
+            return self._solution(best_routes, best_unassigned, runtime_seconds=time.perf_counter() - started)
+
+        destroy_weights = [1.0] * len(self.destroy_operators)
+        repair_weights = [1.0] * len(self.repair_operators)
+        destroy_scores = [0.0] * len(destroy_weights)
+        repair_scores = [0.0] * len(repair_weights)
+        destroy_uses = [0] * len(destroy_weights)
+        repair_uses = [0] * len(repair_weights)
+
+        # Accept a 5% worse solution with probability 0.5 at the start, ~0 at the end
+        start_temperature = max(0.05 * current_cost / math.log(2), EPSILON)
+        end_temperature = start_temperature / 1000
+        min_remove = min(4, n_customers)
+        max_remove = max(min_remove, min(40, int(0.3 * n_customers)))
+
+        iteration = 0
+        while True:
+            elapsed = time.perf_counter() - started
+            if elapsed >= self.time_budget or (self.max_iterations is not None and iteration >= self.max_iterations):
+                break
+            iteration += 1
+            progress = min(elapsed / self.time_budget, 1.0) if self.time_budget else 1.0
+            temperature = start_temperature * (end_temperature / start_temperature) ** progress
+
+            d = self._roulette(destroy_weights)
+            r = self._roulette(repair_weights)
+            routes = list(current_routes)
+            removed = self.destroy_operators[d](routes, self.rng.randint(min_remove, max_remove))
+            pending = list(current_unassigned) + removed
+            self.repair_operators[r](routes, pending)
+            cost = self._cost(routes, pending)
+
+            score = 0
+            if cost < best_cost - EPSILON:
+                best_cost, best_routes, best_unassigned = cost, list(routes), list(pending)
+                history.append((time.perf_counter() - started, best_cost))
+                score = self.SCORE_BEST
+            if cost < current_cost - EPSILON:
+                score = score or self.SCORE_BETTER
+            if cost < current_cost - EPSILON or self.rng.random() < math.exp(-(cost - current_cost) / temperature):
+                current_routes, current_unassigned, current_cost = routes, pending, cost
+                score = score or self.SCORE_ACCEPTED
+
+            destroy_scores[d] += score
+            repair_scores[r] += score
+            destroy_uses[d] += 1
+            repair_uses[r] += 1
+            if iteration % self.SEGMENT == 0:
+                for weights, scores, uses in ((destroy_weights, destroy_scores, destroy_uses),
+                                              (repair_weights, repair_scores, repair_uses)):
+                    for k in range(len(weights)):
+                        if uses[k]:
+                            weights[k] = (1 - self.REACTION) * weights[k] + self.REACTION * scores[k] / uses[k]
+                            weights[k] = max(weights[k], 0.05)
+                        scores[k], uses[k] = 0.0, 0
+
+        return self._solution(best_routes, best_unassigned, iterations=iteration,
+                              runtime_seconds=time.perf_counter() - started, history=history)
+
+
+def problem_from_orders(km: np.ndarray, minutes: np.ndarray, n_depots: int, vehicles_per_depot: int,
+                        capacity, order_times: np.ndarray, deadlines: np.ndarray, departure: float,
+                        service_minutes: float = DEFAULT_SERVICE_MINUTES) -> VRPProblem:
+    """
+    MFU delivery problem on a matrix whose first `n_depots` nodes are MFU
+    locations and the rest orders, in order. `capacity` is one number for
+    every vehicle or one per depot. Each order is one unit of capacity,
+    can be served from its order time and must be reached by its deadline
+    (epoch seconds, NaN = none). Routes are open: an MFU stays at its last
+    stop.
+    """
+    capacities = np.broadcast_to(np.asarray(capacity, dtype=np.float64), (n_depots,)).tolist()
+    n_orders = len(km) - n_depots
+    ready = np.zeros(len(km))
+    due = np.full(len(km), np.inf)
+    ready[n_depots:] = np.nan_to_num(np.maximum((np.asarray(order_times) - departure) / 60, 0), nan=0.0)
+    due[n_depots:] = np.where(np.isnan(deadlines), np.inf, (np.asarray(deadlines) - departure) / 60)
+    service = np.zeros(len(km))
+    service[n_depots:] = service_minutes
+
+    return VRPProblem(
+        travel_time=np.asarray(minutes, dtype=np.float64),
+        distance=np.asarray(km, dtype=np.float64),
+        depots=[depot for depot in range(n_depots) for _ in range(vehicles_per_depot)],
+        capacities=[c for c in capacities for _ in range(vehicles_per_depot)],
+        demand=np.r_[np.zeros(n_depots), np.ones(n_orders)],
+        ready=ready,
+        due=due,
+        service=service,
+        customers=list(range(n_depots, len(km))),
+        open_routes=True
+    )
+
+
+def solve(problem: VRPProblem, time_budget: float = 5.0, seed: int = 0,
+          initial: VRPSolution = None) -> VRPSolution:
+    """Solve a VRPProblem with savings + ALNS within `time_budget` seconds"""
+    return CVRPTWSolver(problem, time_budget=time_budget, seed=seed).solve(initial)